@@ -0,0 +1,119 @@
+# benchmarks/models_memory.py
+"""
+Pomiar pamięci zajmowanej przez stan zadania (JobState + ProcessedFile + MediaInfo) na jeden plik.
+
+Porównuje obecne modele (__slots__, internowane napisy, opcjonalny spis strumieni) z odtworzonymi
+tutaj klasami w dawnym układzie (__dict__, bez internowania).
+Obie wersje budowane są z tych samych danych wczytanych z JSON, jak przy wznawianiu zadania.
+
+Uruchomienie: python benchmarks/models_memory.py [--files 100000]
+"""
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.models import JobState  # noqa: E402
+
+
+class LegacyStreamInfo:
+    def __init__(self, data: Dict[str, Any]):
+        for key, value in data.items(): setattr(self, key, value)
+
+
+class LegacyMediaInfo:
+    def __init__(self, data: Dict[str, Any]):
+        self.file_path = Path(data['file_path']); self.duration = data.get('duration')
+        self.video_codec = data.get('video_codec'); self.audio_codec = data.get('audio_codec')
+        self.width = data.get('width'); self.height = data.get('height')
+        self.format_name = data.get('format_name'); self.bit_rate = data.get('bit_rate')
+        self.frame_rate = data.get('frame_rate'); self.error_message = data.get('error_message')
+        self.streams = [LegacyStreamInfo(s) for s in data.get('streams') or []]
+
+
+class LegacyProcessedFile:
+    def __init__(self, data: Dict[str, Any]):
+        self.file_id = uuid.UUID(data['file_id']); self.original_path = Path(data['original_path']); self.status = data['status']
+        self.start_time = datetime.fromisoformat(data['start_time']) if data.get('start_time') else None
+        self.end_time = datetime.fromisoformat(data['end_time']) if data.get('end_time') else None
+        self.duration_seconds = data.get('duration_seconds')
+        self.output_path = Path(data['output_path']) if data.get('output_path') else None
+        self.error_message = data.get('error_message')
+        self.media_info = LegacyMediaInfo(data['media_info']) if data.get('media_info') else None
+        self.completed_segments = list(data.get('completed_segments') or []); self.segment_duration_seconds = data.get('segment_duration_seconds')
+        self.duplicate_of = None
+
+
+class LegacyJobState:
+    def __init__(self, data: Dict[str, Any]):
+        self.job_id = uuid.UUID(data['job_id']); self.source_directory = Path(data['source_directory'])
+        self.selected_profile_id = uuid.UUID(data['selected_profile_id']); self.status = data['status']
+        self.start_time = datetime.fromisoformat(data['start_time'])
+        self.processed_files = [LegacyProcessedFile(pf) for pf in data['processed_files']]
+        self.total_files = data.get('total_files'); self.end_time = None; self.error_message = None
+
+
+def build_job_json(file_count: int) -> str:
+    """Generuje JSON stanu zadania z realistycznymi, powtarzalnymi wartościami (kodeki, statusy, formaty)."""
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    statuses = ["Oczekujący", "Ukończono", "Błąd", "Pominięto (konflikt)"]
+    files = []
+    for i in range(file_count):
+        source = f"/media/archiwum/seria_{i // 500:04d}/odcinek_{i:06d}.mkv"
+        files.append({
+            'file_id': str(uuid.uuid4()), 'original_path': source, 'status': statuses[i % len(statuses)],
+            'start_time': (start + timedelta(seconds=i)).isoformat(), 'end_time': (start + timedelta(seconds=i + 30)).isoformat(),
+            'duration_seconds': 30.0, 'output_path': source.replace('.mkv', '_h265.mkv'), 'error_message': None,
+            'media_info': {
+                'file_path': source, 'duration': 1440.5, 'video_codec': 'h264', 'audio_codec': 'aac', 'width': 1920, 'height': 1080,
+                'format_name': 'matroska,webm', 'bit_rate': 4500000, 'frame_rate': '24000/1001', 'error_message': None,
+                'streams': [
+                    {'index': 0, 'codec_type': 'video', 'codec_name': 'h264', 'profile': 'High', 'width': 1920, 'height': 1080, 'pix_fmt': 'yuv420p', 'frame_rate': '24000/1001'},
+                    {'index': 1, 'codec_type': 'audio', 'codec_name': 'aac', 'channels': 2, 'channel_layout': 'stereo', 'sample_rate': 48000, 'language': 'pol'},
+                    {'index': 2, 'codec_type': 'subtitle', 'codec_name': 'subrip', 'language': 'pol'},
+                ]
+            },
+            'completed_segments': [], 'segment_duration_seconds': None, 'duplicate_of': None
+        })
+    return json.dumps({
+        'job_id': str(uuid.uuid4()), 'source_directory': '/media/archiwum', 'selected_profile_id': str(uuid.uuid4()),
+        'status': 'W toku', 'start_time': start.isoformat(), 'processed_files': files, 'total_files': file_count,
+        'end_time': None, 'error_message': None
+    })
+
+
+def measure(label: str, job_json: str, build: Callable[[Dict[str, Any]], Any], file_count: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    # Słowniki z json.loads są zwalniane po zbudowaniu modeli; liczy się tylko to, co trzyma obiekt zadania
+    data = json.loads(job_json)
+    job = build(data)
+    del data
+    gc.collect()
+    retained_bytes, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} zajęte: {retained_bytes / 1024 / 1024:8.1f} MiB   na plik: {retained_bytes / file_count:7.0f} B   szczyt: {peak / 1024 / 1024:8.1f} MiB")
+    del job
+    return retained_bytes
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=100000, help="Liczba plików w symulowanym zadaniu.")
+    args = parser.parse_args(argv)
+    job_json = build_job_json(args.files)
+    print(f"Zadanie: {args.files} plików, JSON {len(job_json) / 1024 / 1024:.1f} MiB")
+    before = measure("Przed (__dict__)", job_json, LegacyJobState, args.files)
+    after = measure("Po (__slots__ + intern)", job_json, JobState.from_dict, args.files)
+    print(f"Oszczędność: {(before - after) / args.files:.0f} B na plik ({100.0 * (before - after) / before:.1f}%)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
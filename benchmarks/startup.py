@@ -0,0 +1,125 @@
+# benchmarks/startup.py
+"""
+Czas zimnego startu aplikacji, mierzony w osobnych procesach interpretera (od uruchomienia procesu):
+  importy      - zaimportowanie start.py, czyli wszystkich modułów ładowanych przy starcie,
+  menu         - wejście w MainRouter.run_main_loop (konfiguracja, logowanie, profile, FFmpegManager),
+  narzędzia    - koniec weryfikacji ffprobe/ffmpeg/mkvmerge działającej w tle,
+  1. kodowanie - pierwsza aktualizacja postępu ffmpeg dla pliku z --input (pierwszy profil z listy).
+
+Aplikacja działa na kopii config/ i profiles/ w katalogu tymczasowym, więc log, konfiguracja i profile
+repozytorium pozostają nietknięte. --importtime wypisuje najwolniejsze importy jednego uruchomienia.
+
+Uruchomienie: python benchmarks/startup.py [--runs 5] [--input próbka.mkv] [--importtime]
+"""
+import argparse
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+RESULT_MARKER = "STARTUP_BENCHMARK_RESULT "
+MILESTONES = [('imports', "importy"), ('menu', "menu"), ('tools', "narzędzia"), ('first_encode', "1. kodowanie"), ('encode_done', "koniec kodowania")]
+
+
+def run_child(app_dir: Path, spawn_time: float, input_path: Optional[Path]) -> None:
+    """Uruchamiane w procesie potomnym: start aplikacji z podmienioną pętlą menu, która tylko zapisuje czasy."""
+    sys.path.insert(0, str(REPO_DIR))
+    marks: Dict[str, float] = {}
+    import start
+    marks['imports'] = time.time() - spawn_time
+    from src.cli_handlers.main_router import MainRouter
+
+    def measured_main_loop(router: MainRouter) -> None:
+        marks['menu'] = time.time() - spawn_time
+        router.ffmpeg_manager.wait_for_tool_checks(timeout=30)
+        marks['tools'] = time.time() - spawn_time
+        if input_path is not None: run_first_encode(router, app_dir, input_path, spawn_time, marks)
+
+    MainRouter.run_main_loop = measured_main_loop  # type: ignore[method-assign]
+    start.main(app_base_dir=app_dir)
+    print(RESULT_MARKER + json.dumps(marks), flush=True)
+
+
+def run_first_encode(router, app_dir: Path, input_path: Path, spawn_time: float, marks: Dict[str, float]) -> None:
+    profiles = router.profiler.get_all_profiles()
+    if not profiles: return
+    profile = profiles[0]
+    media_info = router.ffmpeg_manager.get_media_info(input_path)
+    transcoder = router.ffmpeg_manager.transcoder
+
+    def on_progress(*_args) -> None:
+        marks.setdefault('first_encode', time.time() - spawn_time)
+
+    transcoder.display_progress_callback = on_progress
+    output_path = app_dir / "output" / f"{input_path.stem}_startup_benchmark.{profile.output_extension}"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    success, error_message = transcoder.transcode_file(input_path, output_path, profile, media_info)
+    marks['encode_done'] = time.time() - spawn_time
+    if not success: print(f"Kodowanie nieudane: {error_message}", file=sys.stderr)
+
+
+def prepare_app_dir(target_dir: Path) -> None:
+    for dir_name in ('config', 'profiles'):
+        source_dir = REPO_DIR / dir_name
+        if source_dir.is_dir(): shutil.copytree(source_dir, target_dir / dir_name)
+
+
+def run_once(input_path: Optional[Path], importtime: bool) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory(prefix="startup_bench_") as tmp_dir:
+        app_dir = Path(tmp_dir)
+        prepare_app_dir(app_dir)
+        command = [sys.executable]
+        if importtime: command += ['-X', 'importtime']
+        command += [str(Path(__file__).resolve()), '--child', str(app_dir), '--spawn-time']
+        spawn_time = time.time()
+        command.append(repr(spawn_time))
+        if input_path is not None: command += ['--input', str(input_path)]
+        completed = subprocess.run(command, stdin=subprocess.DEVNULL, capture_output=True, text=True, encoding='utf-8', errors='replace')
+    for line in completed.stdout.splitlines():
+        if line.startswith(RESULT_MARKER): break
+    else:
+        raise RuntimeError(f"Proces potomny nie zwrócił wyników (kod {completed.returncode}):\n{completed.stderr[-2000:]}")
+    if importtime: print_slowest_imports(completed.stderr)
+    return json.loads(line[len(RESULT_MARKER):])
+
+
+def print_slowest_imports(importtime_output: str, limit: int = 15) -> None:
+    rows = []
+    for line in importtime_output.splitlines():
+        # Format: "import time: <własny us> | <łącznie us> | <moduł>" (wcięcie nazwy = głębokość)
+        if not line.startswith("import time:") or "cumulative" in line: continue
+        self_us, cumulative_us, module_name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us), int(self_us), module_name.strip()))
+    print(f"Najwolniejsze importy (łącznie z zależnościami), top {limit}:")
+    for cumulative_us, self_us, module_name in sorted(rows, reverse=True)[:limit]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  (własny {self_us / 1000:6.1f} ms)  {module_name}")
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help="Liczba zimnych startów.")
+    parser.add_argument('--input', type=Path, help="Plik wideo do pomiaru czasu do pierwszego kodowania.")
+    parser.add_argument('--importtime', action='store_true', help="Wypisz najwolniejsze importy (python -X importtime) pierwszego uruchomienia.")
+    parser.add_argument('--child', type=Path, help=argparse.SUPPRESS)
+    parser.add_argument('--spawn-time', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    input_path = args.input.expanduser().resolve() if args.input else None
+    if args.child:
+        run_child(args.child, args.spawn_time, input_path); return
+
+    results = [run_once(input_path, importtime=args.importtime and run_index == 0) for run_index in range(max(1, args.runs))]
+    print(f"Zimny start aplikacji, {len(results)} uruchomień (czas od startu procesu):")
+    for key, label in MILESTONES:
+        values = [r[key] for r in results if key in r]
+        if not values: continue
+        print(f"  {label:<18} mediana: {statistics.median(values) * 1000:8.1f} ms   min: {min(values) * 1000:8.1f} ms   max: {max(values) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
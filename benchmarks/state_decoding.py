@@ -0,0 +1,86 @@
+# benchmarks/state_decoding.py
+"""
+Porównanie czasu wczytywania stanu zadania: dawny AppJSONDecoder (object_hook z wyrażeniami regularnymi
+dla każdego napisu i zgadywaniem modelu po kluczach), dekodowanie wg schematu z src/state_codec
+(samo parsowanie - orjson, jeśli zainstalowany - plus from_dict modeli) oraz binarna migawka
+z src/filesystem/job_snapshot (rozmiar na dysku i czas zapisu/odczytu).
+
+Uruchomienie: python benchmarks/state_decoding.py [--files 100000] [--repeat 3]
+"""
+import argparse
+import json
+import re
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models_memory import build_job_json  # noqa: E402
+from src.filesystem.job_snapshot import encode_snapshot, decode_snapshot  # noqa: E402
+from src.models import AppJSONEncoder, EncodingProfile, JobState, MediaInfo, ProcessedFile, RepairProfile  # noqa: E402
+from src.state_codec import ORJSON_AVAILABLE, loads, decode_job_state  # noqa: E402
+
+
+class AppJSONDecoder(json.JSONDecoder):
+    """Dawny dekoder stanu z src/models (przed src/state_codec) - zachowany tu jako punkt odniesienia."""
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(object_hook=self.object_hook, *args, **kwargs)
+    def object_hook(self, dct: Dict[str, Any]) -> Any:
+        for key, value in dct.items():
+            if isinstance(value, str):
+                if re.fullmatch(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d{1,6})?([+-]\d{2}:\d{2}|Z)?', value):
+                    try: dct[key] = datetime.fromisoformat(value); continue
+                    except ValueError: pass
+                if re.fullmatch(r'[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}', value):
+                    try: dct[key] = uuid.UUID(value); continue
+                    except ValueError: pass
+
+        if 'job_id' in dct and 'selected_profile_id' in dct and 'source_directory' in dct : return JobState.from_dict(dct)
+        elif 'file_id' in dct and 'original_path' in dct and 'status' in dct: return ProcessedFile.from_dict(dct)
+        elif 'id' in dct and 'name' in dct and 'ffmpeg_params' in dct and 'applies_to_mkv_only' in dct and 'copy_tags' in dct: # Sprawdź RepairProfile
+            return RepairProfile.from_dict(dct)
+        elif 'id' in dct and 'name' in dct and 'ffmpeg_params' in dct and 'output_extension' in dct:
+            return EncodingProfile.from_dict(dct)
+        elif 'file_path' in dct and ('duration' in dct or 'error_message' in dct or 'video_codec' in dct or 'format_name' in dct or 'bit_rate' in dct or 'frame_rate' in dct):
+             return MediaInfo.from_dict(dct)
+        return dct
+
+
+def best_of(repeat: int, func: Callable[[], object]) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter(); func(); timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=100000, help="Liczba plików w symulowanym zadaniu.")
+    parser.add_argument('--repeat', type=int, default=3, help="Liczba powtórzeń (liczy się najlepszy wynik).")
+    args = parser.parse_args(argv)
+    job_bytes = build_job_json(args.files).encode('utf-8')
+    print(f"Zadanie: {args.files} plików, JSON {len(job_bytes) / 1024 / 1024:.1f} MiB, backend: {'orjson' if ORJSON_AVAILABLE else 'json'}")
+
+    parse_only = best_of(args.repeat, lambda: loads(job_bytes))
+    legacy = best_of(args.repeat, lambda: json.loads(job_bytes, cls=AppJSONDecoder))
+    schema = best_of(args.repeat, lambda: decode_job_state(loads(job_bytes)))
+    print(f"Samo parsowanie:            {parse_only:7.2f} s")
+    print(f"AppJSONDecoder:             {legacy:7.2f} s")
+    print(f"Dekodowanie wg schematu:    {schema:7.2f} s  ({legacy / schema:.1f}x szybciej, parsowanie = {100.0 * parse_only / schema:.0f}% czasu)")
+
+    job_state = decode_job_state(loads(job_bytes))
+    json_save = best_of(args.repeat, lambda: json.dumps(job_state, indent=4, cls=AppJSONEncoder))
+    print(f"\nZapis JSON (indent=4):      {json_save:7.2f} s  {len(json.dumps(job_state, indent=4, cls=AppJSONEncoder)) / 1024 / 1024:7.1f} MiB")
+    for compression in ('none', 'gzip'):
+        snapshot = encode_snapshot(job_state, compression)
+        save = best_of(args.repeat, lambda: encode_snapshot(job_state, compression))
+        load = best_of(args.repeat, lambda: decode_snapshot(snapshot))
+        print(f"Migawka ({compression:<4}):  zapis {save:5.2f} s, odczyt {load:5.2f} s ({schema / load:.1f}x szybciej niż JSON)  {len(snapshot) / 1024 / 1024:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -7,6 +7,7 @@ import sys
 from pathlib import Path
 import json
 import re
+import threading
 import time
 
 try:
@@ -50,6 +51,7 @@ except ImportError:
     styles = PlaceholderStyles() # type: ignore
 
 from .transcoding_display_formatter import TranscodingDisplayFormatter
+from .ffmpeg.process_supervisor import peek_process_supervisor
 try:
     from ..system_monitor.resource_monitor import ResourceMonitor # type: ignore
 except ImportError:
@@ -77,11 +79,18 @@ class CLIDisplay:
         self._menu_sys_info_update_interval: float = 2.0
         self._last_menu_sys_info_str: str = ""; self._last_menu_sys_info_fetch_time: float = 0.0
         self._current_sys_info_line: str = ""; self._progress_bar_first_draw: bool = True
+        # Renderowanie paska postępu: producent (wątek ffmpeg) tylko podmienia krotkę _latest_progress,
+        # rysuje wątek renderera ze stałą częstotliwością; _render_lock porządkuje zapisy do stdout
+        self._latest_progress: Optional[Tuple[Any, ...]] = None; self._progress_active: bool = False
+        self._progress_frame_interval: float = 0.25
+        self._render_lock = threading.RLock(); self._render_wake = threading.Event()
+        self._renderer_thread: Optional[threading.Thread] = None
         if not READCHAR_AVAILABLE and sys.stdin.isatty(): logger.warning("Biblioteka 'readchar' niedostępna. Nawigacja strzałkami w menu nie będzie działać.")
         if self.resource_monitor is None: logger.warning("ResourceMonitor nie przekazany. Info o systemie nie będzie wyświetlane.")
         logger.debug("CLIDisplay: Inicjalizacja zakończona.")
 
     def set_progress_bar_width(self, width: int): self.progress_bar_char_width = max(10, width)
+    def set_progress_refresh_rate(self, frames_per_second: float): self._progress_frame_interval = 1.0 / max(0.5, min(30.0, float(frames_per_second)))
     def get_terminal_width(self) -> int:
         try: columns, _ = shutil.get_terminal_size(fallback=(80, 24)); return columns
         except Exception: return 80
@@ -97,8 +106,9 @@ class CLIDisplay:
         sys.stdout.write(f'\r\033[{num_lines}A'); sys.stdout.flush()
 
     def display_message(self, message: str, style: str = styles.STYLE_INFO, new_line: bool = True):
-        if self._displaying_progress and self._num_progress_lines_written > 0: self.finalize_progress_display()
-        sys.stdout.write(f"{style}{message}{styles.ANSI_RESET}{'\n' if new_line else ''}"); sys.stdout.flush()
+        with self._render_lock:
+            if self._displaying_progress and self._num_progress_lines_written > 0: self.finalize_progress_display()
+            sys.stdout.write(f"{style}{message}{styles.ANSI_RESET}{'\n' if new_line else ''}"); sys.stdout.flush()
 
     def display_header(self, text: str): self.display_message(text, styles.STYLE_HEADER); self.display_separator(); logger.debug(f"Wyświetlono nagłówek: {text}")
     def display_separator(self, length: Optional[int] = None):
@@ -324,6 +334,49 @@ class CLIDisplay:
                              fps: Optional[float] = None, speed: Optional[str] = None,
                              bitrate: Optional[str] = None, eta_seconds_file: Optional[float] = None,
                              output_size_str: Optional[str] = None, output_file_path_str: Optional[str] = None):
+        """
+        Wywołanie zwrotne postępu (ProgressCallbackType). Nie rysuje - zapisuje najnowszą migawkę jedną
+        podmianą atrybutu i budzi wątek renderera przy pierwszej aktualizacji. Rysowanie (szerokość
+        terminala, psutil, dysk, ANSI) odbywa się w wątku renderera co _progress_frame_interval.
+        """
+        self._latest_progress = (percentage, elapsed_time, file_name, file_index, total_files_in_job, fps, speed, bitrate, eta_seconds_file, output_size_str, output_file_path_str)
+        if not self._progress_active:
+            self._progress_active = True
+            self._ensure_progress_renderer()
+            self._render_wake.set()
+
+    def _ensure_progress_renderer(self):
+        with self._render_lock:
+            if self._renderer_thread is not None and self._renderer_thread.is_alive(): return
+            self._renderer_thread = threading.Thread(target=self._progress_renderer_loop, name="progress_renderer", daemon=True)
+            self._renderer_thread.start()
+
+    def _progress_renderer_loop(self):
+        while True:
+            self._render_wake.wait(self._progress_frame_interval if self._progress_active else None)
+            self._render_wake.clear()
+            try: self._render_latest_progress()
+            except Exception as e: logger.error(f"CLIDisplay: Błąd renderowania paska postępu: {e}", exc_info=True)
+
+    def _render_latest_progress(self):
+        with self._render_lock:
+            snapshot = self._latest_progress
+            if not self._progress_active or snapshot is None: return
+            self._draw_progress_frame(*snapshot)
+
+    def stop_progress_rendering(self):
+        """Rysuje ostatnią migawkę i zatrzymuje odświeżanie; pasek zostaje na ekranie (koniec pliku)."""
+        with self._render_lock:
+            self._render_latest_progress()
+            self._progress_active = False; self._latest_progress = None
+            self._displaying_progress = False
+
+    def _draw_progress_frame(self,
+                             percentage: float, elapsed_time: float, file_name: str,
+                             file_index: Optional[int], total_files_in_job: Optional[int],
+                             fps: Optional[float], speed: Optional[str],
+                             bitrate: Optional[str], eta_seconds_file: Optional[float],
+                             output_size_str: Optional[str], output_file_path_str: Optional[str]):
         terminal_width = self.get_terminal_width()
         file_prefix_str = f"{styles.ICON_LIST}{file_index or '?'}/{total_files_in_job or '?'} "
         percent_str = f"{styles.ICON_PERCENT}[{self.formatter.format_percentage(percentage)}]"
@@ -360,7 +413,8 @@ class CLIDisplay:
             cpu_s = f"{styles.ICON_CPU}{cpu_u:.1f}%" if cpu_u is not None else f"{styles.ICON_CPU}N/A"
             ram_s = f"{styles.ICON_RAM}{ram_u['percent']:.1f}%" if ram_u else f"{styles.ICON_RAM}N/A"
             disk_s = f"{styles.ICON_DISK}{disk_u['free_gb']:.1f}GB" if disk_u else f"{styles.ICON_DISK}N/A"
-            self._current_sys_info_line = f"{styles.STYLE_INFO}{cpu_s} | {ram_s} | {disk_s}{styles.ANSI_RESET}"
+            child_s = self._child_process_usage_text()
+            self._current_sys_info_line = f"{styles.STYLE_INFO}{cpu_s} | {ram_s} | {disk_s}{f' | {child_s}' if child_s else ''}{styles.ANSI_RESET}"
         elif not self.resource_monitor or not self.resource_monitor.is_available():
             self._current_sys_info_line = f"{styles.STYLE_WARNING}Monitor zasobów niedostępny{styles.ANSI_RESET}"
         line3_display_padded = (self._current_sys_info_line + " " * max(0, terminal_width - get_visual_length_approx(self._current_sys_info_line)))[:terminal_width]
@@ -379,7 +433,26 @@ class CLIDisplay:
             if i < num_lines - 1: sys.stdout.write('\n')
         sys.stdout.flush(); self._displaying_progress = True; self._num_progress_lines_written = num_lines
 
+    def _child_process_usage_text(self) -> Optional[str]:
+        """Zasoby trwających procesów kodowania (ostatnie odczyty psutil nadzorcy procesów) albo None."""
+        supervisor = peek_process_supervisor()
+        samples = supervisor.active_usage_samples('transcode') if supervisor is not None else []
+        if not samples: return None
+        tool_names = sorted({s.tool_name for s in samples})
+        text = (f"{'/'.join(tool_names)}: {styles.ICON_CPU}{sum(s.cpu_percent for s in samples):.0f}% "
+                f"{styles.ICON_RAM}{self.formatter.format_bytes(sum(s.rss_bytes for s in samples))} "
+                f"wątki {sum(s.num_threads for s in samples)}")
+        read_values = [s.read_bytes for s in samples if s.read_bytes is not None]
+        write_values = [s.write_bytes for s in samples if s.write_bytes is not None]
+        if read_values or write_values: text += f" I/O R {self.formatter.format_bytes(sum(read_values))} W {self.formatter.format_bytes(sum(write_values))}"
+        return text
+
     def finalize_progress_display(self):
+        with self._render_lock:
+            self._progress_active = False; self._latest_progress = None
+            self._finalize_progress_lines()
+
+    def _finalize_progress_lines(self):
         if self._displaying_progress:
             sys.stdout.write('\033[u');
             for _ in range(self._num_progress_lines_written): sys.stdout.write('\033[2K\n')
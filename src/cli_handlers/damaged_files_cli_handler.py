@@ -3,6 +3,7 @@ import logging
 from pathlib import Path
 from typing import Optional, Dict, Any, List, Tuple, Callable # Dodano Callable
 import sys 
+import time
 import json # Dodano dla logowania debug_config_section
 
 from ..cli_display import CLIDisplay, MenuOption
@@ -10,9 +11,12 @@ from ..config_manager import ConfigManager, DEFAULT_CONFIG
 from ..filesystem.damaged_files_manager import DamagedFilesManager
 from ..filesystem.path_resolver import PathResolver
 from ..filesystem.directory_scanner import DirectoryScanner
+from ..filesystem.damage_triage import DamageTriage, TRIAGE_TIER_NAMES, TIER_PROBE
 from ..ffmpeg.ffmpeg_manager import FFmpegManager
 from ..repair_profiler import RepairProfiler 
+from ..repair_engine import RepairEngine
 from ..models import RepairProfile, MediaInfo # Dodano MediaInfo
+from ..validation.input_validator import InputValidator
 from .. import cli_styles as styles
 
 try:
@@ -43,6 +47,8 @@ class DamagedFilesCLIHandler:
         self.path_resolver = path_resolver
         self.directory_scanner = directory_scanner
         self.repair_profiler = repair_profiler
+        self.damage_triage = DamageTriage(config_manager, ffmpeg_manager, damaged_files_manager)
+        self.repair_engine = RepairEngine(config_manager, ffmpeg_manager, repair_profiler, path_resolver)
             
         if RICH_FOR_DAMAGED_HANDLER_AVAILABLE and Console is not None:
             self.rich_console = Console()
@@ -56,7 +62,7 @@ class DamagedFilesCLIHandler:
         last_selected_idx = 0 
         while True:
             menu_title = f"{styles.ICON_BROKEN_FILE} Zarządzanie Uszkodzonymi Plikami"
-            menu_options: List[MenuOption] = [("1", "Wyświetl listę uszkodzonych plików", styles.ICON_LIST),("2", "Skanuj folder w poszukiwaniu uszkodzonych plików", styles.ICON_FOLDER_SCAN),("3", "Spróbuj naprawić plik z listy (wg strategii)", styles.ICON_REPAIR),("4", "Weryfikuj pliki na liście (usuń czytelne)", styles.ICON_SUCCESS),("5", "Usuń wybrany plik z listy", styles.ICON_DELETE),("6", "Wyczyść całą listę uszkodzonych plików", styles.ICON_ERROR),("0", "Powrót do menu głównego", styles.ICON_EXIT)]
+            menu_options: List[MenuOption] = [("1", "Wyświetl listę uszkodzonych plików", styles.ICON_LIST),("2", "Skanuj folder w poszukiwaniu uszkodzonych plików", styles.ICON_FOLDER_SCAN),("3", "Spróbuj naprawić plik z listy (wg strategii)", styles.ICON_REPAIR),("4", "Weryfikuj pliki na liście (usuń czytelne)", styles.ICON_SUCCESS),("5", "Usuń wybrany plik z listy", styles.ICON_DELETE),("6", "Wyczyść całą listę uszkodzonych plików", styles.ICON_ERROR),("7", "Sprawdź integralność pliku (dekodowanie próbek)", styles.ICON_INFO),("0", "Powrót do menu głównego", styles.ICON_EXIT)]
             choice, last_selected_idx = self.display.present_interactive_menu(header_text=menu_title, menu_options=menu_options,prompt_message="Wybierz opcję:", allow_numeric_select=True,initial_selection_index=last_selected_idx)
             if choice == '1': self.display_damaged_files_list_cli()
             elif choice == '2': self.scan_directory_for_damaged_files_cli()
@@ -64,6 +70,7 @@ class DamagedFilesCLIHandler:
             elif choice == '4': self.verify_damaged_files_list_cli()
             elif choice == '5': self._remove_selected_file_from_list_cli()
             elif choice == '6': self._clear_all_damaged_files_confirmed()
+            elif choice == '7': self.check_file_integrity_cli()
             elif choice == '0': logger.debug("Powrót do menu głównego."); break
             else: self.display.display_warning("Nieprawidłowy wybór."); self.display.press_enter_to_continue()
 
@@ -111,34 +118,50 @@ class DamagedFilesCLIHandler:
             else: self.display.display_error(f"Podana ścieżka nie jest prawidłowym katalogiem: {path_candidate}"); self.display.press_enter_to_continue(); return
         else: self.display.display_error("Nie podano ścieżki do katalogu."); self.display.press_enter_to_continue(); return
         if not final_source_dir_path: self.display.display_error("Nie udało się ustalić katalogu źródłowego."); self.display.press_enter_to_continue(); return
-        self.config_manager.set_config_value('paths', 'last_used_source_directory', str(final_source_dir_path))
+        self.config_manager.set_config_value('paths', 'last_used_source_directory', str(final_source_dir_path), debounce_save=True)
         recursive_scan = self.config_manager.get_config_value('general', 'recursive_scan', False); supported_extensions = self.config_manager.get_config_value('processing', 'supported_file_extensions', [])
-        self.display.display_info(f"Skanuję katalog: {final_source_dir_path} (Rekursywnie: {'Tak' if recursive_scan else 'Nie'})...")
+        default_depth = self.config_manager.get_config_value('processing', 'triage.default_depth', TIER_PROBE)
+        depth_options: List[MenuOption] = [(str(tier), f"{tier}. {name}{' (domyślnie)' if tier == default_depth else ''}", None) for tier, name in TRIAGE_TIER_NAMES.items()]
+        depth_options.append(("q", "Anuluj", styles.ICON_EXIT))
+        depth_choice, _ = self.display.present_interactive_menu(header_text="Głębokość sprawdzania (wyższa = dokładniej, wolniej)", menu_options=depth_options, prompt_message="Wybierz głębokość:", allow_numeric_select=True, initial_selection_index=max(0, default_depth - 1))
+        if not depth_choice or depth_choice.lower() == 'q': self.display.display_info("Skanowanie anulowane."); self.display.press_enter_to_continue(); return
+        depth = int(depth_choice) if depth_choice.isdigit() else default_depth
+        self.display.display_info(f"Skanuję katalog: {final_source_dir_path} (Rekursywnie: {'Tak' if recursive_scan else 'Nie'}, głębokość: {depth} - {TRIAGE_TIER_NAMES.get(depth, '?')})...")
         if hasattr(self.display, 'finalize_progress_display') and self.display._displaying_progress : self.display.finalize_progress_display() # type: ignore
-        all_media_infos = self.directory_scanner.scan_directory_for_media_files(source_directory=final_source_dir_path, recursive=recursive_scan, file_extensions=supported_extensions, progress_callback=self.display.display_scan_progress)
-        if hasattr(self.display, '_displaying_progress') and self.display._displaying_progress: 
-            if hasattr(self.display, 'finalize_progress_display'): self.display.finalize_progress_display() # type: ignore
-            else: sys.stdout.write('\r\033[K'); sys.stdout.flush() 
-            setattr(self.display, '_displaying_progress', False) 
-        if not all_media_infos: self.display.display_success("Skanowanie zakończone. Nie znaleziono żadnych plików pasujących do kryteriów lub katalog jest pusty."); self.display.press_enter_to_continue(); return
-        potentially_damaged_files = []
-        for media_info in all_media_infos:
-            if media_info.error_message or (media_info.duration is None or media_info.duration <= 0):
-                media_info.error_message = media_info.error_message or "Plik ma nieprawidłowy lub zerowy czas trwania."
-                potentially_damaged_files.append(media_info)
-        if not potentially_damaged_files: self.display.display_success(f"Skanowanie zakończone. Przeskanowano {len(all_media_infos)} plików. Nie wykryto potencjalnie uszkodzonych plików.")
+        candidate_files = self.directory_scanner.list_candidate_files(final_source_dir_path, recursive_scan, supported_extensions)
+        if not candidate_files: self.display.display_success("Skanowanie zakończone. Nie znaleziono żadnych plików pasujących do kryteriów lub katalog jest pusty."); self.display.press_enter_to_continue(); return
+        triage_results = self.damage_triage.triage_files(candidate_files, depth=depth, progress_callback=self.display.display_scan_progress)
+        sys.stdout.write('\r\033[K'); sys.stdout.flush()
+        potentially_damaged = [r for r in triage_results if r.is_damaged]
+        if not potentially_damaged: self.display.display_success(f"Skanowanie zakończone. Przeskanowano {len(triage_results)} plików. Nie wykryto potencjalnie uszkodzonych plików.")
         else:
-            self.display.display_warning(f"Skanowanie zakończone. Znaleziono {len(potentially_damaged_files)} potencjalnie uszkodzonych plików z {len(all_media_infos)} przeskanowanych:")
-            for i, media_info in enumerate(potentially_damaged_files):
-                self.display.display_message(f" {i+1}. {styles.ICON_BROKEN_FILE} Plik: {media_info.file_path.name} ({media_info.file_path.parent})")
-                self.display.display_error(f"    Problem: {media_info.error_message}")
-            add_to_list_choice = self.display.get_user_choice(f"Czy chcesz dodać te {len(potentially_damaged_files)} pliki do globalnej listy uszkodzonych? ({styles.STYLE_PROMPT}tak/nie{styles.ANSI_RESET}): ").lower()
-            if add_to_list_choice == 'tak':
-                for media_info in potentially_damaged_files: self.damaged_files_manager.add_damaged_file(media_info.file_path, media_info.error_message or "Niesprecyzowany błąd odczytu.", media_info)
-                self.display.display_success(f"Dodano/zaktualizowano {len(potentially_damaged_files)} plików na liście uszkodzonych.")
-            else: self.display.display_info("Pliki nie zostały dodane do listy uszkodzonych.")
+            self.display.display_warning(f"Skanowanie zakończone. Znaleziono {len(potentially_damaged)} potencjalnie uszkodzonych plików z {len(triage_results)} przeskanowanych (dodano do listy uszkodzonych):")
+            for i, result in enumerate(potentially_damaged):
+                self.display.display_message(f" {i+1}. {styles.ICON_BROKEN_FILE} Plik: {result.file_path.name} ({result.file_path.parent})")
+                self.display.display_error(f"    Problem: {result.describe()}")
         self.display.press_enter_to_continue(); logger.debug("scan_directory_for_damaged_files_cli zakończone.")
 
+    def check_file_integrity_cli(self):
+        logger.debug("check_file_integrity_cli rozpoczęte."); self.display.clear_screen(); self.display.display_header(f"{styles.ICON_INFO} Sprawdzanie integralności pliku (dekodowanie próbek)")
+        file_path_str = self.display.get_user_choice("Podaj ścieżkę do pliku wideo: ")
+        is_valid, file_path, err = InputValidator.is_valid_path(file_path_str, check_exists=True, is_dir=False)
+        if not is_valid or not file_path: self.display.display_error(f"Błąd: {err or 'Zła ścieżka.'}"); self.display.press_enter_to_continue(); return
+        depth = self.config_manager.get_config_value('processing', 'integrity_check.depth', 'sampled')
+        self.display.display_info(f"Dekodowanie próbek pliku '{file_path.name}' (tryb: {depth})...")
+        media_info = self.ffmpeg_manager.get_media_info(file_path)
+        report = self.ffmpeg_manager.check_file_integrity(file_path, media_info)
+        for window in report.windows:
+            window_label = f"{self.display.formatter.format_progress_time(window.start_seconds)} (+{window.duration_seconds:.0f}s)" if window.duration_seconds is not None else "cały plik"
+            if window.is_ok: self.display.display_success(f"  Okno {window_label}: OK")
+            else:
+                self.display.display_error(f"  Okno {window_label}: {window.error_count} błędów{' (timeout)' if window.timed_out else ''}")
+                for line in window.error_lines[:2]: self.display.display_message(f"      {line[:120]}", style=styles.STYLE_MENU_DESCRIPTION)
+        if report.is_ok: self.display.display_success(report.summary())
+        else:
+            self.display.display_warning(report.summary())
+            if self.display.get_user_choice(f"Dodać plik do listy uszkodzonych? ({styles.STYLE_PROMPT}tak/nie{styles.ANSI_RESET}): ").lower() == 'tak':
+                self.damaged_files_manager.add_damaged_file(file_path, report.summary(), media_info); self.display.display_success("Plik dodany do listy uszkodzonych.")
+        self.display.press_enter_to_continue(); logger.debug("check_file_integrity_cli zakończone.")
 
     def _attempt_single_file_repair(self, file_entry: Dict[str, Any], file_index_str: str = "") -> bool:
         original_file_path_val = file_entry.get('file_path')
@@ -153,54 +176,14 @@ class DamagedFilesCLIHandler:
 
         repair_cfg_base_path = 'processing.repair_options'
         attempt_sequentially = self.config_manager.get_config_value(repair_cfg_base_path, 'attempt_sequentially', True)
-        use_custom_ffmpeg_profiles_global = self.config_manager.get_config_value(repair_cfg_base_path, 'use_custom_ffmpeg_repair_profiles', True)
-        
-        # --- Budowanie listy AKTYWNYCH strategii/profili ---
-        active_strategies_for_repair: List[Dict[str, Any]] = []
-
-        # 1. Wbudowane strategie (np. mkvmerge_remux)
-        default_builtin_strategies_info = DEFAULT_CONFIG.get('processing', {}).get('repair_options', {}).get('builtin_strategies_config', {})
-        for builtin_key, builtin_details in default_builtin_strategies_info.items():
-            enabled_config_key = f"builtin_strategies_config.{builtin_key}.enabled"
-            is_strategy_enabled = self.config_manager.get_config_value(
-                repair_cfg_base_path, 
-                enabled_config_key, 
-                default=builtin_details.get('enabled', False) # Domyślna wartość z DEFAULT_CONFIG
-            )
-            if is_strategy_enabled:
-                active_strategies_for_repair.append({
-                    "id": f"builtin_{builtin_key}", 
-                    "name": builtin_details.get('name', builtin_key),
-                    "type": "builtin",
-                    "handler_key": builtin_key # Klucz do obsługi w logice (np. 'mkvmerge_remux')
-                })
-                logger.debug(f"Strategia wbudowana '{builtin_details.get('name', builtin_key)}' jest AKTYWNA.")
-            else:
-                logger.debug(f"Strategia wbudowana '{builtin_details.get('name', builtin_key)}' jest WYŁĄCZONA.")
-
-        # 2. Niestandardowe Profile Naprawy FFmpeg
-        if use_custom_ffmpeg_profiles_global:
-            enabled_ffmpeg_profile_ids = self.config_manager.get_config_value(repair_cfg_base_path, 'enabled_ffmpeg_profile_ids', [])
-            all_custom_profiles = self.repair_profiler.get_all_profiles()
-            for profile in all_custom_profiles:
-                if str(profile.id) in enabled_ffmpeg_profile_ids:
-                    active_strategies_for_repair.append({
-                        "id": str(profile.id), 
-                        "name": profile.name,
-                        "type": "ffmpeg_profile",
-                        "profile_object": profile 
-                    })
-                    logger.debug(f"Profil FFmpeg '{profile.name}' (ID: {profile.id}) jest AKTYWNY.")
-                else:
-                    logger.debug(f"Profil FFmpeg '{profile.name}' (ID: {profile.id}) jest WYŁĄCZONY (brak na liście enabled_ffmpeg_profile_ids).")
-        else:
-            logger.info("Używanie niestandardowych profili FFmpeg jest globalnie WYŁĄCZONE.")
-
+        active_strategies_for_repair = self.repair_engine.build_active_strategies()
 
         if not active_strategies_for_repair:
             self.display.display_warning("Brak aktywnych strategii naprawy skonfigurowanych do użycia. Nie można kontynuować naprawy."); return False
 
-        # TODO: Implementacja sortowania strategii, jeśli potrzebna (np. domyślny FFmpeg_copy jako pierwszy)
+        # Kolejność wg historii napraw plików o tym samym kontenerze, kodekach i sygnaturze błędu
+        history_keys = self.repair_engine.history.build_keys(file_entry)
+        active_strategies_for_repair = self.repair_engine.order_strategies(active_strategies_for_repair, history_keys)
 
         strategies_to_attempt_execution: List[Dict[str, Any]] = []
         if attempt_sequentially:
@@ -229,42 +212,36 @@ class DamagedFilesCLIHandler:
         overall_repair_success = False
         final_repaired_file_path_for_job: Optional[Path] = None
 
+        if attempt_sequentially and len(strategies_to_attempt_execution) > 1 and self.config_manager.get_config_value(repair_cfg_base_path, 'race_strategies', False):
+            top_k = self.config_manager.get_config_value(repair_cfg_base_path, 'race_top_k', 2)
+            self.display.display_info(f"Wyścig strategii naprawy (równolegle: {top_k}) - wygrywa pierwsza zweryfikowana naprawa.")
+            race_outcome = self.repair_engine.race_strategies(original_file_path, strategies_to_attempt_execution, top_k, history_keys)
+            for failed_name, failed_reason in race_outcome.failures: self.display.display_warning(f"Strategia '{failed_name}' nie powiodła się: {failed_reason}")
+            if race_outcome.success and race_outcome.winner:
+                strategy_name = race_outcome.winner['name']
+                final_repaired_file_path_for_job = race_outcome.output_path
+                status_label = f"Naprawiono ({strategy_name})" if race_outcome.verified else f"NaprawionoBezWeryfikacji ({strategy_name})"
+                self.display.display_success(f"Wyścig wygrała strategia '{strategy_name}'{' (plik zweryfikowany)' if race_outcome.verified else ''}.")
+                self.damaged_files_manager.update_damaged_file_status(original_file_path, status_label, None)
+                self.damaged_files_manager.remove_damaged_file(original_file_path)
+                overall_repair_success = True
+            strategies_to_attempt_execution = []
+
         for strategy_details in strategies_to_attempt_execution:
-            strategy_id = strategy_details['id']; strategy_name = strategy_details['name']
-            strategy_type = strategy_details['type']
+            strategy_name = strategy_details['name']
             
             self.display.display_message(f"\n{styles.STYLE_INFO}Próba strategii:{styles.ANSI_RESET} {styles.STYLE_PROMPT}{strategy_name}{styles.ANSI_RESET}", style=styles.STYLE_HEADER)
-            repair_output_dir = Path(str(self.config_manager.get_config_value('paths', 'default_repaired_directory'))).expanduser().resolve()
-            
-            attempt_suffix = strategy_id.replace("builtin_", "").replace("-","_").replace(" ","_")[:15] 
-            temp_repaired_file_name = f"{original_file_path.stem}_repair_attempt_{attempt_suffix}{original_file_path.suffix}"
-            current_attempt_output_path = self.path_resolver.generate_unique_output_path(repair_output_dir / temp_repaired_file_name, is_repair_path=False)
+            current_attempt_output_path = self.repair_engine.build_attempt_output_path(original_file_path, strategy_details)
             
             self.display.display_info(f"Docelowa ścieżka dla tej próby: {current_attempt_output_path}")
 
-            success_this_strategy = False; error_msg_this_strategy: Optional[str] = None
-
-            if strategy_type == "ffmpeg_profile":
-                profile_object: Optional[RepairProfile] = strategy_details.get("profile_object")
-                if profile_object:
-                    if profile_object.applies_to_mkv_only and original_file_path.suffix.lower() != ".mkv":
-                        self.display.display_warning(f"Profil FFmpeg '{profile_object.name}' jest tylko dla .mkv. Pomijanie dla '{original_file_path.name}'.")
-                        error_msg_this_strategy = "Nieodpowiedni typ pliku dla tego profilu FFmpeg."; success_this_strategy = False
-                    else:
-                        success_this_strategy, error_msg_this_strategy = self.ffmpeg_manager.execute_ffmpeg_repair_with_profile(
-                            original_file_path, current_attempt_output_path, profile_object
-                        )
-                else: 
-                    error_msg_this_strategy = f"Brak obiektu profilu dla strategii FFmpeg (ID: {strategy_id})."; logger.error(error_msg_this_strategy)
-            elif strategy_id == "builtin_mkvmerge_remux": # Lub strategy_details.get("handler_key") == "mkvmerge_remux"
-                if original_file_path.suffix.lower() == ".mkv":
-                    success_this_strategy, error_msg_this_strategy = self.ffmpeg_manager.remux_file_with_mkvmerge(original_file_path, current_attempt_output_path)
-                else:
-                    self.display.display_warning(f"Strategia '{strategy_name}' tylko dla .mkv. Pomijanie dla '{original_file_path.name}'.")
-                    error_msg_this_strategy = "Nieodpowiedni typ pliku."; success_this_strategy = False
-                    if attempt_sequentially: self.display.display_separator(length=30); continue # Przejdź do następnej strategii
-                    else: break # Jeśli nie sekwencyjnie, a ta strategia nie pasuje, zakończ
-            # Można dodać obsługę innych "handler_key" dla wbudowanych strategii
+            is_applicable, skip_reason = self.repair_engine.is_applicable(strategy_details, original_file_path)
+            if not is_applicable:
+                self.display.display_warning(f"Strategia '{strategy_name}' pominięta dla '{original_file_path.name}': {skip_reason}")
+                if attempt_sequentially: self.display.display_separator(length=30); continue # Przejdź do następnej strategii
+                else: break # Jeśli nie sekwencyjnie, a ta strategia nie pasuje, zakończ
+            attempt_start_time = time.monotonic()
+            success_this_strategy, error_msg_this_strategy = self.repair_engine.execute_strategy(strategy_details, original_file_path, current_attempt_output_path)
             
             if success_this_strategy:
                 self.display.display_success(f"Strategia '{strategy_name}' pomyślna. Plik tymczasowy: {current_attempt_output_path.name}")
@@ -273,11 +250,13 @@ class DamagedFilesCLIHandler:
                     self.display.display_info(f"Weryfikacja pliku '{final_repaired_file_path_for_job.name}'...")
                     if self.ffmpeg_manager.is_file_readable_by_ffprobe(final_repaired_file_path_for_job):
                         self.display.display_success("Naprawiony plik zweryfikowany (czytelny).")
+                        self.repair_engine.record_attempt(history_keys, strategy_details, True, time.monotonic() - attempt_start_time)
                         self.damaged_files_manager.update_damaged_file_status(original_file_path, f"Naprawiono ({strategy_name})", None)
                         self.damaged_files_manager.remove_damaged_file(original_file_path)
                         overall_repair_success = True; break 
                     else:
                         self.display.display_warning(f"Naprawiony plik '{final_repaired_file_path_for_job.name}' nieczytelny po weryfikacji.")
+                        self.repair_engine.record_attempt(history_keys, strategy_details, False, time.monotonic() - attempt_start_time)
                         self.damaged_files_manager.update_damaged_file_status(original_file_path, f"NaprawaWeryfikacjaFail({strategy_name})", f"Naprawiony plik ({final_repaired_file_path_for_job.name}) nieczytelny.")
                         if final_repaired_file_path_for_job.exists():
                             try: final_repaired_file_path_for_job.unlink(missing_ok=True)
@@ -285,11 +264,13 @@ class DamagedFilesCLIHandler:
                         final_repaired_file_path_for_job = None
                 else: # Weryfikacja wyłączona
                     self.display.display_info("Pominięto weryfikację naprawionego pliku.")
+                    self.repair_engine.record_attempt(history_keys, strategy_details, True, time.monotonic() - attempt_start_time)
                     self.damaged_files_manager.update_damaged_file_status(original_file_path, f"NaprawionoBezWeryfikacji ({strategy_name})", None)
                     self.damaged_files_manager.remove_damaged_file(original_file_path)
                     overall_repair_success = True; break
             else: # Strategia nie powiodła się
                 self.display.display_error(f"Strategia '{strategy_name}' nie powiodła się.");
+                self.repair_engine.record_attempt(history_keys, strategy_details, False, time.monotonic() - attempt_start_time)
                 if error_msg_this_strategy: self.display.display_error(f"  Szczegóły: {error_msg_this_strategy}")
                 if current_attempt_output_path.exists():
                     try:
@@ -301,6 +282,7 @@ class DamagedFilesCLIHandler:
             if not attempt_sequentially and not overall_repair_success: break # Jeśli nie sekwencyjnie i pierwsza próba nieudana, zakończ
             if attempt_sequentially: self.display.display_separator(length=30) # Separator między próbami sekwencyjnymi
 
+        self.repair_engine.history.save()
         if overall_repair_success:
             self.display.display_success(f"Plik '{original_file_path.name}' został pomyślnie naprawiony.")
             if final_repaired_file_path_for_job: self.display.display_info(f"Naprawiona wersja zapisana jako: {final_repaired_file_path_for_job}")
@@ -327,10 +309,24 @@ class DamagedFilesCLIHandler:
             if choice_str.lower() == 'all':
                 self.display.display_info(f"Rozpoczynanie próby naprawy wszystkich {len(damaged_files)} plików z listy...")
                 successful_repairs = 0; failed_repairs = 0
-                for i, file_entry in enumerate(list(damaged_files)): 
-                    if self._attempt_single_file_repair(file_entry, file_index_str=f"({i+1}/{len(damaged_files)})"): successful_repairs += 1
-                    else: failed_repairs += 1
-                    if i < len(damaged_files) -1: self.display.display_separator(length=50)
+                if self.config_manager.get_config_value('processing.repair_options', 'attempt_sequentially', True):
+                    # Tryb automatyczny - pula wątków i paczkowe zatwierdzanie zmian rejestru
+                    def bulk_progress_callback(current: int, total: int, filename: str, repaired: bool):
+                        self.display.display_message(f"\rNaprawa: {current}/{total} - {filename} ({'OK' if repaired else 'nieudana'})", new_line=False, style=styles.STYLE_INFO); sys.stdout.write("\033[K"); sys.stdout.flush()
+                    bulk_results = self.repair_engine.repair_entries_bulk(list(damaged_files), self.damaged_files_manager, progress_callback=bulk_progress_callback)
+                    sys.stdout.write("\n")
+                    for result in bulk_results:
+                        if result.success:
+                            successful_repairs += 1
+                            self.display.display_success(f"{result.file_path.name if result.file_path else '?'}: naprawiono ({result.strategy_name}) -> {result.output_path}")
+                        else:
+                            failed_repairs += 1
+                            self.display.display_error(f"{result.file_path.name if result.file_path else '?'}: {result.error_message or 'naprawa nieudana'}")
+                else:
+                    for i, file_entry in enumerate(list(damaged_files)): 
+                        if self._attempt_single_file_repair(file_entry, file_index_str=f"({i+1}/{len(damaged_files)})"): successful_repairs += 1
+                        else: failed_repairs += 1
+                        if i < len(damaged_files) -1: self.display.display_separator(length=50)
                 self.display.display_message("\n--- Podsumowanie naprawy wszystkich plików ---", style=styles.STYLE_HEADER); self.display.display_success(f"Pomyślnie przetworzono/naprawiono: {successful_repairs} plików."); self.display.display_error(f"Nie udało się naprawić: {failed_repairs} plików."); self.display.press_enter_to_continue(); break 
             else:
                 try:
@@ -357,7 +353,7 @@ class DamagedFilesCLIHandler:
         if total_to_verify > 0:
             def verification_progress_callback(current: int, total: int, filename: str): self.display.display_message(f"\rWeryfikacja: {current}/{total} - {filename}...", new_line=False, style=styles.STYLE_INFO); sys.stdout.write("\033[K"); sys.stdout.flush()
             progress_callback_fn = verification_progress_callback
-        updated_list = self.damaged_files_manager.verify_files_on_list(progress_callback=progress_callback_fn) # type: ignore
+        updated_list = self.damaged_files_manager.verify_files_on_list(progress_callback=progress_callback_fn)
         if total_to_verify > 0 : 
             if progress_callback_fn or (hasattr(self.display, '_displaying_progress') and self.display._displaying_progress): sys.stdout.write("\r\033[K\n"); sys.stdout.flush(); 
             if hasattr(self.display, '_displaying_progress'): setattr(self.display, '_displaying_progress', False) # type: ignore
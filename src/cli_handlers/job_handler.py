@@ -4,7 +4,10 @@ import uuid
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Optional, List, Tuple, Callable # Dodano Callable
+import os
 import platform
+import sys
+import importlib.util
 import time
 import re
 import json # Dodano dla _display_pre_job_summary (jeśli Panel nie jest używany)
@@ -16,20 +19,32 @@ from ..profiler import Profiler
 from ..ffmpeg.ffmpeg_manager import FFmpegManager
 from ..filesystem.path_resolver import PathResolver
 from ..filesystem.job_state_manager import JobStateManager
-from ..filesystem.directory_scanner import DirectoryScanner, ScanProgressCallback
+from ..filesystem.directory_scanner import DirectoryScanner, ScanProgressCallback, DUPLICATE_STATUS
+from ..filesystem.utils import link_or_copy_file
 from ..filesystem.damaged_files_manager import DamagedFilesManager
+from ..filesystem.performance_log import PerformanceLog, FilePerformanceRecord
 from ..system_monitor.resource_monitor import ResourceMonitor
+from ..progress_dashboard import ProgressBoard, LiveDashboard
+from ..system_monitor.metrics import QUEUE_DEPTH, ACTIVE_WORKERS, record_file_outcome
 from .. import cli_styles as styles
 
-try:
-    from rich.console import Console
-    from rich.panel import Panel
-    from rich.text import Text
-    from rich.padding import Padding # Dodano Padding dla Rich
-    RICH_FOR_JOB_HANDLER_AVAILABLE = True
-except ImportError:
-    Console, Panel, Text, Padding = None, None, None, None # type: ignore
-    RICH_FOR_JOB_HANDLER_AVAILABLE = False
+# Rich ładowany przy pierwszym podsumowaniu zadania, nie przy starcie aplikacji
+RICH_FOR_JOB_HANDLER_AVAILABLE = importlib.util.find_spec("rich") is not None
+Console, Panel, Text, Padding = None, None, None, None # type: ignore
+
+
+def _load_rich_components() -> bool:
+    global Console, Panel, Text, Padding
+    if Console is not None: return True
+    if not RICH_FOR_JOB_HANDLER_AVAILABLE: return False
+    try:
+        from rich.console import Console
+        from rich.panel import Panel
+        from rich.text import Text
+        from rich.padding import Padding # Dodano Padding dla Rich
+    except ImportError:
+        return False
+    return True
 
 logger = logging.getLogger(__name__)
 
@@ -51,36 +66,18 @@ class JobCLIHandler:
         self.damaged_files_manager = damaged_files_manager; self.resource_monitor = resource_monitor
         self.current_job_state: Optional[JobState] = None; self.is_processing: bool = False
         self._last_selected_profile_idx = 0 
+        self.performance_log = PerformanceLog(config_manager)
+        # Identyfikator wykonawcy w rekordach wydajności (host:PID) - rozróżnia instancje na wspólnym katalogu stanu
+        self._worker_id = f"{platform.node() or 'localhost'}:{os.getpid()}"
         
-        if RICH_FOR_JOB_HANDLER_AVAILABLE and Console is not None:
-            self.rich_console = Console()
-        else:
-            self.rich_console = None
+        self._rich_console = None
             
         logger.debug("JobCLIHandler: Inicjalizacja zakończona.")
 
-    @staticmethod
-    def _infer_codec_from_params(params: List[str], stream_type: str) -> Optional[str]:
-        codec_param_short = f"-c:{stream_type}"; codec_param_long = f"-codec:{stream_type}"
-        for i, param in enumerate(params):
-            if param == codec_param_short or param == codec_param_long:
-                if i + 1 < len(params) and not params[i+1].startswith('-'): return params[i+1]
-        return None
-
-    @staticmethod
-    def _infer_target_bitrate_from_params(params: List[str], stream_type: str) -> Optional[int]:
-        bitrate_param = f"-b:{stream_type}"
-        for i, param in enumerate(params):
-            if param == bitrate_param:
-                if i + 1 < len(params):
-                    val_str = params[i+1].lower();
-                    try:
-                        num_val_str = val_str; multiplier = 1
-                        if val_str.endswith('k'): num_val_str = val_str[:-1]; multiplier = 1000
-                        elif val_str.endswith('m'): num_val_str = val_str[:-1]; multiplier = 1000000
-                        return int(float(num_val_str) * multiplier)
-                    except ValueError: logger.warning(f"Nie można sparsować wartości bitrate: '{params[i+1]}' dla strumienia '{stream_type}'"); return None
-        return None
+    @property
+    def rich_console(self):
+        if self._rich_console is None and _load_rich_components(): self._rich_console = Console()
+        return self._rich_console
 
     def _select_profile(self) -> Optional[EncodingProfile]:
         available_profiles = self.profiler.get_all_profiles()
@@ -160,13 +157,13 @@ class JobCLIHandler:
         if output_path and profile:
             lines.append(f"{styles.STYLE_INFO}\n--- Planowane wyjście ---{styles.ANSI_RESET}")
             lines.append(f"  Nazwa: {output_path.name}"); lines.append(f"  Format wyjściowy: .{profile.output_extension}")
-            target_vcodec = self._infer_codec_from_params(profile.ffmpeg_params, 'v'); target_acodec = self._infer_codec_from_params(profile.ffmpeg_params, 'a')
+            compiled_profile = profile.compiled; target_vcodec = compiled_profile.video_codec; target_acodec = compiled_profile.audio_codec
             lines.append(f"  Planowany kodek wideo: {target_vcodec if target_vcodec else '(wg parametrów FFmpeg)'}"); lines.append(f"  Planowany kodek audio: {target_acodec if target_acodec else '(wg parametrów FFmpeg)'}")
             estimated_size_bytes: Optional[int] = None; estimation_note = "(N/A - brak stałego bitrate wideo w profilu / CRF lub czasu trwania)"
             if media_info and media_info.duration and media_info.duration > 0:
-                video_b_bps = self._infer_target_bitrate_from_params(profile.ffmpeg_params, 'v')
+                video_b_bps = compiled_profile.video_bitrate_bps
                 if video_b_bps is not None and video_b_bps > 0:
-                    audio_b_bps = self._infer_target_bitrate_from_params(profile.ffmpeg_params, 'a'); total_target_bps = video_b_bps + (audio_b_bps or 0); estimated_size_bytes = int((total_target_bps / 8.0) * media_info.duration); estimation_note = "(na podst. bitrate wideo i ew. audio w profilu)"
+                    audio_b_bps = compiled_profile.audio_bitrate_bps; total_target_bps = video_b_bps + (audio_b_bps or 0); estimated_size_bytes = int((total_target_bps / 8.0) * media_info.duration); estimation_note = "(na podst. bitrate wideo i ew. audio w profilu)"
             if estimated_size_bytes is not None: lines.append(f"  Szacowany rozmiar wyj.: {self.display.formatter.format_filesize(str(estimated_size_bytes) + 'B')} {estimation_note}")
             else: lines.append(f"  Szacowany rozmiar wyj.: {estimation_note}")
             lines.append(f"    Do katalogu: {output_path.parent}")
@@ -217,12 +214,12 @@ class JobCLIHandler:
             else: self.display.display_error(f"Podana ścieżka nie jest prawidłowym katalogiem: {path_candidate}"); self.display.press_enter_to_continue(); return
         else: self.display.display_error("Nie podano ścieżki do katalogu."); self.display.press_enter_to_continue(); return
         if not final_source_dir_path: self.display.display_error("Nie udało się ustalić katalogu źródłowego."); self.display.press_enter_to_continue(); return
-        self.config_manager.set_config_value('paths', 'last_used_source_directory', str(final_source_dir_path))
+        self.config_manager.set_config_value('paths', 'last_used_source_directory', str(final_source_dir_path), debounce_save=True)
         selected_profile = self._select_profile()
         if not selected_profile: self.display.press_enter_to_continue(); return
         job_id = uuid.uuid4(); self.current_job_state = JobState(job_id=job_id, source_directory=final_source_dir_path, selected_profile_id=selected_profile.id, status="Skanowanie", start_time=datetime.now(), processed_files=[], total_files=0); self.job_state_manager.save_job_state(self.current_job_state)
         self.display.display_info(f"Skanowanie katalogu '{final_source_dir_path.resolve()}'...")
-        self.directory_scanner.scan_directory_and_populate_job_state(self.current_job_state, progress_callback=self.display.display_scan_progress)
+        self.directory_scanner.scan_directory_and_populate_job_state(self.current_job_state, progress_callback=self.display.display_scan_progress, profile=selected_profile)
         if hasattr(self.display, 'finalize_progress_display') and self.display._displaying_progress: self.display.finalize_progress_display()
         if not self.current_job_state.processed_files: self.display.display_warning("Nie znaleziono żadnych pasujących plików."); self.current_job_state.status = "Zakończono (brak plików)"; self.current_job_state.end_time = datetime.now(); self.job_state_manager.save_job_state(self.current_job_state); self.display.press_enter_to_continue(); self.current_job_state = None; return
         self.display.display_success(f"Skanowanie zakończone. Znaleziono {self.current_job_state.total_files} plików."); self.current_job_state.status = "Gotowe do przetworzenia"; self.job_state_manager.save_job_state(self.current_job_state)
@@ -236,6 +233,26 @@ class JobCLIHandler:
             self.display.press_enter_to_continue(); self.current_job_state = None; return
         self._process_job_with_multiple_files()
 
+    def _create_live_dashboard(self, job: JobState, total_files_in_job: int) -> Optional[LiveDashboard]:
+        """Pulpit Rich Live dla zadania albo None (wyłączony, brak Rich lub wyjście nie jest terminalem) - wtedy pasek CLIDisplay."""
+        ui_cfg = self.config_manager.snapshot.ui
+        if not ui_cfg.live_dashboard_enabled or not sys.stdout.isatty() or not LiveDashboard.is_available() or not self.rich_console: return None
+        board = ProgressBoard(job_label=job.job_id, total_files=total_files_in_job)
+        board.completed_files = sum(1 for pf in job.processed_files if pf.status == "Ukończono")
+        return LiveDashboard(board, self.resource_monitor, ui_cfg.progress_refresh_rate, console=self.rich_console)
+
+    def _transcode_with_progress(self, dashboard: Optional[LiveDashboard], **transcode_kwargs) -> Tuple[bool, Optional[str]]:
+        transcoder = self.ffmpeg_manager.transcoder
+        previous_callback = transcoder.display_progress_callback
+        ACTIVE_WORKERS.inc()
+        try:
+            if dashboard is None: return self.ffmpeg_manager.transcode_file(**transcode_kwargs)
+            transcoder.display_progress_callback = dashboard.board.progress_callback
+            with dashboard.live(): return self.ffmpeg_manager.transcode_file(**transcode_kwargs)
+        finally:
+            transcoder.display_progress_callback = previous_callback
+            ACTIVE_WORKERS.dec()
+
     def _process_job_with_multiple_files(self, is_resuming: bool = False):
         # ... (logika jak w #66)
         if not self.current_job_state or not self.current_job_state.processed_files: self.display.display_error("Brak aktywnego zadania lub plików do przetworzenia."); return
@@ -247,8 +264,11 @@ class JobCLIHandler:
             job.status = "Błąd krytyczny"; job.error_message = f"Nie znaleziono profilu ID: {job.selected_profile_id}";
             for pf in job.processed_files: pf.status = "Błąd profilu"; pf.error_message = job.error_message or ""; pf.end_time = datetime.now()
             job.end_time = datetime.now(); self.job_state_manager.save_job_state(job); self.display.display_error(job.error_message or "Błąd profilu."); self.is_processing = False; return
-        processed_overall = sum(1 for pf in job.processed_files if pf.status == "Ukończono"); failed_overall = sum(1 for pf in job.processed_files if pf.status in ["Błąd", "Błąd (MediaInfo)", "Błąd profilu", "Błąd odczytu"]); skipped_overall = sum(1 for pf in job.processed_files if pf.status.startswith("Pominięto")); error_handling = self.config_manager.get_config_value('processing', 'error_handling', 'skip'); total_files_in_job = len(job.processed_files)
+        processed_overall = sum(1 for pf in job.processed_files if pf.status == "Ukończono"); failed_overall = sum(1 for pf in job.processed_files if pf.status in ["Błąd", "Błąd (MediaInfo)", "Błąd profilu", "Błąd odczytu"]); skipped_overall = sum(1 for pf in job.processed_files if pf.status.startswith("Pominięto")); processing_cfg = self.config_manager.snapshot.processing; error_handling = processing_cfg.error_handling; total_files_in_job = len(job.processed_files)
+        dashboard = self._create_live_dashboard(job, total_files_in_job)
         for idx, file_item in enumerate(job.processed_files):
+            if file_item.status == DUPLICATE_STATUS: continue # Obsługiwane po zakończeniu reprezentantów
+            if file_item.status in ["Ukończono", "Pominięto (konflikt)"]: logger.info(f"Pomijanie pliku '{file_item.original_path.name}' (status: {file_item.status})"); continue
             current_file_number = idx + 1; self.display.clear_screen()
             job_stats_panel_title = f"{styles.ICON_STATUS} Postęp Zadania: {job.job_id} ({job.status})"
             job_stats_lines = [f"Pliki ukończone: {styles.STYLE_SUCCESS}{processed_overall}{styles.ANSI_RESET} / {total_files_in_job}", f"Pliki z błędem: {styles.STYLE_ERROR}{failed_overall}{styles.ANSI_RESET} / {total_files_in_job}", f"Pliki pominięte: {styles.STYLE_WARNING}{skipped_overall}{styles.ANSI_RESET} / {total_files_in_job}", f"Pozostało do przetworzenia: {max(0, total_files_in_job - (processed_overall + failed_overall + skipped_overall))}"]
@@ -266,38 +286,56 @@ class JobCLIHandler:
                 for line in plain_content_for_fallback.strip().split('\n'):
                     if line.strip(): self.display.display_info(f"  {line.strip()}")
             self.display.display_separator(length=60)
-            if file_item.status in ["Ukończono", "Pominięto (konflikt)"]: logger.info(f"Pomijanie pliku '{file_item.original_path.name}' (status: {file_item.status})"); time.sleep(0.1); continue
-            if file_item.status in ["Błąd", "Błąd odczytu", "Błąd (MediaInfo)", "Przetwarzanie"]: self.display.display_warning(f"Ponawianie pliku ({file_item.status}): {file_item.error_message or ''}"); file_item.status = "Oczekuje"; file_item.error_message = None; file_item.start_time = None; file_item.end_time = None
-            if file_item.status != "Oczekuje": self.display.display_info(f"Nieoczekiwany status pliku '{file_item.original_path.name}': {file_item.status}. Pomijanie."); skipped_overall +=1; continue
+            if file_item.status in ["Błąd", "Błąd odczytu", "Błąd (MediaInfo)", "Przetwarzanie", "Anulowano"]: self.display.display_warning(f"Ponawianie pliku ({file_item.status}): {file_item.error_message or ''}"); file_item.status = "Oczekuje"; file_item.error_message = None; file_item.start_time = None; file_item.end_time = None
+            if file_item.status != "Oczekuje": self.display.display_info(f"Nieoczekiwany status pliku '{file_item.original_path.name}': {file_item.status}. Pomijanie."); skipped_overall +=1; record_file_outcome(selected_profile.name, 'skipped'); continue
             if not file_item.media_info or file_item.media_info.duration is None or file_item.media_info.duration <= 0:
-                err_msg = "Brak/nieprawidłowe MediaInfo."; self.display.display_error(f"Nie można przetworzyć '{file_item.original_path.name}': {err_msg}"); file_item.status = "Błąd (MediaInfo)"; file_item.error_message = err_msg; file_item.end_time = datetime.now(); failed_overall += 1; self.job_state_manager.save_job_state(job)
+                err_msg = "Brak/nieprawidłowe MediaInfo."; self.display.display_error(f"Nie można przetworzyć '{file_item.original_path.name}': {err_msg}"); file_item.status = "Błąd (MediaInfo)"; file_item.error_message = err_msg; file_item.end_time = datetime.now(); failed_overall += 1; record_file_outcome(selected_profile.name, 'failed'); self.job_state_manager.save_job_state(job)
                 if error_handling == 'stop': job.status = "Zatrzymano (błąd pliku)"; job.error_message = (job.error_message or "") + f"\nZatrzymano przy: {file_item.original_path.name}"; job.end_time = datetime.now(); self.job_state_manager.save_job_state(job); self.is_processing = False; return
                 time.sleep(1); continue
-            target_output_path = tentative_output_path; conflict_action = self.config_manager.get_config_value('processing', 'output_file_exists', 'rename'); final_output_path = target_output_path
-            if target_output_path.exists():
-                if conflict_action == 'skip': self.display.display_warning(f"Plik '{target_output_path.name}' już istnieje. Pomijanie."); file_item.status = "Pominięto (konflikt)"; file_item.error_message = "Plik wyjściowy istniał."; file_item.output_path = target_output_path; file_item.end_time = datetime.now(); skipped_overall +=1; self.job_state_manager.save_job_state(job); time.sleep(0.5); continue
+            target_output_path = tentative_output_path; conflict_action = processing_cfg.output_file_exists; final_output_path = target_output_path
+            if file_item.completed_segments and file_item.output_path:
+                # Checkpoint segmentowy wskazuje na konkretny plik wyjściowy - kontynuujemy zapis do niego
+                final_output_path = file_item.output_path; self.display.display_info(f"Wznawianie od checkpointu: {len(file_item.completed_segments)} ukończonych segmentów.")
+            elif target_output_path.exists():
+                if conflict_action == 'skip': self.display.display_warning(f"Plik '{target_output_path.name}' już istnieje. Pomijanie."); file_item.status = "Pominięto (konflikt)"; file_item.error_message = "Plik wyjściowy istniał."; file_item.output_path = target_output_path; file_item.end_time = datetime.now(); skipped_overall +=1; record_file_outcome(selected_profile.name, 'skipped'); self.job_state_manager.save_job_state(job); time.sleep(0.5); continue
                 elif conflict_action == 'overwrite': self.display.display_warning(f"Plik '{target_output_path.name}' już istnieje. Zostanie nadpisany.")
                 elif conflict_action == 'rename': final_output_path = self.path_resolver.generate_unique_output_path(target_output_path); self.display.display_info(f"Plik '{target_output_path.name}' już istnieje. Zapis jako '{final_output_path.name}'.")
             file_item.output_path = final_output_path; file_item.status = "Przetwarzanie"; file_item.start_time = datetime.now(); self.job_state_manager.save_job_state(job)
             if hasattr(self.display, '_progress_bar_first_draw'): self.display._progress_bar_first_draw = True
-            success, error_msg_transcode = self.ffmpeg_manager.transcode_file(input_file_path=file_item.original_path, output_file_path=file_item.output_path, profile=selected_profile, media_info=file_item.media_info, file_index=current_file_number, total_files_in_job=total_files_in_job)
+            queued_items = [pf for pf in job.processed_files[idx + 1:] if pf.status not in ("Ukończono", "Pominięto (konflikt)", DUPLICATE_STATUS)]
+            QUEUE_DEPTH.set(len(queued_items))
+            if dashboard:
+                dashboard.board.set_queue(len(queued_items), sum(pf.media_info.duration for pf in queued_items if pf.media_info and pf.media_info.duration))
+                dashboard.board.start_worker(current_file_number, file_item.original_path.name, file_item.media_info.duration)
+            performance = FilePerformanceRecord(file_item.original_path)
+            success, error_msg_transcode = self._transcode_with_progress(dashboard, input_file_path=file_item.original_path, output_file_path=file_item.output_path, profile=selected_profile, media_info=file_item.media_info, file_index=current_file_number, total_files_in_job=total_files_in_job, processed_file=file_item, checkpoint_callback=lambda: self.job_state_manager.save_job_state(job), performance=performance)
+            performance.finish()
             if hasattr(self.display, 'finalize_progress_display'): self.display.finalize_progress_display()
+            if dashboard: dashboard.board.finish_worker(current_file_number, success)
             file_item.end_time = datetime.now()
             if success:
-                file_item.status = "Ukończono"; file_item.error_message = None; processed_overall +=1; self.display.display_success(f"Transkodowanie pliku '{file_item.original_path.name}' zakończone pomyślnie.")
-                if self.config_manager.get_config_value('processing', 'delete_original_on_success', False):
+                file_item.status = "Ukończono"; file_item.error_message = None; processed_overall +=1; record_file_outcome(selected_profile.name, 'completed'); self.display.display_success(f"Transkodowanie pliku '{file_item.original_path.name}' zakończone pomyślnie.")
+                self.directory_scanner.transcode_ledger.record(file_item.original_path, selected_profile, file_item.output_path)
+                self.performance_log.append(job.job_id, file_item, selected_profile, performance, self._worker_id)
+                if processing_cfg.delete_original_on_success:
                     self.display.display_info(f"Usuwanie oryginalnego pliku: {file_item.original_path.name}");
                     try: file_item.original_path.unlink(); self.display.display_success(f"Usunięto oryginalny plik.")
                     except OSError as e: err_del = f"Błąd usuwania oryginalnego pliku: {e}"; self.display.display_error(err_del); logger.error(err_del, exc_info=True); file_item.error_message = (file_item.error_message or "") + f" | {err_del}"
             else:
-                file_item.status = "Błąd"; failed_overall +=1; file_item.error_message = error_msg_transcode or "Nieznany błąd FFmpeg."
+                file_item.status = "Błąd"; failed_overall +=1; record_file_outcome(selected_profile.name, 'failed'); file_item.error_message = error_msg_transcode or "Nieznany błąd FFmpeg."
                 self.display.display_error(f"Błąd podczas transkodowania pliku '{file_item.original_path.name}': {file_item.error_message}")
                 if file_item.output_path and file_item.output_path.exists():
                     try: file_item.output_path.unlink(missing_ok=True)
                     except OSError as e_del: logger.warning(f"Nie można usunąć częściowego pliku wyjściowego {file_item.output_path}: {e_del}")
+                self.performance_log.append(job.job_id, file_item, selected_profile, performance, self._worker_id)
                 if error_handling == 'stop': self.display.display_error("Zatrzymano zadanie z powodu błędu pliku."); job.status = "Zatrzymano (błąd pliku)"; job.error_message = (job.error_message or "") + f"\nZatrzymano przy: {file_item.original_path.name}"; job.end_time = datetime.now(); self.job_state_manager.save_job_state(job); self.is_processing = False; return
             self.job_state_manager.save_job_state(job)
             if idx < total_files_in_job -1 : time.sleep(1) 
+        QUEUE_DEPTH.set(0)
+        dup_done, dup_failed, dup_skipped = self._materialize_duplicates(job, selected_profile)
+        for outcome, count in (('completed', dup_done), ('failed', dup_failed), ('skipped', dup_skipped)):
+            if count: record_file_outcome(selected_profile.name, outcome, count)
+        processed_overall += dup_done; failed_overall += dup_failed; skipped_overall += dup_skipped
         job.end_time = datetime.now()
         if failed_overall > 0 and job.status != "Zatrzymano (błąd pliku)": job.status = "Ukończono z błędami"; job.error_message = (job.error_message or "") + f" Niepowodzenia: {failed_overall}/{total_files_in_job}."
         elif processed_overall == (total_files_in_job - skipped_overall - failed_overall) and job.status not in ["Zatrzymano (błąd pliku)", "Anulowano przez użytkownika"]: job.status = "Ukończono";
@@ -309,6 +347,53 @@ class JobCLIHandler:
         self.display.display_success(f"Pomyślnie przetworzono (łącznie): {processed_overall} plików."); self.display.display_error(f"Niepowodzenia (łącznie): {failed_overall} plików."); self.display.display_warning(f"Pominięto (łącznie): {skipped_overall} plików.")
         self.is_processing = False; self.current_job_state = None; self.display.press_enter_to_continue()
 
+    @staticmethod
+    def _is_same_file(path_a: Path, path_b: Path) -> bool:
+        if path_a == path_b: return True
+        try: return os.path.samefile(path_a, path_b)
+        except OSError: return False
+
+    def _materialize_duplicates(self, job: JobState, selected_profile: EncodingProfile) -> Tuple[int, int, int]:
+        """Tworzy wyniki duplikatów z wyniku reprezentanta (dowiązanie lub kopia). Zwraca (ukończone, błędy, pominięte)."""
+        duplicates = [pf for pf in job.processed_files if pf.status == DUPLICATE_STATUS]
+        if not duplicates: return 0, 0, 0
+        files_by_id = {pf.file_id: pf for pf in job.processed_files}
+        processing_cfg = self.config_manager.snapshot.processing
+        link_mode = processing_cfg.dedupe.link_mode
+        conflict_action = processing_cfg.output_file_exists
+        done = failed = skipped = 0
+        for file_item in duplicates:
+            representative = files_by_id.get(file_item.duplicate_of) if file_item.duplicate_of else None
+            file_item.start_time = datetime.now()
+            if not representative or representative.status not in ["Ukończono", "Pominięto (konflikt)"] or not representative.output_path or not representative.output_path.exists():
+                # Bez wyniku reprezentanta duplikat zostanie zakodowany samodzielnie przy wznowieniu
+                file_item.status = "Błąd"; file_item.error_message = "Brak wyniku reprezentanta duplikatu."; file_item.end_time = datetime.now(); failed += 1
+                continue
+            target_output_path = self.path_resolver.get_output_path_for_transcoding(file_item.original_path, selected_profile)
+            if self._is_same_file(target_output_path, representative.output_path):
+                # Ścieżki wyjściowe są płaskie - duplikat o tej samej nazwie z innego katalogu wskazuje na wynik
+                # reprezentanta (lub jego dowiązanie); nadpisanie usunęłoby ten wynik, więc zawsze nowa nazwa
+                target_output_path = self.path_resolver.generate_unique_output_path(target_output_path)
+            elif target_output_path.exists():
+                if conflict_action == 'skip': file_item.status = "Pominięto (konflikt)"; file_item.error_message = "Plik wyjściowy istniał."; file_item.output_path = target_output_path; file_item.end_time = datetime.now(); skipped += 1; continue
+                elif conflict_action == 'overwrite': target_output_path.unlink(missing_ok=True)
+                else: target_output_path = self.path_resolver.generate_unique_output_path(target_output_path)
+            try:
+                used_mode = link_or_copy_file(representative.output_path, target_output_path, link_mode)
+                file_item.status = "Ukończono"; file_item.output_path = target_output_path; file_item.error_message = None; done += 1
+                self.directory_scanner.transcode_ledger.record(file_item.original_path, selected_profile, target_output_path)
+                logger.info(f"Duplikat '{file_item.original_path.name}' -> '{target_output_path.name}' ({used_mode} z '{representative.output_path.name}').")
+                if processing_cfg.delete_original_on_success:
+                    try: file_item.original_path.unlink()
+                    except OSError as e: logger.error(f"Błąd usuwania oryginalnego pliku duplikatu '{file_item.original_path}': {e}", exc_info=True)
+            except OSError as e:
+                file_item.status = "Błąd"; file_item.error_message = f"Nie można utworzyć wyniku duplikatu: {e}"; failed += 1
+                logger.error(f"Nie można utworzyć wyniku duplikatu '{file_item.original_path.name}': {e}", exc_info=True)
+            file_item.end_time = datetime.now()
+        self.job_state_manager.save_job_state(job)
+        self.display.display_info(f"Duplikaty: utworzono {done} wyników bez kodowania (błędy: {failed}, pominięte: {skipped}).")
+        return done, failed, skipped
+
     def resume_last_job_cli(self): 
         logger.debug("resume_last_job_cli rozpoczęte.")
         if self.is_processing: self.display.display_warning("Inne zadanie jest aktualnie w toku."); self.display.press_enter_to_continue(); return
@@ -319,13 +404,13 @@ class JobCLIHandler:
             if last_job.status == "Oczekuje na potwierdzenie": eligible_for_resume = True
             elif hasattr(last_job, 'processed_files') and last_job.processed_files:
                 for pf in last_job.processed_files:
-                    if pf.status in ["Oczekuje", "Błąd", "Błąd odczytu", "Błąd (MediaInfo)", "Przetwarzanie"]: eligible_for_resume = True; break
+                    if pf.status in ["Oczekuje", "Błąd", "Błąd odczytu", "Błąd (MediaInfo)", "Przetwarzanie", "Anulowano", DUPLICATE_STATUS]: eligible_for_resume = True; break
         if not eligible_for_resume:
             self.display.display_info(f"Ostatnie zadanie (ID: {last_job.job_id}) ma status '{last_job.status}' lub wszystkie pliki są przetworzone/pominięte. Nie można wznowić.")
             if last_job.status not in ["Ukończono", "Ukończono z błędami", "Anulowano przez użytkownika", "Zakończono (brak plików)", "Zatrzymano (błąd pliku)", "Błąd krytyczny"]: last_job.status = "Ukończono (brak plików do wznowienia)"; last_job.end_time = datetime.now(); self.job_state_manager.save_job_state(last_job)
             self.display.press_enter_to_continue(); return
         self.display.clear_screen(); self.display.display_header(f"{styles.ICON_RESUME} Wznawianie ostatniego zadania"); self.display.display_job_state(last_job)
-        files_to_process_count = sum(1 for pf in last_job.processed_files if pf.status in ["Oczekuje", "Błąd", "Błąd odczytu", "Błąd (MediaInfo)", "Przetwarzanie"]) if hasattr(last_job, 'processed_files') else 0
+        files_to_process_count = sum(1 for pf in last_job.processed_files if pf.status in ["Oczekuje", "Błąd", "Błąd odczytu", "Błąd (MediaInfo)", "Przetwarzanie", "Anulowano", DUPLICATE_STATUS]) if hasattr(last_job, 'processed_files') else 0
         prompt_msg = f"Czy chcesz wznowić/rozpocząć przetwarzanie ({files_to_process_count} plików) w tym zadaniu? ({styles.STYLE_PROMPT}tak/nie{styles.ANSI_RESET}): "
         if last_job.status == "Oczekuje na potwierdzenie": prompt_msg = f"Zadanie oczekuje na potwierdzenie. Rozpocząć przetwarzanie ({files_to_process_count} plików)? ({styles.STYLE_PROMPT}tak/nie{styles.ANSI_RESET}): "
         confirm_choice = self.display.get_user_choice(prompt_msg).lower()
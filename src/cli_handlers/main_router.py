@@ -5,19 +5,27 @@ from datetime import datetime
 import time
 from typing import Optional, List, Dict, Any 
 import re
+import importlib.util
 
-try:
-    from rich.live import Live
-    from rich.table import Table
-    from rich.panel import Panel
-    from rich.text import Text
-    from rich.console import Console
-    from rich.layout import Layout
-    from rich.progress_bar import ProgressBar
-    RICH_AVAILABLE = True
-except ImportError:
-    RICH_AVAILABLE = False
-    Live, Table, Panel, Text, Console, Layout, ProgressBar = (None,) * 7 # type: ignore
+# Rich jest potrzebny dopiero w monitorze systemu - import odkładany do pierwszego użycia (szybszy start)
+RICH_AVAILABLE = importlib.util.find_spec("rich") is not None
+Live, Table, Panel, Text, Console, Layout, ProgressBar = (None,) * 7 # type: ignore
+
+
+def _load_rich_monitor_components() -> bool:
+    global Live, Table, Panel, Text, Console, Layout, ProgressBar
+    if Live is not None: return True
+    try:
+        from rich.live import Live
+        from rich.table import Table
+        from rich.panel import Panel
+        from rich.text import Text
+        from rich.console import Console
+        from rich.layout import Layout
+        from rich.progress_bar import ProgressBar
+    except ImportError:
+        return False
+    return True
 
 
 from ..cli_display import CLIDisplay
@@ -32,9 +40,6 @@ from ..filesystem.damaged_files_manager import DamagedFilesManager
 from ..system_monitor.resource_monitor import ResourceMonitor
 
 from .job_handler import JobCLIHandler
-from .profile_handler import ProfileCLIHandler
-from .settings_handler import SettingsCLIHandler
-from .damaged_files_cli_handler import DamagedFilesCLIHandler
 from .. import cli_styles as styles
 
 
@@ -51,24 +56,41 @@ class MainRouter:
         logger.debug("MainRouter: Inicjalizacja rozpoczęta.")
         self.display = display; self.config_manager = config_manager; self.profiler = profiler
         self.ffmpeg_manager = ffmpeg_manager; self.resource_monitor = resource_monitor
-        self.console = Console() if RICH_AVAILABLE and Console else None
+        self.console = None
+        self.path_resolver = path_resolver; self.directory_scanner = directory_scanner; self.damaged_files_manager = damaged_files_manager
         
         self.repair_profiler = repair_profiler # <-- ZAPISZ INSTANCJĘ
 
         self.job_handler = JobCLIHandler(display, config_manager, profiler, ffmpeg_manager, path_resolver, job_state_manager, directory_scanner, damaged_files_manager, resource_monitor)
-        self.profile_handler = ProfileCLIHandler(display, config_manager, profiler)
-        # Przekaż repair_profiler do SettingsCLIHandler
-        self.settings_handler = SettingsCLIHandler(
-            display, config_manager, ffmpeg_manager, profiler, self.repair_profiler
-        )
-        # Przekaż repair_profiler do DamagedFilesCLIHandler
-        self.damaged_files_handler = DamagedFilesCLIHandler(
-            display, config_manager, damaged_files_manager,
-            ffmpeg_manager, path_resolver, directory_scanner,
-            repair_profiler=self.repair_profiler 
-        )
+        # Pozostałe handlery (i ich importy: Rich, silnik napraw, triaż) tworzone przy pierwszym wyborze z menu
+        self._profile_handler = None; self._settings_handler = None; self._damaged_files_handler = None
         logger.debug("MainRouter: Inicjalizacja zakończona.")
 
+    @property
+    def profile_handler(self):
+        if self._profile_handler is None:
+            from .profile_handler import ProfileCLIHandler
+            self._profile_handler = ProfileCLIHandler(self.display, self.config_manager, self.profiler)
+        return self._profile_handler
+
+    @property
+    def settings_handler(self):
+        if self._settings_handler is None:
+            from .settings_handler import SettingsCLIHandler
+            self._settings_handler = SettingsCLIHandler(self.display, self.config_manager, self.ffmpeg_manager, self.profiler, self.repair_profiler)
+        return self._settings_handler
+
+    @property
+    def damaged_files_handler(self):
+        if self._damaged_files_handler is None:
+            from .damaged_files_cli_handler import DamagedFilesCLIHandler
+            self._damaged_files_handler = DamagedFilesCLIHandler(
+                self.display, self.config_manager, self.damaged_files_manager,
+                self.ffmpeg_manager, self.path_resolver, self.directory_scanner,
+                repair_profiler=self.repair_profiler
+            )
+        return self._damaged_files_handler
+
     def run_main_loop(self):
         # ... (bez zmian od ostatniej poprawnej wersji - np. z odpowiedzi #66)
         logger.info("MainRouter: Uruchamianie głównej pętli aplikacji.")
@@ -132,7 +154,7 @@ class MainRouter:
             self.display.press_enter_to_continue()
         elif choice == '10': self.settings_handler.manage_settings_menu()
         elif choice == '11':
-            if RICH_AVAILABLE and self.console: self._run_system_monitor_loop_rich()
+            if RICH_AVAILABLE and _load_rich_monitor_components(): self._run_system_monitor_loop_rich()
             else: self._run_system_monitor_loop_legacy()
         elif choice == '0': self.display.display_info(f"{styles.ICON_EXIT} Wychodzenie z aplikacji..."); return False 
         else: self.display.display_warning("Nieprawidłowy wybór."); self.display.press_enter_to_continue()
@@ -170,6 +192,7 @@ class MainRouter:
     def _run_system_monitor_loop_rich(self):
         # ... (bez zmian od ostatniej poprawnej wersji - np. z odpowiedzi #66)
         if not self.resource_monitor.is_available(): self.display.display_error("Monitor zasobów jest niedostępny (psutil)."); self.display.press_enter_to_continue(); return
+        if RICH_AVAILABLE and _load_rich_monitor_components() and self.console is None: self.console = Console()
         if not RICH_AVAILABLE or not self.console: self.display.display_error("Biblioteka Rich niedostępna. Użyj trybu legacy."); self._run_system_monitor_loop_legacy(); return
         layout = self._generate_monitor_layout(); refresh_rate = float(self.config_manager.get_config_value("ui", "rich_monitor_refresh_rate", 2.0)); disk_interval = float(self.config_manager.get_config_value("ui", "rich_monitor_disk_refresh_interval", 5.0)); last_disk_refresh = 0.0
         try:
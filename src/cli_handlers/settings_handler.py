@@ -1,7 +1,7 @@
 # src/cli_handlers/settings_handler.py
 import logging
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Tuple, Callable
+from typing import Optional, List, Dict, Any, Tuple, Callable, Union
 import uuid 
 import json 
 
@@ -419,7 +419,10 @@ class SettingsCLIHandler:
         elif level_choice_key: self.display.display_warning("Nieprawidłowy wybór."); self.display.press_enter_to_continue()
     def _handle_error_handling_setting(self, last_selected_idx_ref: Optional[List[int]] = None): options = {'1': 'stop', '2': 'skip'}; display_map = {'stop': 'Zatrzymaj zadanie', 'skip': 'Pomiń plik'}; self._handle_choice_setting('processing', 'error_handling', "Obsługa błędów transkodowania", options, display_map, last_selected_idx_ref or [0])
     def _handle_output_file_exists_action(self, last_selected_idx_ref: Optional[List[int]] = None): options = {'1': 'overwrite', '2': 'rename', '3': 'skip'}; display_map = {'overwrite': 'Nadpisz', 'rename': 'Zmień nazwę', 'skip': 'Pomiń'}; self._handle_choice_setting('processing', 'output_file_exists', "Konflikt nazw plików wyjściowych", options, display_map, last_selected_idx_ref or [0])
-    def _handle_rename_patterns(self): self.display.clear_screen(); self.display.display_header(f"{styles.ICON_SETTINGS} Edycja Wzorców Nazw"); self.display.display_info(f"Placeholdery: {{original_stem}}, {{profile_name}}, {{timestamp}}, {{counter}}"); self._handle_text_input_setting('processing', 'rename_pattern', "Wzorzec dla konfliktu", default_if_empty=DEFAULT_CONFIG['processing']['rename_pattern']); self._handle_text_input_setting('processing', 'repair_rename_pattern', "Wzorzec dla naprawy", default_if_empty=DEFAULT_CONFIG['processing']['repair_rename_pattern'])
+    def _handle_rename_patterns(self):
+        self.display.clear_screen(); self.display.display_header(f"{styles.ICON_SETTINGS} Edycja Wzorców Nazw"); self.display.display_info(f"Placeholdery: {{original_stem}}, {{profile_name}}, {{timestamp}}, {{counter}}")
+        # Oba wzorce zapisywane jednym zapisem pliku
+        with self.config_manager.batch(): self._handle_text_input_setting('processing', 'rename_pattern', "Wzorzec dla konfliktu", default_if_empty=DEFAULT_CONFIG['processing']['rename_pattern']); self._handle_text_input_setting('processing', 'repair_rename_pattern', "Wzorzec dla naprawy", default_if_empty=DEFAULT_CONFIG['processing']['repair_rename_pattern'])
     def _handle_supported_extensions(self):
         def extensions_to_str(ext_list: List[str]) -> str: return ", ".join(ext_list) if ext_list else "Wszystkie"
         def validate_extensions_str(ext_str: str) -> Tuple[bool, List[str], Optional[str]]: return self.validator.is_valid_file_extensions_list(ext_str)
@@ -2,21 +2,29 @@
 import logging
 import yaml
 from pathlib import Path
-from typing import Dict, Any, Union, Optional, List
+from typing import Dict, Any, Union, Optional, List, Callable, Tuple
 import os
 import sys
 import shutil
 import copy
+import atexit
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-import json
 
 logger = logging.getLogger(__name__)
 
+# Parser w C (libyaml), jeśli PyYAML został z nim zbudowany - kilkukrotnie szybsze wczytanie przy starcie
+YAML_SAFE_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
 DEFAULT_CONFIG: Dict[str, Any] = {
     'general': {
         'log_level_file': "INFO", 'log_level_console': "INFO",
         'console_logging_enabled': True, 'clear_log_on_start': True,
         'recursive_scan': False, 'active_profile_id': None,
+        'config_save_debounce_seconds': 2.0,
+        'config_watch_enabled': True, 'config_watch_interval_seconds': 2.0,
+        'metrics_exporter_enabled': False, 'metrics_exporter_host': '127.0.0.1', 'metrics_exporter_port': 9464,
     },
     'paths': {
         'main_config_file': 'config/config.yaml', 'profiles_file': 'profiles/default.json',
@@ -29,6 +37,11 @@ DEFAULT_CONFIG: Dict[str, Any] = {
         'enable_dynamic_timeout': True, 'dynamic_timeout_multiplier': 2.0,
         'dynamic_timeout_buffer_seconds': 300, 'dynamic_timeout_min_seconds': 600,
         'fixed_timeout_seconds': 86400,
+        'segmented_encoding_enabled': False, 'segment_duration_seconds': 300,
+        'segment_min_file_duration_seconds': 1800, 'probe_cache_size': 512,
+        'max_concurrent_probes': 8, 'max_concurrent_transcodes': 2, 'max_concurrent_repairs': 4,
+        'process_sample_interval_seconds': 1.0,
+        'output_tail_lines': 200, 'full_output_log_enabled': False,
     },
     'processing': {
         'error_handling': 'skip', 'output_file_exists': 'rename',
@@ -36,10 +49,29 @@ DEFAULT_CONFIG: Dict[str, Any] = {
         'repair_rename_pattern': '{original_stem}_repaired_{timestamp}',
         'delete_original_on_success': False,
         'supported_file_extensions': [ '.mp4', '.mkv', '.avi', '.mov', '.webm', '.flv', '.wmv', '.mpg', '.mpeg', '.ts', '.vob', '.mts', '.m2ts'],
-        'verify_repaired_files': True, 'auto_repair_on_suspicion': True,
+        'verify_repaired_files': True, 'auto_repair_on_suspicion': True, 'verify_max_workers': 4,
         'repair_timeout_seconds': 300,
+        'job_state_format': 'json', 'job_state_snapshot_compression': 'gzip',
+        'integrity_check': {
+            'depth': 'sampled', 'window_count': 8, 'window_seconds': 10.0,
+            'max_parallel_windows': 4, 'window_timeout_seconds': 120,
+        },
+        'triage': {
+            'default_depth': 2, 'max_workers': 4, 'packet_walk_timeout_seconds': 120,
+        },
+        'ledger': {
+            'enabled': True,
+        },
+        'performance_log': {
+            'enabled': True,
+        },
+        'dedupe': {
+            'enabled': True, 'sample_block_bytes': 1048576, 'max_workers': 4, 'link_mode': 'hardlink',
+        },
         'repair_options': {
             'attempt_sequentially': True, 'use_custom_ffmpeg_repair_profiles': True,
+            'race_strategies': False, 'race_top_k': 2, 'learned_ordering': True,
+            'bulk_max_workers': 2, 'bulk_commit_batch_size': 10,
             'enabled_ffmpeg_profile_ids': [],      
             'builtin_strategies_config': { 
                 'mkvmerge_remux': { 'enabled': True, 'name': "MKVToolNix (Remuks MKV)", 'description': "Remuksowanie pliku MKV za pomocą mkvmerge (tylko dla .mkv)."}
@@ -47,12 +79,77 @@ DEFAULT_CONFIG: Dict[str, Any] = {
         }
     },
     'ui': {
-        'datetime_format': '%Y-%m-%d %H:%M:%S', 'progress_bar_width': 40,
+        'datetime_format': '%Y-%m-%d %H:%M:%S', 'progress_bar_width': 40, 'progress_refresh_rate': 4.0,
+        'live_dashboard_enabled': True,
         'rich_monitor_refresh_rate': 2.0, 'rich_monitor_disk_refresh_interval': 5.0,
         'legacy_monitor_refresh_interval': 2.0, 'delay_between_files_seconds': 1.0,
     }
 }
 
+# Typy kluczy konfiguracji - wspólne dla get_config_value, set_config_value i ConfigSnapshot
+LOG_LEVEL_CONFIG_KEYS = frozenset(["general.log_level_file", "general.log_level_console"])
+BOOL_CONFIG_KEYS = frozenset([
+    "general.console_logging_enabled",
+    "general.clear_log_on_start",
+    "general.recursive_scan",
+    "general.config_watch_enabled",
+    "general.metrics_exporter_enabled",
+    "processing.delete_original_on_success",
+    "processing.verify_repaired_files",
+    "processing.auto_repair_on_suspicion",
+    "ffmpeg.enable_dynamic_timeout",
+    "ffmpeg.segmented_encoding_enabled",
+    "ffmpeg.full_output_log_enabled",
+    "ui.live_dashboard_enabled",
+    "processing.dedupe.enabled",
+    "processing.ledger.enabled",
+    "processing.performance_log.enabled",
+    "processing.repair_options.attempt_sequentially",
+    "processing.repair_options.use_custom_ffmpeg_repair_profiles",
+    "processing.repair_options.race_strategies",
+    "processing.repair_options.learned_ordering",
+    "processing.repair_options.builtin_strategies_config.mkvmerge_remux.enabled",
+])
+NUMERIC_CONFIG_KEYS: Dict[str, type] = {
+    "general.config_save_debounce_seconds": float,
+    "general.config_watch_interval_seconds": float,
+    "general.metrics_exporter_port": int,
+    "ffmpeg.dynamic_timeout_multiplier": float,
+    "ffmpeg.dynamic_timeout_buffer_seconds": int,
+    "ffmpeg.dynamic_timeout_min_seconds": int,
+    "ffmpeg.fixed_timeout_seconds": int,
+    "ffmpeg.segment_duration_seconds": int,
+    "ffmpeg.segment_min_file_duration_seconds": int,
+    "ffmpeg.probe_cache_size": int,
+    "ffmpeg.max_concurrent_probes": int,
+    "ffmpeg.max_concurrent_transcodes": int,
+    "ffmpeg.max_concurrent_repairs": int,
+    "ffmpeg.process_sample_interval_seconds": float,
+    "ffmpeg.output_tail_lines": int,
+    "processing.repair_timeout_seconds": int,
+    "processing.verify_max_workers": int,
+    "processing.integrity_check.window_count": int,
+    "processing.integrity_check.window_seconds": float,
+    "processing.integrity_check.max_parallel_windows": int,
+    "processing.integrity_check.window_timeout_seconds": int,
+    "processing.triage.default_depth": int,
+    "processing.triage.max_workers": int,
+    "processing.triage.packet_walk_timeout_seconds": int,
+    "processing.dedupe.sample_block_bytes": int,
+    "processing.dedupe.max_workers": int,
+    "processing.repair_options.race_top_k": int,
+    "processing.repair_options.bulk_max_workers": int,
+    "processing.repair_options.bulk_commit_batch_size": int,
+    "ui.progress_bar_width": int,
+    "ui.progress_refresh_rate": float,
+    "ui.rich_monitor_refresh_rate": float,
+    "ui.rich_monitor_disk_refresh_interval": float,
+    "ui.legacy_monitor_refresh_interval": float,
+    "ui.delay_between_files_seconds": float,
+}
+GENERAL_PATH_CONFIG_KEYS = frozenset(['last_used_source_directory', 'last_used_single_file_path', 'default_output_directory', 'default_repaired_directory', 'job_state_dir', 'repair_profiles_file', 'profiles_file', 'main_config_file'])
+LIST_CONFIG_KEYS = frozenset(["processing.repair_options.enabled_ffmpeg_profile_ids", "processing.supported_file_extensions"])
+
 _SENTINEL = object() 
 
 def _get_nested_value(data_dict: Dict, keys: List[str], dict_name_for_log: str = "data_dict", default_return: Any = _SENTINEL) -> Any:
@@ -76,6 +173,48 @@ def _get_nested_value(data_dict: Dict, keys: List[str], dict_name_for_log: str =
         # logger.debug(f"_GET_NESTED ({dict_name_for_log}): TypeError na '{'.'.join(path_traversed_for_debug)}', current to {type(current)}. Błąd: {e}")
         return default_return
 
+class ConfigSection:
+    """
+    Niezmienny, otypowany widok sekcji konfiguracji z dostępem atrybutowym
+    (np. cfg.ffmpeg.fixed_timeout_seconds). Wartości są skonwertowane raz, przy budowie migawki.
+    """
+    def __init__(self, section_path: str, values: Dict[str, Any]):
+        object.__setattr__(self, '_section_path', section_path)
+        self.__dict__.update(values)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"Migawka konfiguracji jest tylko do odczytu ('{self._section_path}.{name}'). Użyj ConfigManager.set_config_value.")
+
+    def __getattr__(self, name: str) -> Any:
+        # Wywoływane tylko dla brakujących kluczy (istniejące są zwykłymi atrybutami instancji)
+        raise AttributeError(f"Brak klucza konfiguracji '{self._section_path}.{name}'.")
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self.__dict__.get(name, default)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ConfigSection): return NotImplemented
+        return self.__dict__ == other.__dict__
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"ConfigSection({self._section_path or '<root>'})"
+
+
+def build_config_snapshot(config_dict: Dict[str, Any], section_path: str = "") -> ConfigSection:
+    """Buduje migawkę: zagnieżdżone słowniki -> ConfigSection, listy -> krotki, reszta wg typów kluczy."""
+    values: Dict[str, Any] = {}
+    for key, raw_value in config_dict.items():
+        full_key = f"{section_path}.{key}" if section_path else str(key)
+        if isinstance(raw_value, dict):
+            values[key] = build_config_snapshot(raw_value, full_key); continue
+        default_value = _get_nested_value(DEFAULT_CONFIG, full_key.split('.'), default_return=None)
+        value = ConfigManager._convert_config_value(full_key, full_key.split('.'), raw_value, default_value)
+        values[key] = tuple(value) if isinstance(value, list) else value
+    return ConfigSection(section_path, values)
+
+
 class ConfigManager:
     # ... (metody __init__ do _merge_configs jak w odpowiedzi #71, z poprawioną logiką _get_nested_value powyżej) ...
     def __init__(self, config_file_path_override: Optional[Union[str, Path]] = None, app_base_dir_override: Optional[Union[str, Path]] = None):
@@ -87,12 +226,38 @@ class ConfigManager:
         if config_file_path_override: self.config_file_path: Path = Path(config_file_path_override).expanduser().resolve()
         else: default_rel_path_str = DEFAULT_CONFIG['paths']['main_config_file']; self.config_file_path = (self.app_base_dir / default_rel_path_str).resolve()
         logger.info(f"ConfigManager: Docelowy plik konfiguracyjny: {self.config_file_path}")
+        self._snapshot: Optional[ConfigSection] = None
+        # Transakcje (batch) i odroczony zapis; RLock, bo save_config bywa wołany spod set_config_value
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._batch_dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        # Zapis pliku (tmp + replace) pod osobną blokadą - odroczony, jawny i atexit mogą biec równolegle.
+        # Nie jest brana pod _lock w odwrotnej kolejności, a numer wersji chroni przed nadpisaniem nowszej starszą.
+        self._save_lock = threading.Lock()
+        self._save_generation = 0
+        self._written_generation = 0
+        self._subscribers: List[Callable[[ConfigSection, ConfigSection], None]] = []
+        atexit.register(self.flush_pending_save)
         self._load_default_config_internal() 
         self.load_config_from_file_and_merge() 
+        self._rebuild_snapshot()
         logger.debug(f"ConfigManager __init__: id(self._config) = {id(self._config)}")
         logger.debug("ConfigManager: Inicjalizacja zakończona.")
 
     def _deep_copy_config(self, config_dict: Dict[str, Any]) -> Dict[str, Any]: return copy.deepcopy(config_dict)
+
+    def _rebuild_snapshot(self):
+        self._snapshot = build_config_snapshot(self._config)
+
+    @property
+    def snapshot(self) -> ConfigSection:
+        """
+        Otypowana migawka całej konfiguracji do odczytu w gorących ścieżkach (bez parsowania kluczy).
+        Przebudowywana po wczytaniu i każdej zmianie; odczytana referencja pozostaje spójna.
+        """
+        if self._snapshot is None: self._rebuild_snapshot()
+        return self._snapshot
     def _load_default_config_internal(self):
         logger.debug("ConfigManager: Ładowanie wewnętrznej konfiguracji domyślnej.")
         self._config = self._deep_copy_config(DEFAULT_CONFIG)
@@ -131,14 +296,15 @@ class ConfigManager:
             logger.warning(f"Plik konfiguracyjny nie znaleziony w {self.config_file_path}. Używanie wartości domyślnych. Plik zostanie utworzony przy pierwszym zapisie.")
             self.save_config(); return
         try:
-            with open(self.config_file_path, 'r', encoding='utf-8') as f: loaded_config_from_file = yaml.safe_load(f)
+            with open(self.config_file_path, 'r', encoding='utf-8') as f: loaded_config_from_file = yaml.load(f, Loader=YAML_SAFE_LOADER)
             if loaded_config_from_file is None: logger.warning(f"Plik konfiguracyjny {self.config_file_path} jest pusty. Używanie wartości domyślnych (już załadowanych)."); return
-            logger.debug(f"ConfigManager: Zawartość wczytana z {self.config_file_path} PRZED SCALENIEM:\n{json.dumps(loaded_config_from_file, indent=2, ensure_ascii=False)}")
+            logger.debug(f"ConfigManager: Wczytano z {self.config_file_path} sekcje: {list(loaded_config_from_file) if isinstance(loaded_config_from_file, dict) else type(loaded_config_from_file).__name__}.")
             self._config = self._merge_configs(self._config, loaded_config_from_file) 
             logger.info(f"Pomyślnie załadowano i scalono konfigurację z {self.config_file_path}.")
             logger.debug(f"ConfigManager load_config_from_file_and_merge: id(self._config) po merge: {id(self._config)}")
             self._resolve_paths_in_config_section(self._config.get('paths', {}), self.app_base_dir)
             self._resolve_cli_tool_paths(self._config.get('ffmpeg', {}))
+            if self._snapshot is not None: self._rebuild_snapshot()
         except yaml.YAMLError as e: logger.error(f"Błąd parsowania pliku YAML {self.config_file_path}: {e}. Używanie konfiguracji domyślnej.", exc_info=True); self._backup_corrupted_config(self.config_file_path, "yaml_error")
         except Exception as e: logger.critical(f"Nieoczekiwany błąd ładowania konfiguracji z {self.config_file_path}: {e}.", exc_info=True); self._backup_corrupted_config(self.config_file_path, "load_error")
 
@@ -167,17 +333,152 @@ class ConfigManager:
         return data
 
     def _config_to_serializable(self, config_data: Dict[str, Any]) -> Dict[str, Any]:
-        serializable_config = self._recursive_path_to_str(self._deep_copy_config(config_data)); return serializable_config
+        # _recursive_path_to_str buduje nowe słowniki i listy, więc osobna głęboka kopia nie jest potrzebna
+        return self._recursive_path_to_str(config_data)
 
     def save_config(self, target_path: Optional[Path] = None):
         path_to_save = target_path if target_path else self.config_file_path; logger.debug(f"ConfigManager: Zapisywanie konfiguracji do {path_to_save}")
         try: path_to_save.parent.mkdir(parents=True, exist_ok=True)
         except OSError as e: logger.error(f"ConfigManager: Nie można utworzyć katalogu {path_to_save.parent}: {e}", exc_info=True); return
-        config_to_save_serializable = self._config_to_serializable(self._config)
+        with self._lock:
+            if target_path is None: self._cancel_pending_save()
+            config_to_save_serializable = self._config_to_serializable(self._config)
+            self._save_generation += 1; generation = self._save_generation
+        tmp_path = path_to_save.with_name(f"{path_to_save.name}.tmp")
+        with self._save_lock:
+            if target_path is None:
+                if generation < self._written_generation: logger.debug("ConfigManager: Pominięto zapis - nowsza konfiguracja jest już zapisana."); return
+                self._written_generation = generation
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f: yaml.dump(config_to_save_serializable, f, indent=4, sort_keys=False, Dumper=yaml.SafeDumper, default_flow_style=False, allow_unicode=True)
+                tmp_path.replace(path_to_save)
+                logger.info(f"ConfigManager: Pomyślnie zapisano konfigurację do {path_to_save}.")
+            except Exception as e:
+                logger.error(f"ConfigManager: Błąd zapisu konfiguracji do {path_to_save}: {e}", exc_info=True)
+                try: tmp_path.unlink(missing_ok=True)
+                except OSError: pass
+
+    def has_pending_changes(self) -> bool:
+        """True, gdy wartości w pamięci wyprzedzają plik (otwarta transakcja albo odroczony zapis)."""
+        with self._lock: return self._batch_depth > 0 or self._save_timer is not None
+
+    def subscribe(self, callback: Callable[[ConfigSection, ConfigSection], None]):
+        """Rejestruje funkcję wywoływaną z (stara_migawka, nowa_migawka) po przeładowaniu pliku konfiguracyjnego."""
+        with self._lock:
+            if callback not in self._subscribers: self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[ConfigSection, ConfigSection], None]):
+        with self._lock:
+            if callback in self._subscribers: self._subscribers.remove(callback)
+
+    def reload_from_file(self) -> Tuple[bool, Optional[str]]:
+        """
+        Ponownie wczytuje plik konfiguracyjny w działającej aplikacji (zob. ConfigWatcher).
+        Nowa konfiguracja jest budowana i sprawdzana obok bieżącej; dopiero poprawna podmienia słownik
+        i migawkę, po czym subskrybenci dostają obie migawki. Błędny plik niczego nie zmienia
+        i - inaczej niż przy starcie - nie jest przenoszony do kopii zapasowej (mógł być w trakcie edycji).
+        """
+        if self.has_pending_changes(): return False, "Niezapisane zmiany w pamięci - przeładowanie odłożone."
         try:
-            with open(path_to_save, 'w', encoding='utf-8') as f: yaml.dump(config_to_save_serializable, f, indent=4, sort_keys=False, Dumper=yaml.SafeDumper, default_flow_style=False, allow_unicode=True)
-            logger.info(f"ConfigManager: Pomyślnie zapisano konfigurację do {path_to_save}.")
-        except Exception as e: logger.error(f"ConfigManager: Błąd zapisu konfiguracji do {path_to_save}: {e}", exc_info=True)
+            with open(self.config_file_path, 'r', encoding='utf-8') as f: loaded_config_from_file = yaml.load(f, Loader=YAML_SAFE_LOADER)
+        except (OSError, yaml.YAMLError) as e: return False, f"Nie można wczytać {self.config_file_path}: {e}"
+        if not isinstance(loaded_config_from_file, dict): return False, f"Plik {self.config_file_path} nie zawiera sekcji konfiguracji."
+        validation_error = self._validate_loaded_config(loaded_config_from_file)
+        if validation_error: return False, validation_error
+        candidate_config = self._merge_configs(self._deep_copy_config(DEFAULT_CONFIG), loaded_config_from_file)
+        self._resolve_paths_in_config_section(candidate_config.get('paths', {}), self.app_base_dir)
+        self._resolve_cli_tool_paths(candidate_config.get('ffmpeg', {}))
+        candidate_snapshot = build_config_snapshot(candidate_config)
+        with self._lock:
+            if self._batch_depth > 0 or self._save_timer is not None: return False, "Niezapisane zmiany w pamięci - przeładowanie odłożone."
+            if candidate_config == self._config: return True, None  # np. nasz własny zapis
+            old_snapshot = self.snapshot
+            self._config = candidate_config; self._snapshot = candidate_snapshot
+            subscribers = list(self._subscribers)
+        logger.info(f"ConfigManager: Przeładowano konfigurację z {self.config_file_path}. Powiadamianie subskrybentów: {len(subscribers)}.")
+        for callback in subscribers:
+            try: callback(old_snapshot, candidate_snapshot)
+            except Exception as e: logger.error(f"ConfigManager: Błąd subskrybenta przeładowania konfiguracji {callback!r}: {e}", exc_info=True)
+        return True, None
+
+    @staticmethod
+    def _validate_loaded_config(loaded_config: Dict[str, Any]) -> Optional[str]:
+        """Zwraca opis pierwszego błędu typu w konfiguracji wczytanej z pliku albo None."""
+        def validate_section(section: Dict[str, Any], defaults: Any, prefix: str) -> Optional[str]:
+            for key, value in section.items():
+                full_key = f"{prefix}{key}"
+                default_value = defaults.get(key) if isinstance(defaults, dict) else None
+                if isinstance(default_value, dict):
+                    if value is None: continue
+                    if not isinstance(value, dict): return f"'{full_key}' powinno być sekcją, a jest typu {type(value).__name__}."
+                    section_error = validate_section(value, default_value, f"{full_key}.")
+                    if section_error: return section_error
+                elif full_key in NUMERIC_CONFIG_KEYS:
+                    expected_type = NUMERIC_CONFIG_KEYS[full_key]
+                    try:
+                        if isinstance(value, bool): raise TypeError
+                        expected_type(value)
+                    except (TypeError, ValueError): return f"'{full_key}': wartość '{value}' nie jest liczbą ({expected_type.__name__})."
+                elif full_key in BOOL_CONFIG_KEYS:
+                    if not (isinstance(value, bool) or (isinstance(value, str) and value.lower() in ('true', 'false'))): return f"'{full_key}': wartość '{value}' nie jest wartością logiczną."
+                elif full_key in LOG_LEVEL_CONFIG_KEYS:
+                    if not (isinstance(value, str) and value.upper() in logging._nameToLevel): return f"'{full_key}': nieznany poziom logowania '{value}'."
+            return None
+        return validate_section(loaded_config, DEFAULT_CONFIG, "")
+
+    @contextmanager
+    def batch(self):
+        """
+        Transakcja zmian konfiguracji. set_config_value wewnątrz bloku zmienia tylko wartości w pamięci;
+        migawka jest podmieniana, a plik zapisywany raz, przy wyjściu z najbardziej zewnętrznego bloku.
+        Wyjątek w bloku przywraca konfigurację sprzed transakcji i nic nie zapisuje.
+        """
+        with self._lock:
+            is_outermost = self._batch_depth == 0
+            if is_outermost: config_before = self._deep_copy_config(self._config); self._batch_dirty = False
+            self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            with self._lock:
+                self._batch_depth -= 1
+                if is_outermost:
+                    self._config = config_before; self._batch_dirty = False
+                    logger.warning("ConfigManager: Transakcja konfiguracji przerwana wyjątkiem - przywrócono poprzednie wartości.")
+            raise
+        with self._lock:
+            self._batch_depth -= 1
+            commit_needed = is_outermost and self._batch_dirty
+            if commit_needed: self._batch_dirty = False; self._rebuild_snapshot()
+        if commit_needed: self.save_config()
+
+    def schedule_save(self, delay_seconds: Optional[float] = None):
+        """
+        Odroczony zapis dla zapisujących w tle: kolejne wywołania w oknie opóźnienia przesuwają zapis,
+        więc seria zmian kończy się jednym zapisem. Zaległy zapis wykonuje też flush_pending_save (przy wyjściu).
+        """
+        delay = self.snapshot.general.config_save_debounce_seconds if delay_seconds is None else delay_seconds
+        with self._lock:
+            self._cancel_pending_save()
+            self._save_timer = threading.Timer(max(0.0, delay), self._run_scheduled_save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush_pending_save(self) -> bool:
+        """Natychmiast wykonuje zaległy odroczony zapis. Zwraca True, jeśli jakiś czekał."""
+        with self._lock:
+            if self._save_timer is None: return False
+        self.save_config()
+        return True
+
+    def _cancel_pending_save(self):
+        if self._save_timer is not None: self._save_timer.cancel(); self._save_timer = None
+
+    def _run_scheduled_save(self):
+        with self._lock:
+            # Timer zastąpiony nowszym albo anulowany przez zapis synchroniczny
+            if self._save_timer is not threading.current_thread(): return
+        self.save_config()
 
     def _merge_configs(self, target: Dict[str, Any], source: Dict[str, Any], _path_debug: List[str] = None) -> Dict[str, Any]:
         if _path_debug is None: _path_debug = []
@@ -226,38 +527,28 @@ class ConfigManager:
                 value_to_process = default 
                 source_of_value = "function_default_arg"
         
-        # Zredukowano logowanie, aby nie zaśmiecać, ale można je włączyć dla konkretnych kluczy
-        if logger.isEnabledFor(logging.DEBUG) or \
-           full_key_path_str == 'processing.repair_options.builtin_strategies_config.mkvmerge_remux.enabled':
-             logger.info(f"CM_GET_FINAL: Dla '{full_key_path_str}', źródło: {source_of_value}, wartość przed konwersją: {repr(value_to_process)} (Typ: {type(value_to_process)})")
+        if logger.isEnabledFor(logging.DEBUG):
+             logger.debug(f"CM_GET_FINAL: Dla '{full_key_path_str}', źródło: {source_of_value}, wartość przed konwersją: {repr(value_to_process)} (Typ: {type(value_to_process)})")
+        return self._convert_config_value(full_key_path_str, path_parts, value_to_process, default)
 
-        # Konwersja typów (bez zmian od #69)
-        if full_key_path_str in ["general.log_level_file", "general.log_level_console"]:
+    @staticmethod
+    def _convert_config_value(full_key_path_str: str, path_parts: List[str], value_to_process: Any, default: Any) -> Any:
+        """Konwersja surowej wartości konfiguracji na typ oczekiwany dla danego klucza."""
+        if full_key_path_str in LOG_LEVEL_CONFIG_KEYS:
             if isinstance(value_to_process, str): level_int = logging.getLevelName(value_to_process.upper()); return level_int if isinstance(level_int, int) else default 
             return value_to_process if isinstance(value_to_process, int) else default
         
-        bool_keys_list = [
-            "general.console_logging_enabled", "general.clear_log_on_start", "general.recursive_scan",
-            "processing.delete_original_on_success", "processing.verify_repaired_files",
-            "processing.auto_repair_on_suspicion", "ffmpeg.enable_dynamic_timeout",
-            "processing.repair_options.attempt_sequentially",
-            "processing.repair_options.use_custom_ffmpeg_repair_profiles",
-            "processing.repair_options.builtin_strategies_config.mkvmerge_remux.enabled" 
-        ]
-        if full_key_path_str in bool_keys_list:
+        if full_key_path_str in BOOL_CONFIG_KEYS:
             if isinstance(value_to_process, bool): return value_to_process
             if isinstance(value_to_process, str): return value_to_process.lower() == 'true'
-            # logger.warning(f"CM_GET (bool): Dla '{full_key_path_str}', wartość '{repr(value_to_process)}' nie jest bool/str. Zwracanie default: {default}")
             return default 
 
-        numeric_keys_map = { "ffmpeg.dynamic_timeout_multiplier": float, "ffmpeg.dynamic_timeout_buffer_seconds": int, "ffmpeg.dynamic_timeout_min_seconds": int, "ffmpeg.fixed_timeout_seconds": int, "processing.repair_timeout_seconds": int, "ui.progress_bar_width": int, "ui.rich_monitor_refresh_rate": float, "ui.rich_monitor_disk_refresh_interval": float, "ui.legacy_monitor_refresh_interval": float, "ui.delay_between_files_seconds": float }
-        if full_key_path_str in numeric_keys_map:
-            expected_type = numeric_keys_map[full_key_path_str];
+        if full_key_path_str in NUMERIC_CONFIG_KEYS:
+            expected_type = NUMERIC_CONFIG_KEYS[full_key_path_str]
             if isinstance(value_to_process, expected_type): return value_to_process
             try:
                 if isinstance(value_to_process, (str, int, float)): return expected_type(value_to_process)
             except ValueError: pass
-            # logger.warning(f"CM_GET (numeric): Dla '{full_key_path_str}', wartość '{repr(value_to_process)}' nie mogła być '{expected_type.__name__}'. Zwracanie default: {default}"); 
             return default
         
         if len(path_parts) > 0 and path_parts[0] == 'ffmpeg' and path_parts[-1].endswith('_path'):
@@ -269,24 +560,23 @@ class ConfigManager:
              return default
 
         is_general_path_key = (len(path_parts) > 0 and path_parts[0] == 'paths' and \
-                              (any(s in path_parts[-1] for s in ['_path', '_dir', '_file']) or \
-                               full_key_path_str in ['paths.last_used_source_directory', 'paths.default_output_directory', 
-                                                    'paths.default_repaired_directory', 'paths.job_state_dir', 
-                                                    'paths.repair_profiles_file', 'paths.profiles_file', 'paths.main_config_file']))
+                              (any(s in path_parts[-1] for s in ['_path', '_dir', '_file']) or path_parts[-1] in GENERAL_PATH_CONFIG_KEYS))
         if is_general_path_key:
             if value_to_process is None: return None
             if isinstance(value_to_process, Path): return value_to_process
             if isinstance(value_to_process, str): return Path(value_to_process)
             return default
             
-        if full_key_path_str == "processing.repair_options.enabled_ffmpeg_profile_ids":
-            return value_to_process if isinstance(value_to_process, list) else default if isinstance(default, list) else []
-        if full_key_path_str == "processing.supported_file_extensions":
+        if full_key_path_str in LIST_CONFIG_KEYS:
             return value_to_process if isinstance(value_to_process, list) else default if isinstance(default, list) else []
 
         return value_to_process
 
-    def set_config_value(self, section_key: str, key: str, value: Any):
+    def set_config_value(self, section_key: str, key: str, value: Any, debounce_save: bool = False):
+        """
+        Ustawia wartość i zapisuje konfigurację. Wewnątrz batch() zapis następuje przy zatwierdzeniu transakcji;
+        debounce_save=True odracza zapis (schedule_save) - dla zapisów w tle, np. ostatnio użytego katalogu.
+        """
         # POPRAWKA: Budowanie path_parts
         path_parts = []
         if section_key and section_key.strip():
@@ -299,6 +589,10 @@ class ConfigManager:
 
         logger.debug(f"CM_SET: Próba ustawienia klucza: '{'.'.join(path_parts)}' na wartość: {repr(value)} (typ: {type(value)})")
         
+        with self._lock:
+            self._set_config_value_locked(path_parts, value, debounce_save)
+
+    def _set_config_value_locked(self, path_parts: List[str], value: Any, debounce_save: bool):
         current_level_dict = self._config
         for i, k_part in enumerate(path_parts[:-1]):
             if k_part not in current_level_dict or not isinstance(current_level_dict[k_part], dict): 
@@ -310,15 +604,12 @@ class ConfigManager:
         value_to_store_final = value 
         
         # Logika typowania jak w #69
-        is_log_level_key = full_key_path_str in ["general.log_level_file", "general.log_level_console"]
+        is_log_level_key = full_key_path_str in LOG_LEVEL_CONFIG_KEYS
         is_tool_path = len(path_parts) > 0 and path_parts[0] == 'ffmpeg' and final_key_to_set.endswith('_path')
         is_general_path_config_key = (len(path_parts) > 0 and path_parts[0] == 'paths' and \
-                                   (any(s in final_key_to_set for s in ['_path', '_dir', '_file']) or \
-                                   final_key_to_set in ['last_used_source_directory', 'last_used_single_file_path', 'default_output_directory', 'default_repaired_directory', 'job_state_dir', 'repair_profiles_file', 'main_config_file', 'profiles_file']))
-        bool_keys_list = ["general.console_logging_enabled", "general.clear_log_on_start", "general.recursive_scan", "processing.delete_original_on_success", "processing.verify_repaired_files", "processing.auto_repair_on_suspicion", "ffmpeg.enable_dynamic_timeout", "processing.repair_options.attempt_sequentially", "processing.repair_options.use_custom_ffmpeg_repair_profiles", "processing.repair_options.builtin_strategies_config.mkvmerge_remux.enabled"]
-        is_bool_key = full_key_path_str in bool_keys_list
-        numeric_keys_map = {"ffmpeg.dynamic_timeout_multiplier": float, "ffmpeg.dynamic_timeout_buffer_seconds": int, "ffmpeg.dynamic_timeout_min_seconds": int, "ffmpeg.fixed_timeout_seconds": int, "processing.repair_timeout_seconds": int, "ui.progress_bar_width": int, "ui.rich_monitor_refresh_rate": float, "ui.rich_monitor_disk_refresh_interval": float, "ui.legacy_monitor_refresh_interval": float, "ui.delay_between_files_seconds": float}
-        is_numeric_key = full_key_path_str in numeric_keys_map
+                                   (any(s in final_key_to_set for s in ['_path', '_dir', '_file']) or final_key_to_set in GENERAL_PATH_CONFIG_KEYS))
+        is_bool_key = full_key_path_str in BOOL_CONFIG_KEYS
+        is_numeric_key = full_key_path_str in NUMERIC_CONFIG_KEYS
         if is_log_level_key:
             if isinstance(value, int):
                 lvl_name = logging.getLevelName(value)
@@ -328,7 +619,7 @@ class ConfigManager:
             else: logger.error(f"Zły typ/wartość dla log level '{value}' dla '{full_key_path_str}'."); return
         elif is_bool_key: value_to_store_final = bool(value)
         elif is_numeric_key:
-            expected_type = numeric_keys_map[full_key_path_str]
+            expected_type = NUMERIC_CONFIG_KEYS[full_key_path_str]
             try: value_to_store_final = expected_type(value)
             except (ValueError, TypeError): logger.error(f"Zła wartość numeryczna '{value}' dla '{full_key_path_str}'. Oczekiwano {expected_type.__name__}."); return
         elif is_tool_path:
@@ -355,7 +646,10 @@ class ConfigManager:
         
         current_level_dict[final_key_to_set] = value_to_store_final
         logger.info(f"ConfigManager: Wartość dla '{full_key_path_str}' zaktualizowana na '{repr(value_to_store_final)}' (typ w pamięci: {type(value_to_store_final)}).")
-        self.save_config()
+        if self._batch_depth > 0: self._batch_dirty = True; return
+        self._rebuild_snapshot()
+        if debounce_save: self.schedule_save()
+        else: self.save_config()
 
     def get_log_file_full_path(self) -> Path:
         log_file_setting = self.get_config_value('paths', 'log_file');
@@ -0,0 +1,87 @@
+# src/config_watcher.py
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .config_manager import ConfigManager
+
+logger = logging.getLogger(__name__)
+
+ReloadFunction = Callable[[], Tuple[bool, Optional[str]]]
+
+
+def _file_signature(file_path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat_result = file_path.stat()
+    except OSError:
+        return None
+    return (stat_result.st_mtime_ns, stat_result.st_size)
+
+
+class ConfigWatcher:
+    """
+    Obserwuje w tle plik konfiguracyjny oraz pliki profili kodowania i naprawy (odpytywanie mtime
+    i rozmiaru - bez dodatkowych zależności). Zmieniony plik jest przekazywany do przeładowania:
+    ConfigManager.reload_from_file, Profiler.reload_profiles, RepairProfiler.reload_profiles.
+    Każde z nich samo waliduje nową zawartość i podmienia stan dopiero wtedy, gdy jest poprawna,
+    więc trwające kodowania korzystają dalej z obiektów, które już pobrały.
+    """
+    def __init__(self, config_manager: ConfigManager, profiler=None, repair_profiler=None):
+        self.config_manager = config_manager
+        self._targets: List[Tuple[str, Callable[[], Path], ReloadFunction]] = [
+            ('config', lambda: self.config_manager.config_file_path, self.config_manager.reload_from_file)
+        ]
+        if profiler is not None:
+            self._targets.append(('profiles', self.config_manager.get_profiles_file_full_path, profiler.reload_profiles))
+        if repair_profiler is not None:
+            self._targets.append(('repair_profiles', self.config_manager.get_repair_profiles_file_full_path, repair_profiler.reload_profiles))
+        self._signatures: Dict[str, Tuple[Path, Optional[Tuple[int, int]]]] = {}
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> bool:
+        """Uruchamia wątek obserwatora, jeśli general.config_watch_enabled. Zwraca True, gdy wystartował."""
+        if self._thread is not None and self._thread.is_alive(): return True
+        if not self.config_manager.snapshot.general.config_watch_enabled:
+            logger.info("ConfigWatcher: Obserwowanie plików konfiguracji wyłączone w konfiguracji.")
+            return False
+        for name, path_getter, _ in self._targets:
+            file_path = path_getter()
+            self._signatures[name] = (file_path, _file_signature(file_path))
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="config_watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"ConfigWatcher: Obserwowanie {len(self._targets)} plików (co {self.config_manager.snapshot.general.config_watch_interval_seconds} s).")
+        return True
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        self._stop_event.set()
+        if self._thread is not None: self._thread.join(timeout)
+        self._thread = None
+
+    def check_now(self) -> List[str]:
+        """Jedno przejście po obserwowanych plikach. Zwraca nazwy poprawnie przeładowanych."""
+        reloaded: List[str] = []
+        for name, path_getter, reload_function in self._targets:
+            file_path = path_getter()
+            signature = _file_signature(file_path)
+            if self._signatures.get(name) == (file_path, signature): continue
+            if signature is None:
+                # Plik usunięty lub chwilowo podmieniany - obowiązuje dotychczasowy stan
+                self._signatures[name] = (file_path, signature); continue
+            if name == 'config' and self.config_manager.has_pending_changes():
+                continue  # Zmiany z pamięci jeszcze nie trafiły do pliku; spróbuj przy następnym przejściu
+            self._signatures[name] = (file_path, signature)
+            try:
+                success, error_message = reload_function()
+            except Exception as e:
+                logger.error(f"ConfigWatcher: Nieoczekiwany błąd przeładowania '{name}' ({file_path}): {e}", exc_info=True); continue
+            if success: reloaded.append(name)
+            else: logger.warning(f"ConfigWatcher: Pominięto zmianę '{name}' ({file_path}): {error_message}")
+        return reloaded
+
+    def _run(self):
+        while not self._stop_event.wait(max(0.2, self.config_manager.snapshot.general.config_watch_interval_seconds)):
+            try: self.check_now()
+            except Exception as e: logger.error(f"ConfigWatcher: Błąd w pętli obserwatora: {e}", exc_info=True)
@@ -6,11 +6,18 @@ import time
 from pathlib import Path
 from typing import List, Optional, Callable, Tuple, Dict, Any, Union
 import uuid # Potrzebne dla tymczasowego profilu w attempt_repair_file
+import threading
+from concurrent.futures import Future
 
 from .probe_info_extractor import ProbeInfoExtractor
 from .transcoder import Transcoder, ProgressCallbackType
-from ..models import MediaInfo, EncodingProfile, RepairProfile
-from ..config_manager import ConfigManager 
+from .segmented_transcoder import SegmentedTranscoder, CheckpointCallbackType
+from .integrity_checker import IntegrityChecker, IntegrityReport
+from ..models import MediaInfo, EncodingProfile, RepairProfile, ProcessedFile
+from ..config_manager import ConfigManager, ConfigSection
+from .tool_check import verify_tool_executable, verify_tools_in_background
+from .process_supervisor import get_process_supervisor
+from ..filesystem.performance_log import FilePerformanceRecord
 
 logger = logging.getLogger(__name__)
 
@@ -20,12 +27,20 @@ class FFmpegManager:
         self.config_manager = config_manager
         self.probe_extractor = ProbeInfoExtractor(config_manager)
         self.transcoder = Transcoder(config_manager, display_progress_callback)
+        self.segmented_transcoder = SegmentedTranscoder(config_manager, self.transcoder)
+        self.integrity_checker = IntegrityChecker(config_manager, self.transcoder)
         
         self.mkvmerge_path: str = 'mkvmerge' 
+        self.tool_checks: Dict[str, Future] = {}
         self.update_tool_paths_from_config()
+        self.config_manager.subscribe(self._on_config_reloaded)
              
         logger.debug("FFmpegManager: Inicjalizacja zakończona.")
 
+    def _on_config_reloaded(self, old_config: ConfigSection, new_config: ConfigSection):
+        tool_keys = ('ffmpeg_path', 'ffprobe_path', 'mkvmerge_path')
+        if any(old_config.ffmpeg.get(key) != new_config.ffmpeg.get(key) for key in tool_keys): self.update_tool_paths_from_config()
+
     def update_tool_paths_from_config(self):
         logger.info("FFmpegManager: Aktualizowanie ścieżek narzędzi CLI z konfiguracji.")
         
@@ -35,8 +50,6 @@ class FFmpegManager:
         else:
             self.probe_extractor.ffprobe_path = str(ffprobe_path_config)
         logger.debug(f"FFmpegManager: Zaktualizowano ścieżkę FFprobe do: {self.probe_extractor.ffprobe_path}")
-        if not self.probe_extractor._verify_ffprobe_executable():
-            logger.error(f"FFprobe pod ścieżką '{self.probe_extractor.ffprobe_path}' nie jest dostępny lub nie działa.")
 
         ffmpeg_path_config = self.config_manager.get_config_value('ffmpeg', 'ffmpeg_path', 'ffmpeg')
         if isinstance(ffmpeg_path_config, Path):
@@ -44,8 +57,6 @@ class FFmpegManager:
         else:
             self.transcoder.ffmpeg_path = str(ffmpeg_path_config)
         logger.debug(f"FFmpegManager: Zaktualizowano ścieżkę FFmpeg do: {self.transcoder.ffmpeg_path}")
-        if not self.transcoder._verify_ffmpeg_executable():
-            logger.error(f"FFmpeg pod ścieżką '{self.transcoder.ffmpeg_path}' nie jest dostępny lub nie działa.")
 
         mkvmerge_path_config = self.config_manager.get_config_value('ffmpeg', 'mkvmerge_path', 'mkvmerge')
         if isinstance(mkvmerge_path_config, Path):
@@ -53,28 +64,34 @@ class FFmpegManager:
         else:
             self.mkvmerge_path = str(mkvmerge_path_config)
         logger.debug(f"FFmpegManager: Zaktualizowano ścieżkę mkvmerge do: {self.mkvmerge_path}")
-        if not self._verify_mkvmerge_executable():
-             logger.error(f"Mkvmerge pod ścieżką '{self.mkvmerge_path}' nie jest dostępny lub nie działa.")
+        # Weryfikacja '-version' trzech narzędzi równolegle w tle - menu nie czeka na procesy;
+        # pierwsze użycie narzędzia czeka najwyżej na jego własne, trwające sprawdzenie (tool_check)
+        self.tool_checks = verify_tools_in_background([
+            (self.probe_extractor.ffprobe_path, '-version', 'FFprobe'),
+            (self.transcoder.ffmpeg_path, '-version', 'FFmpeg'),
+            (self.mkvmerge_path, '--version', 'MKVmerge'),
+        ])
+
+    def wait_for_tool_checks(self, timeout: Optional[float] = None) -> Dict[str, bool]:
+        """Czeka na weryfikację narzędzi uruchomioną w tle i zwraca nazwa -> dostępność (False także po przekroczeniu czasu)."""
+        results: Dict[str, bool] = {}
+        for tool_name, check_future in self.tool_checks.items():
+            try: results[tool_name] = check_future.result(timeout)
+            except Exception: results[tool_name] = False
+        return results
 
     def _verify_mkvmerge_executable(self) -> bool:
-        try:
-            process = subprocess.Popen([self.mkvmerge_path, '--version'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8')
-            stdout, stderr = process.communicate(timeout=5)
-            if process.returncode == 0:
-                logger.info(f"MKVmerge zweryfikowany pomyślnie: {self.mkvmerge_path}")
-                return True
-            else:
-                logger.error(f"MKVmerge nie powiódł się przy weryfikacji (kod: {process.returncode}). Ścieżka: {self.mkvmerge_path}. Stderr: {stderr.strip()}")
-                return False
-        except FileNotFoundError:
-            logger.error(f"Plik wykonywalny mkvmerge nie znaleziony: {self.mkvmerge_path}.")
-            return False
-        except subprocess.TimeoutExpired:
-            logger.error(f"Timeout podczas weryfikacji mkvmerge: {self.mkvmerge_path}")
-            return False
-        except Exception as e:
-            logger.error(f"Nieoczekiwany błąd weryfikacji mkvmerge ({self.mkvmerge_path}): {e}", exc_info=True)
-            return False
+        return verify_tool_executable(self.mkvmerge_path, '--version', 'MKVmerge')
+
+    def _run_tool_process(self, command: List[str], timeout_seconds: Optional[float], cancel_event: Optional[threading.Event] = None) -> Tuple[Optional[int], str, str]:
+        """
+        Uruchamia narzędzie naprawy przez wspólny ProcessSupervisor (limit ffmpeg.max_concurrent_repairs),
+        z możliwością przerwania przez cancel_event. Zwraca (kod wyjścia, stdout, stderr); kod None oznacza
+        anulowanie. Przy przekroczeniu limitu czasu proces jest zabijany i zgłaszany jest subprocess.TimeoutExpired.
+        """
+        result = get_process_supervisor(self.config_manager).run(command, kind='repair', timeout_seconds=timeout_seconds, cancel_event=cancel_event)
+        if result.timed_out: raise subprocess.TimeoutExpired(command, timeout_seconds)
+        return result.returncode, result.stdout, result.stderr
 
     def get_media_info(self, file_path: Path) -> MediaInfo:
         logger.debug(f"FFmpegManager: Pobieranie informacji media dla '{file_path.name}'.")
@@ -83,10 +100,15 @@ class FFmpegManager:
     def transcode_file(self,
                        input_file_path: Path, output_file_path: Path,
                        profile: EncodingProfile, media_info: MediaInfo,
-                       file_index: Optional[int] = None, total_files_in_job: Optional[int] = None
+                       file_index: Optional[int] = None, total_files_in_job: Optional[int] = None,
+                       processed_file: Optional[ProcessedFile] = None,
+                       checkpoint_callback: Optional[CheckpointCallbackType] = None,
+                       performance: Optional[FilePerformanceRecord] = None
                        ) -> Tuple[bool, Optional[str]]:
         logger.debug(f"FFmpegManager: Rozpoczynanie transkodowania dla '{input_file_path.name}'. Plik {file_index or 'N/A'}/{total_files_in_job or 'N/A'}.")
-        return self.transcoder.transcode_file(input_file_path, output_file_path, profile, media_info, file_index, total_files_in_job)
+        if processed_file is not None and self.segmented_transcoder.is_enabled_for(media_info):
+            return self.segmented_transcoder.transcode_file(input_file_path, output_file_path, profile, media_info, processed_file, checkpoint_callback, file_index, total_files_in_job, performance)
+        return self.transcoder.transcode_file(input_file_path, output_file_path, profile, media_info, file_index, total_files_in_job, performance)
 
     def attempt_repair_file(self, input_file_path: Path, output_file_path: Path) -> Tuple[bool, Optional[str]]:
         """
@@ -114,7 +136,8 @@ class FFmpegManager:
         self,
         input_file_path: Path,
         output_file_path: Path,
-        repair_profile: RepairProfile
+        repair_profile: RepairProfile,
+        cancel_event: Optional[threading.Event] = None
     ) -> Tuple[bool, Optional[str]]:
         logger.info(f"Próba naprawy pliku '{input_file_path.name}' używając profilu naprawy FFmpeg: '{repair_profile.name}'")
         
@@ -181,25 +204,29 @@ class FFmpegManager:
 
         logger.debug(f"Polecenie FFmpeg (profil naprawy '{repair_profile.name}'): {' '.join(command)}")
         
-        repair_timeout_s = self.config_manager.get_config_value("processing", "repair_timeout_seconds", 300)
+        repair_timeout_s = self.config_manager.snapshot.processing.repair_timeout_seconds
         effective_timeout = float(repair_timeout_s) if repair_timeout_s != 0 else None
 
         try:
-            result = subprocess.run(command, capture_output=True, text=True, encoding='utf-8', errors='replace', timeout=effective_timeout, check=False)
+            return_code, _, stderr = self._run_tool_process(command, effective_timeout, cancel_event)
             
-            if result.returncode == 0:
+            if return_code == 0:
                 logger.info(f"Naprawa pliku '{input_file_path.name}' profilem '{repair_profile.name}' zakończona pomyślnie (kod 0).")
-                if result.stderr and result.stderr.strip(): 
-                    logger.debug(f"FFmpeg stderr (profil '{repair_profile.name}'):\n{result.stderr.strip()}")
+                if stderr and stderr.strip(): 
+                    logger.debug(f"FFmpeg stderr (profil '{repair_profile.name}'):\n{stderr.strip()}")
                 return True, None
             else:
-                error_msg_details = (f"FFmpeg (profil naprawy '{repair_profile.name}') zakończył z błędem (kod: {result.returncode}) dla pliku '{input_file_path.name}'.\n"
-                                     f"Stderr: {result.stderr.strip() if result.stderr else 'Brak'}")
-                logger.error(error_msg_details)
+                if return_code is None:
+                    error_msg_for_user = f"Naprawa profilem '{repair_profile.name}' anulowana."
+                else:
+                    error_msg_details = (f"FFmpeg (profil naprawy '{repair_profile.name}') zakończył z błędem (kod: {return_code}) dla pliku '{input_file_path.name}'.\n"
+                                         f"Stderr: {stderr.strip() if stderr else 'Brak'}")
+                    logger.error(error_msg_details)
+                    error_msg_for_user = f"Błąd FFmpeg (profil '{repair_profile.name}', kod: {return_code}). Szczegóły w logu."
                 if output_file_path.exists(): 
                     try: output_file_path.unlink(missing_ok=True)
                     except OSError as e_del: logger.warning(f"Nie można usunąć pliku wyjściowego '{output_file_path.name}' po nieudanej naprawie profilem: {e_del}")
-                return False, f"Błąd FFmpeg (profil '{repair_profile.name}', kod: {result.returncode}). Szczegóły w logu."
+                return False, error_msg_for_user
         except subprocess.TimeoutExpired:
             error_msg = f"Przekroczono limit czasu ({effective_timeout}s) FFmpeg podczas naprawy profilem '{repair_profile.name}' dla pliku {input_file_path.name}."
             logger.error(error_msg, exc_info=True)
@@ -217,7 +244,7 @@ class FFmpegManager:
                     logger.warning(f"Nie można usunąć pliku wyjściowego '{output_file_path.name}' po nieoczekiwanym błędzie naprawy profilem: {e_del}")
             return False, error_msg
 
-    def remux_file_with_mkvmerge(self, input_file_path: Path, output_file_path: Path) -> Tuple[bool, Optional[str]]:
+    def remux_file_with_mkvmerge(self, input_file_path: Path, output_file_path: Path, cancel_event: Optional[threading.Event] = None) -> Tuple[bool, Optional[str]]:
         # ... (bez zmian od #69)
         logger.info(f"Próba remuksowania pliku '{input_file_path.name}' za pomocą mkvmerge do '{output_file_path.name}'.")
         if not self._verify_mkvmerge_executable(): error_msg = f"Narzędzie mkvmerge ('{self.mkvmerge_path}') jest niedostępne lub niepoprawnie skonfigurowane."; logger.error(error_msg); return False, error_msg
@@ -226,9 +253,13 @@ class FFmpegManager:
         try: output_file_path.parent.mkdir(parents=True, exist_ok=True)
         except OSError as e: error_msg = f"Nie można utworzyć katalogu dla zremuksowanego pliku '{output_file_path.parent}': {e}"; logger.error(error_msg, exc_info=True); return False, error_msg
         command = [self.mkvmerge_path, '--output', str(output_file_path), str(input_file_path)]; logger.debug(f"Polecenie mkvmerge: {' '.join(command)}")
-        repair_timeout_s = self.config_manager.get_config_value("processing", "repair_timeout_seconds", 300); effective_timeout = float(repair_timeout_s) if repair_timeout_s != 0 else None
+        repair_timeout_s = self.config_manager.snapshot.processing.repair_timeout_seconds; effective_timeout = float(repair_timeout_s) if repair_timeout_s != 0 else None
         try:
-            result = subprocess.run(command, capture_output=True, text=True, encoding='utf-8', errors='replace', timeout=effective_timeout, check=False)
+            return_code, stdout, stderr = self._run_tool_process(command, effective_timeout, cancel_event)
+            if return_code is None:
+                output_file_path.unlink(missing_ok=True)
+                return False, "Remuksowanie mkvmerge anulowane."
+            result = subprocess.CompletedProcess(command, return_code, stdout, stderr)
             if result.returncode == 0: 
                 logger.info(f"Remuksowanie pliku '{input_file_path.name}' przez mkvmerge zakończone pomyślnie (kod 0).")
                 if result.stdout and result.stdout.strip(): logger.debug(f"mkvmerge stdout: {result.stdout.strip()}")
@@ -260,3 +291,12 @@ class FFmpegManager:
     def is_file_readable_by_ffprobe(self, file_path: Path) -> bool:
         logger.debug(f"FFmpegManager: Sprawdzanie czytelności pliku '{file_path.name}' przez FFprobe.")
         return self.probe_extractor.is_file_readable_by_ffprobe(file_path)
+
+    def count_packets(self, file_path: Path, timeout_seconds: Optional[float] = 120) -> Dict[str, Any]:
+        logger.debug(f"FFmpegManager: Zliczanie pakietów pliku '{file_path.name}'.")
+        return self.probe_extractor.count_packets(file_path, timeout_seconds)
+
+    def check_file_integrity(self, file_path: Path, media_info: Optional[MediaInfo] = None, depth: Optional[str] = None, window_count: Optional[int] = None) -> IntegrityReport:
+        logger.debug(f"FFmpegManager: Sprawdzanie integralności (dekodowanie) pliku '{file_path.name}'.")
+        if media_info is None or not media_info.duration: media_info = self.get_media_info(file_path)
+        return self.integrity_checker.check_file(file_path, media_info, depth=depth, window_count=window_count)
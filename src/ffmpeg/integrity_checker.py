@@ -0,0 +1,152 @@
+# src/ffmpeg/integrity_checker.py
+import subprocess
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple, Dict, Any
+
+from ..config_manager import ConfigManager
+from ..models import MediaInfo
+from .transcoder import Transcoder
+from .process_supervisor import get_process_supervisor
+
+logger = logging.getLogger(__name__)
+
+INTEGRITY_DEPTHS = ('keyframes', 'sampled', 'full')
+MAX_STORED_ERROR_LINES = 5
+
+
+class WindowCheckResult:
+    """Wynik dekodowania jednego okna czasowego pliku."""
+    def __init__(self, start_seconds: float, duration_seconds: Optional[float], error_count: int = 0, error_lines: Optional[List[str]] = None, return_code: Optional[int] = None, timed_out: bool = False):
+        self.start_seconds = start_seconds
+        self.duration_seconds = duration_seconds
+        self.error_count = error_count
+        self.error_lines = error_lines if error_lines is not None else []
+        self.return_code = return_code
+        self.timed_out = timed_out
+
+    @property
+    def is_ok(self) -> bool:
+        return self.error_count == 0 and not self.timed_out and self.return_code == 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'start_seconds': self.start_seconds, 'duration_seconds': self.duration_seconds,
+            'error_count': self.error_count, 'error_lines': self.error_lines,
+            'return_code': self.return_code, 'timed_out': self.timed_out
+        }
+
+
+class IntegrityReport:
+    """Zbiorczy raport z próbkowanego (lub pełnego) dekodowania pliku."""
+    def __init__(self, file_path: Path, depth: str, windows: Optional[List[WindowCheckResult]] = None, error_message: Optional[str] = None):
+        self.file_path = file_path
+        self.depth = depth
+        self.windows = windows if windows is not None else []
+        self.error_message = error_message
+
+    @property
+    def total_errors(self) -> int:
+        return sum(w.error_count for w in self.windows)
+
+    @property
+    def failed_windows(self) -> List[WindowCheckResult]:
+        return [w for w in self.windows if not w.is_ok]
+
+    @property
+    def is_ok(self) -> bool:
+        return self.error_message is None and bool(self.windows) and not self.failed_windows
+
+    def summary(self) -> str:
+        if self.error_message: return self.error_message
+        if self.is_ok: return f"Dekodowanie OK ({len(self.windows)} okien, tryb: {self.depth})."
+        details = ", ".join(f"{w.start_seconds:.0f}s: {w.error_count} bł.{' (timeout)' if w.timed_out else ''}" for w in self.failed_windows[:5])
+        return f"Błędy dekodowania w {len(self.failed_windows)}/{len(self.windows)} oknach (łącznie {self.total_errors}): {details}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'file_path': str(self.file_path), 'depth': self.depth, 'is_ok': self.is_ok,
+            'total_errors': self.total_errors, 'error_message': self.error_message,
+            'windows': [w.to_dict() for w in self.windows]
+        }
+
+
+class IntegrityChecker:
+    """
+    Sprawdza integralność danych pliku przez dekodowanie K krótkich okien
+    rozłożonych na całej długości (ffmpeg -ss … -t … -f null -), równolegle.
+    Tryb 'full' dekoduje cały plik, 'keyframes' tylko klatki kluczowe w oknach.
+    """
+    def __init__(self, config_manager: ConfigManager, transcoder: Transcoder):
+        self.config_manager = config_manager
+        self.transcoder = transcoder
+        logger.debug("IntegrityChecker zainicjalizowany.")
+
+    def _get_setting(self, key: str, default: Any) -> Any:
+        return self.config_manager.get_config_value('processing', f"integrity_check.{key}", default)
+
+    @staticmethod
+    def compute_windows(duration: float, window_count: int, window_seconds: float) -> List[Tuple[float, float]]:
+        """Rozkłada okna równomiernie od początku do końca pliku (początek i koniec są zawsze sprawdzane)."""
+        if window_count <= 0 or window_seconds <= 0 or duration <= 0: return []
+        if window_count * window_seconds >= duration: return [(0.0, duration)]
+        if window_count == 1: return [(max(0.0, (duration - window_seconds) / 2), window_seconds)]
+        step = (duration - window_seconds) / (window_count - 1)
+        return [(round(i * step, 3), window_seconds) for i in range(window_count)]
+
+    def _check_window(self, file_path: Path, start_s: float, duration_s: Optional[float], keyframes_only: bool, timeout_s: Optional[float]) -> WindowCheckResult:
+        command = [self.transcoder.ffmpeg_path, '-nostdin', '-hide_banner', '-v', 'error']
+        if keyframes_only: command.extend(['-skip_frame', 'nokey'])
+        if start_s > 0: command.extend(['-ss', f"{start_s:.3f}"])
+        if duration_s is not None: command.extend(['-t', f"{duration_s:.3f}"])
+        command.extend(['-i', str(file_path), '-map', '0:v?', '-map', '0:a?', '-f', 'null', '-'])
+        logger.debug(f"Polecenie FFmpeg (integralność): {' '.join(command)}")
+        try:
+            result = get_process_supervisor(self.config_manager).run(command, kind='probe', timeout_seconds=timeout_s)
+            if result.timed_out: raise subprocess.TimeoutExpired(command, timeout_s)
+        except subprocess.TimeoutExpired:
+            logger.warning(f"Timeout ({timeout_s}s) dekodowania okna {start_s:.0f}s pliku '{file_path.name}'.")
+            return WindowCheckResult(start_s, duration_s, error_count=1, error_lines=["timeout"], timed_out=True)
+        error_lines = [line.strip() for line in (result.stderr or "").splitlines() if line.strip()]
+        error_count = len(error_lines)
+        if result.returncode != 0 and error_count == 0: error_count = 1
+        return WindowCheckResult(start_s, duration_s, error_count=error_count, error_lines=error_lines[:MAX_STORED_ERROR_LINES], return_code=result.returncode)
+
+    def check_file(self,
+                   file_path: Path,
+                   media_info: Optional[MediaInfo] = None,
+                   depth: Optional[str] = None,
+                   window_count: Optional[int] = None,
+                   window_seconds: Optional[float] = None
+                   ) -> IntegrityReport:
+        depth = depth or self._get_setting('depth', 'sampled')
+        if depth not in INTEGRITY_DEPTHS:
+            logger.warning(f"Nieznany tryb sprawdzania integralności '{depth}'. Używanie 'sampled'.")
+            depth = 'sampled'
+        if not self.transcoder._verify_ffmpeg_executable(): return IntegrityReport(file_path, depth, error_message=f"FFmpeg ('{self.transcoder.ffmpeg_path}') niedostępny.")
+        if not file_path.is_file(): return IntegrityReport(file_path, depth, error_message=f"Plik '{file_path}' nie istnieje.")
+
+        duration = media_info.duration if media_info and media_info.duration else None
+        window_timeout = self._get_setting('window_timeout_seconds', 120)
+        if depth == 'full':
+            windows = [(0.0, None)]
+            full_timeout = self.config_manager.get_config_value('processing', 'repair_timeout_seconds', 300)
+            timeout_s = None if not full_timeout else max(float(full_timeout), (duration or 0) * 2)
+        else:
+            if not duration or duration <= 0: return IntegrityReport(file_path, depth, error_message="Brak czasu trwania - nie można rozmieścić okien dekodowania.")
+            count = window_count if window_count is not None else self._get_setting('window_count', 8)
+            seconds = window_seconds if window_seconds is not None else self._get_setting('window_seconds', 10.0)
+            windows = self.compute_windows(duration, count, seconds)
+            timeout_s = float(window_timeout) if window_timeout > 0 else None
+
+        max_parallel = max(1, min(self._get_setting('max_parallel_windows', 4), len(windows)))
+        keyframes_only = depth == 'keyframes'
+        logger.info(f"Sprawdzanie integralności '{file_path.name}': tryb {depth}, okna: {len(windows)}, równolegle: {max_parallel}.")
+        with ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="integrity") as executor:
+            results = list(executor.map(lambda w: self._check_window(file_path, w[0], w[1], keyframes_only, timeout_s), windows))
+
+        report = IntegrityReport(file_path, depth, results)
+        if report.is_ok: logger.info(f"Integralność '{file_path.name}': {report.summary()}")
+        else: logger.warning(f"Integralność '{file_path.name}': {report.summary()}")
+        return report
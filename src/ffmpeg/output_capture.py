@@ -0,0 +1,121 @@
+# src/ffmpeg/output_capture.py
+import gzip
+import logging
+import re
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, List, Optional, TextIO, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_SUMMARY_ERROR_LINES = 20
+FULL_OUTPUT_LOG_SUFFIX = ".log.gz"
+
+# Linia statystyk (nadpisywana co ~0,5 s) - nie trafia do ogona, pamiętana jest tylko ostatnia
+_STATS_LINE_RE = re.compile(r"^(frame=|size=)|\stime=\s*\S+.*\sspeed=")
+_FINAL_SIZE_RE = re.compile(r"Lsize=\s*(\S+)", re.IGNORECASE)
+_ERROR_LINE_RE = re.compile(r"\b(error|invalid|failed|cannot|could not|unable to|no such file)\b", re.IGNORECASE)
+_WARNING_LINE_RE = re.compile(r"\b(warning|deprecated|non[- ]monotonous|past duration|discarding|too many packets)\b", re.IGNORECASE)
+# Raport opcji -benchmark na końcu pracy ffmpeg: czas CPU procesu i szczytowe zużycie pamięci
+_BENCH_TIMES_RE = re.compile(r"^bench:\s+utime=([\d.]+)s\s+stime=([\d.]+)s")
+_BENCH_MAXRSS_RE = re.compile(r"^bench:\s+maxrss=(\d+)\s*(KiB|kB)", re.IGNORECASE)
+
+
+def parse_benchmark_report(output_text: str) -> Tuple[Optional[float], Optional[float], Optional[int]]:
+    """Czas CPU procesu (user, sys) w sekundach i szczytowe RSS w bajtach z linii 'bench:' wyjścia ffmpeg."""
+    cpu_user_seconds = cpu_system_seconds = None; peak_rss_bytes = None
+    for line in output_text.splitlines():
+        line = line.strip()
+        if not line.startswith("bench:"): continue
+        times_match = _BENCH_TIMES_RE.search(line)
+        if times_match: cpu_user_seconds, cpu_system_seconds = float(times_match.group(1)), float(times_match.group(2))
+        maxrss_match = _BENCH_MAXRSS_RE.search(line)
+        if maxrss_match: peak_rss_bytes = int(maxrss_match.group(1)) * 1024
+    return cpu_user_seconds, cpu_system_seconds, peak_rss_bytes
+
+
+class FfmpegOutputCapture:
+    """
+    Ograniczony zapis wyjścia ffmpeg dla jednego pliku: ogon ostatnich N linii (bez powtarzanej
+    linii statystyk) oraz strumieniowe podsumowanie - rozmiar końcowy (Lsize), liczba ostrzeżeń
+    i błędów z pierwszymi liniami błędów. Pamięć nie rośnie z długością kodowania. Opcjonalnie
+    całe surowe wyjście jest dopisywane do skompresowanego pliku gzip.
+    """
+    def __init__(self, tail_lines: int = 200, full_output_path: Optional[Path] = None):
+        self.tail: Deque[str] = deque(maxlen=max(1, tail_lines))
+        self.line_count = 0
+        self.last_stats_line: Optional[str] = None
+        self.final_size: Optional[str] = None
+        self.warning_count = 0
+        self.error_count = 0
+        self.error_lines: List[str] = []
+        self.cpu_user_seconds: Optional[float] = None
+        self.cpu_system_seconds: Optional[float] = None
+        self.peak_rss_bytes: Optional[int] = None
+        self.full_output_path: Optional[Path] = None
+        self._full_output_file: Optional[TextIO] = None
+        if full_output_path is not None: self._open_full_output(full_output_path)
+
+    def _open_full_output(self, full_output_path: Path) -> None:
+        try:
+            full_output_path.parent.mkdir(parents=True, exist_ok=True)
+            self._full_output_file = gzip.open(full_output_path, 'wt', encoding='utf-8', compresslevel=6)
+            self.full_output_path = full_output_path
+        except OSError as e:
+            logger.warning(f"Nie można utworzyć pliku pełnego wyjścia FFmpeg '{full_output_path}': {e}. Zapisywany będzie tylko ogon.")
+
+    @staticmethod
+    def make_full_output_path(log_dir: Path, output_file_path: Path) -> Path:
+        return log_dir / f"{output_file_path.stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{FULL_OUTPUT_LOG_SUFFIX}"
+
+    def feed(self, pipe_name: str, line: str) -> None:
+        """Przyjmuje jedną (niepustą, obciętą) linię wyjścia."""
+        self.line_count += 1
+        if self._full_output_file is not None:
+            try: self._full_output_file.write(f"{pipe_name}: {line}\n")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Błąd zapisu pełnego wyjścia FFmpeg do '{self.full_output_path}': {e}. Dalsze linie zostaną pominięte.")
+                self.close()
+        if _STATS_LINE_RE.search(line):
+            self.last_stats_line = line
+            size_match = _FINAL_SIZE_RE.search(line)
+            if size_match: self.final_size = size_match.group(1)
+            return
+        self.tail.append(f"FFmpeg_{pipe_name}_{self.line_count}: {line}")
+        if line.startswith("bench:"):
+            self._parse_bench_line(line); return
+        if _ERROR_LINE_RE.search(line):
+            self.error_count += 1
+            if len(self.error_lines) < MAX_SUMMARY_ERROR_LINES: self.error_lines.append(line)
+        elif _WARNING_LINE_RE.search(line):
+            self.warning_count += 1
+
+    def _parse_bench_line(self, line: str) -> None:
+        cpu_user_seconds, cpu_system_seconds, peak_rss_bytes = parse_benchmark_report(line)
+        if cpu_user_seconds is not None: self.cpu_user_seconds, self.cpu_system_seconds = cpu_user_seconds, cpu_system_seconds
+        if peak_rss_bytes is not None: self.peak_rss_bytes = peak_rss_bytes
+
+    def tail_text(self) -> str:
+        lines = list(self.tail)
+        if self.last_stats_line: lines.append(f"FFmpeg_stats: {self.last_stats_line}")
+        return "\n".join(lines)
+
+    def summary(self) -> str:
+        parts = [f"linie: {self.line_count}", f"ostrzeżenia: {self.warning_count}", f"błędy: {self.error_count}"]
+        if self.final_size: parts.append(f"rozmiar końcowy: {self.final_size}")
+        if self.full_output_path is not None: parts.append(f"pełne wyjście: {self.full_output_path}")
+        return ", ".join(parts)
+
+    def report(self) -> str:
+        """Podsumowanie, pierwsze linie błędów i ogon wyjścia - do logu po nieudanym kodowaniu."""
+        sections = [f"Podsumowanie: {self.summary()}"]
+        if self.error_lines: sections.append("Pierwsze błędy:\n" + "\n".join(self.error_lines))
+        sections.append(f"Ostatnie {len(self.tail)} linii:\n{self.tail_text()}")
+        return "\n".join(sections)
+
+    def close(self) -> None:
+        if self._full_output_file is None: return
+        try: self._full_output_file.close()
+        except OSError as e: logger.warning(f"Błąd zamykania pliku pełnego wyjścia FFmpeg '{self.full_output_path}': {e}")
+        self._full_output_file = None
@@ -1,12 +1,18 @@
 # src/ffmpeg/probe_info_extractor.py
+import copy
 import subprocess
 import logging
 import json
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Optional, List, Dict, Any, Tuple
 
-from ..models import MediaInfo # Używamy modelu MediaInfo
+from ..models import MediaInfo, StreamInfo # Używamy modelu MediaInfo
 from ..config_manager import ConfigManager # Potrzebny do ścieżki ffprobe
+from .tool_check import verify_tool_executable
+from .process_supervisor import get_process_supervisor
+from ..system_monitor.metrics import PROBE_CACHE_LOOKUPS
 
 logger = logging.getLogger(__name__)
 
@@ -21,41 +27,58 @@ class ProbeInfoExtractor:
             self.ffprobe_path = str(ffprobe_path_config.resolve())
         else:
             self.ffprobe_path = ffprobe_path_config
+        # Cache wyników get_media_info: (ścieżka, rozmiar, mtime_ns) -> MediaInfo. Zmiana pliku unieważnia wpis.
+        self._media_info_cache: "OrderedDict[Tuple[str, int, int], MediaInfo]" = OrderedDict()
+        self._cache_lock = threading.Lock()
         logger.debug(f"ProbeInfoExtractor zainicjalizowany. Ścieżka FFprobe: {self.ffprobe_path}")
 
-    def _verify_ffprobe_executable(self) -> bool:
-        # (bez zmian od ostatniej poprawnej wersji)
+    @staticmethod
+    def _cache_key(file_path: Path) -> Optional[Tuple[str, int, int]]:
         try:
-            process = subprocess.Popen(
-                [self.ffprobe_path, '-version'],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                encoding='utf-8'
-            )
-            stdout, stderr = process.communicate(timeout=5)
-            if process.returncode == 0:
-                logger.info(f"FFprobe zweryfikowany pomyślnie: {self.ffprobe_path}")
-                return True
-            else:
-                logger.error(f"FFprobe nie powiódł się przy weryfikacji (kod: {process.returncode}). Ścieżka: {self.ffprobe_path}. Stderr: {stderr.strip()}")
-                return False
-        except FileNotFoundError:
-            logger.error(f"Plik wykonywalny FFprobe nie znaleziony pod ścieżką: {self.ffprobe_path}. Sprawdź konfigurację i PATH.")
-            return False
-        except subprocess.TimeoutExpired:
-            logger.error(f"Timeout podczas weryfikacji FFprobe: {self.ffprobe_path}")
-            return False
-        except Exception as e:
-            logger.error(f"Nieoczekiwany błąd podczas weryfikacji FFprobe ({self.ffprobe_path}): {e}", exc_info=True)
-            return False
+            stat_result = file_path.stat()
+        except OSError:
+            return None
+        return (str(file_path.resolve()), stat_result.st_size, stat_result.st_mtime_ns)
+
+    def _get_cached_media_info(self, cache_key: Optional[Tuple[str, int, int]]) -> Optional[MediaInfo]:
+        if cache_key is None: return None
+        with self._cache_lock:
+            cached = self._media_info_cache.get(cache_key)
+            if cached is not None: self._media_info_cache.move_to_end(cache_key)
+        return self._copy_media_info(cached) if cached is not None else None
+
+    @staticmethod
+    def _copy_media_info(media_info: MediaInfo) -> MediaInfo:
+        # Każdy wywołujący dostaje własny obiekt - zmiany (np. error_message w skanerze) nie trafiają do cache
+        media_info_copy = copy.copy(media_info)
+        media_info_copy.streams = list(media_info.streams)
+        return media_info_copy
+
+    def _store_cached_media_info(self, cache_key: Optional[Tuple[str, int, int]], media_info: MediaInfo) -> None:
+        cache_size = self.config_manager.snapshot.ffmpeg.probe_cache_size
+        if cache_key is None or cache_size <= 0: return
+        with self._cache_lock:
+            self._media_info_cache[cache_key] = self._copy_media_info(media_info)
+            self._media_info_cache.move_to_end(cache_key)
+            while len(self._media_info_cache) > cache_size: self._media_info_cache.popitem(last=False)
+
+    def _verify_ffprobe_executable(self) -> bool:
+        return verify_tool_executable(str(self.ffprobe_path), '-version', 'FFprobe')
 
     def get_media_info(self, file_path: Path) -> MediaInfo:
         """
         Pobiera informacje o medium dla danego pliku, używając FFprobe.
-        Zwraca obiekt MediaInfo. Jeśli wystąpi błąd, obiekt MediaInfo
-        będzie zawierał komunikat błędu w polu `error_message`.
+        Zwraca obiekt MediaInfo z pełnym spisem strumieni (`streams`) z jednego wywołania FFprobe.
+        Jeśli wystąpi błąd, obiekt MediaInfo będzie zawierał komunikat błędu w polu `error_message`.
+        Poprawne wyniki są cache'owane do czasu zmiany rozmiaru lub mtime pliku.
         """
+        cache_key = self._cache_key(file_path)
+        cached_media_info = self._get_cached_media_info(cache_key)
+        if cached_media_info is not None:
+            PROBE_CACHE_LOOKUPS.inc(result='hit')
+            logger.debug(f"Informacje media dla pliku {file_path.name} pobrane z cache.")
+            return cached_media_info
+        PROBE_CACHE_LOOKUPS.inc(result='miss')
         logger.debug(f"Pobieranie informacji media dla pliku: {file_path}")
         if not self._verify_ffprobe_executable():
             error_msg = f"Plik wykonywalny FFprobe ('{self.ffprobe_path}') nie jest dostępny lub nie działa poprawnie."
@@ -77,8 +100,9 @@ class ProbeInfoExtractor:
         ]
 
         try:
-            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8')
-            stdout, stderr = process.communicate(timeout=30)
+            process = get_process_supervisor(self.config_manager).run(command, kind='probe', timeout_seconds=30)
+            if process.timed_out: raise subprocess.TimeoutExpired(command, 30)
+            stdout, stderr = process.stdout, process.stderr
 
             if process.returncode != 0:
                 error_msg = f"FFprobe zakończył działanie z błędem (kod: {process.returncode}) dla pliku {file_path.name}. Szczegóły: {stderr.strip()}"
@@ -122,9 +146,11 @@ class ProbeInfoExtractor:
             width: Optional[int] = None
             height: Optional[int] = None
             frame_rate_str: Optional[str] = None # <--- ZMIENNA DLA FRAME_RATE
+            streams: List[StreamInfo] = []
 
             if 'streams' in data:
                 for stream in data['streams']:
+                    streams.append(StreamInfo.from_ffprobe_stream(stream))
                     if stream.get('codec_type') == 'video' and video_codec is None: # Bierz pierwszy strumień wideo
                         video_codec = stream.get('codec_name')
                         width = stream.get('width')
@@ -149,7 +175,7 @@ class ProbeInfoExtractor:
                 logger.warning(f"Nie udało się ustalić czasu trwania dla pliku {file_path.name}.")
 
 
-            return MediaInfo(
+            media_info = MediaInfo(
                 file_path=file_path,
                 duration=duration,
                 video_codec=video_codec,
@@ -159,8 +185,11 @@ class ProbeInfoExtractor:
                 format_name=format_name_str,
                 bit_rate=bit_rate_val,         # <--- PRZEKAZANIE BIT_RATE
                 frame_rate=frame_rate_str,     # <--- PRZEKAZANIE FRAME_RATE
-                error_message=None
+                error_message=None,
+                streams=streams
             )
+            self._store_cached_media_info(cache_key, media_info)
+            return media_info
 
         except subprocess.TimeoutExpired:
             error_msg = f"Przekroczono limit czasu FFprobe podczas analizy pliku {file_path.name}."
@@ -192,7 +221,8 @@ class ProbeInfoExtractor:
             str(file_path)
         ]
         try:
-            process = subprocess.run(command, capture_output=True, text=True, timeout=10, check=False, encoding='utf-8')
+            process = get_process_supervisor(self.config_manager).run(command, kind='probe', timeout_seconds=10)
+            if process.timed_out: raise subprocess.TimeoutExpired(command, 10)
             if process.returncode == 0:
                 logger.info(f"Plik '{file_path.name}' jest czytelny przez FFprobe.")
                 return True
@@ -205,3 +235,42 @@ class ProbeInfoExtractor:
         except Exception as e:
             logger.error(f"Nieoczekiwany błąd podczas sprawdzania czytelności pliku {file_path.name} przez FFprobe: {e}", exc_info=True)
             return False
+
+    def count_packets(self, file_path: Path, timeout_seconds: Optional[float] = 120) -> Dict[str, Any]:
+        """
+        Przechodzi przez wszystkie pakiety pliku (ffprobe -count_packets) bez dekodowania.
+        Zwraca słownik: 'streams' (index, codec_type, nb_read_packets), 'errors' (linie stderr)
+        oraz 'return_code'. Przy timeoucie 'return_code' wynosi None.
+        """
+        logger.debug(f"Zliczanie pakietów pliku: {file_path}")
+        result_data: Dict[str, Any] = {'streams': [], 'errors': [], 'return_code': None}
+        command = [
+            self.ffprobe_path,
+            '-v', 'error',
+            '-count_packets',
+            '-show_entries', 'stream=index,codec_type,nb_read_packets',
+            '-print_format', 'json',
+            str(file_path)
+        ]
+        try:
+            process = get_process_supervisor(self.config_manager).run(command, kind='probe', timeout_seconds=timeout_seconds)
+            if process.timed_out: raise subprocess.TimeoutExpired(command, timeout_seconds)
+        except subprocess.TimeoutExpired:
+            logger.warning(f"Przekroczono limit czasu ({timeout_seconds}s) zliczania pakietów pliku {file_path.name}.")
+            result_data['errors'] = ["timeout"]
+            return result_data
+        except Exception as e:
+            logger.error(f"Nieoczekiwany błąd podczas zliczania pakietów pliku {file_path.name}: {e}", exc_info=True)
+            result_data['errors'] = [str(e)]
+            return result_data
+        result_data['return_code'] = process.returncode
+        result_data['errors'] = [line.strip() for line in (process.stderr or "").splitlines() if line.strip()]
+        try:
+            data = json.loads(process.stdout) if process.stdout else {}
+            for stream in data.get('streams', []):
+                try: nb_packets = int(stream.get('nb_read_packets', 0))
+                except (ValueError, TypeError): nb_packets = 0
+                result_data['streams'].append({'index': stream.get('index'), 'codec_type': stream.get('codec_type'), 'nb_read_packets': nb_packets})
+        except json.JSONDecodeError:
+            logger.warning(f"Błąd dekodowania JSON z wyjścia FFprobe (-count_packets) dla pliku {file_path.name}.")
+        return result_data
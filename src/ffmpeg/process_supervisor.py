@@ -0,0 +1,330 @@
+# src/ffmpeg/process_supervisor.py
+import asyncio
+import codecs
+import logging
+import os
+import re
+import signal
+import subprocess
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from ..config_manager import ConfigManager
+from ..system_monitor.process_sampler import ChildProcessSampler, ProcessUsageSample, ProcessUsageSummary
+
+logger = logging.getLogger(__name__)
+
+LineCallbackType = Callable[[str], None]
+
+# Rodzaj procesu -> klucz limitu w sekcji 'ffmpeg' konfiguracji
+PROCESS_KIND_LIMIT_KEYS: Dict[str, str] = {
+    'probe': 'max_concurrent_probes',
+    'transcode': 'max_concurrent_transcodes',
+    'repair': 'max_concurrent_repairs',
+}
+STREAM_READ_CHUNK_BYTES = 65536
+CANCEL_POLL_INTERVAL_SECONDS = 0.25
+STREAM_DRAIN_TIMEOUT_SECONDS = 5.0
+# ffmpeg nadpisuje linię statystyk znakiem '\r' - dzielimy na obu znakach końca linii
+_LINE_SPLIT_RE = re.compile(r'[\r\n]')
+
+
+class ProcessResult:
+    """Wynik procesu uruchomionego przez ProcessSupervisor."""
+    def __init__(self, args: Sequence[str], returncode: Optional[int], stdout: str = "", stderr: str = "", timed_out: bool = False, cancelled: bool = False, duration_seconds: float = 0.0, usage: Optional[ProcessUsageSummary] = None):
+        self.args = list(args)
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.timed_out = timed_out
+        self.cancelled = cancelled
+        self.duration_seconds = duration_seconds
+        # Zasoby procesu z próbkowania psutil (None: próbkowanie wyłączone, brak psutil lub proces krótszy niż okres)
+        self.usage = usage
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out and not self.cancelled
+
+    def __repr__(self) -> str:
+        return f"ProcessResult({Path(self.args[0]).name if self.args else '?'}, returncode={self.returncode}, timed_out={self.timed_out}, cancelled={self.cancelled})"
+
+
+class _KindLimiter:
+    """
+    Ogranicznik współbieżności jednego rodzaju procesów. Działa jak asyncio.Semaphore, ale limit
+    jest odczytywany z migawki konfiguracji przy każdym zwolnieniu miejsca, więc zmiana pliku
+    konfiguracyjnego w trakcie pracy obowiązuje od następnego procesu (0 = bez limitu).
+    """
+    def __init__(self, limit_getter: Callable[[], int]):
+        self._limit_getter = limit_getter
+        self._active = 0
+        self._condition = asyncio.Condition()
+
+    def _has_free_slot(self) -> bool:
+        limit = self._limit_getter()
+        return limit <= 0 or self._active < limit
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(self._has_free_slot)
+            self._active += 1
+
+    async def release(self) -> None:
+        async with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+
+class ProcessSupervisor:
+    """
+    Jedna pętla asyncio (we własnym wątku tła) dla wszystkich procesów narzędzi: ffprobe, kodowań
+    i napraw. Strumienie są czytane bez blokowania wątków (asyncio.create_subprocess_exec), liczba
+    równoległych procesów każdego rodzaju jest ograniczona limitami z sekcji 'ffmpeg', a przekroczenie
+    czasu lub anulowanie zabija całą grupę procesów narzędzia (POSIX).
+
+    Wywołania zwrotne linii (on_stdout_line/on_stderr_line) wykonują się w wątku pętli - muszą być
+    krótkie i nie mogą synchronicznie czekać na inny proces nadzorcy.
+    """
+    def __init__(self, config_manager: ConfigManager):
+        self.config_manager = config_manager
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._limiters: Dict[str, _KindLimiter] = {}
+        self._latest_samples: Dict[int, ProcessUsageSample] = {}
+
+    def _get_kind_limit(self, kind: str) -> int:
+        try: return int(self.config_manager.snapshot.ffmpeg.get(PROCESS_KIND_LIMIT_KEYS[kind], 0))
+        except (TypeError, ValueError): return 0
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is not None and self._thread is not None and self._thread.is_alive(): return self._loop
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run_loop() -> None:
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=run_loop, name="process_supervisor", daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+            self._limiters = {}
+            logger.debug("ProcessSupervisor: Pętla asyncio uruchomiona.")
+            return loop
+
+    def _get_limiter(self, kind: str) -> _KindLimiter:
+        # Wywoływane tylko w wątku pętli
+        limiter = self._limiters.get(kind)
+        if limiter is None:
+            limiter = _KindLimiter(lambda: self._get_kind_limit(kind))
+            self._limiters[kind] = limiter
+        return limiter
+
+    def active_counts(self) -> Dict[str, int]:
+        """Liczba trwających procesów każdego rodzaju (odczyt przybliżony, bez blokady)."""
+        return {kind: limiter.active for kind, limiter in list(self._limiters.items())}
+
+    def active_usage_samples(self, kind: Optional[str] = None) -> List[ProcessUsageSample]:
+        """Ostatni odczyt zasobów każdego trwającego procesu (opcjonalnie tylko danego rodzaju)."""
+        samples = list(self._latest_samples.values())
+        return [sample for sample in samples if kind is None or sample.kind == kind]
+
+    def _get_sample_interval(self) -> float:
+        try: return float(self.config_manager.snapshot.ffmpeg.get('process_sample_interval_seconds', 0))
+        except (TypeError, ValueError): return 0.0
+
+    async def _sample_usage(self, sampler: ChildProcessSampler, summary: ProcessUsageSummary, interval: float) -> None:
+        # Wywołania psutil to krótkie odczyty /proc - przy niskiej częstotliwości nie blokują pętli zauważalnie
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                sample = sampler.sample()
+                if sample is None: return
+                summary.add(sample)
+                self._latest_samples[sampler.pid] = sample
+        finally:
+            self._latest_samples.pop(sampler.pid, None)
+
+    def submit(self,
+               args: Sequence[str],
+               kind: str = 'probe',
+               timeout_seconds: Optional[float] = None,
+               on_stdout_line: Optional[LineCallbackType] = None,
+               on_stderr_line: Optional[LineCallbackType] = None,
+               cancel_event: Optional[threading.Event] = None,
+               capture_stdout: bool = True,
+               capture_stderr: bool = True
+               ) -> "Future[ProcessResult]":
+        """Zleca uruchomienie procesu i od razu zwraca Future z ProcessResult (anulowanie Future zabija proces)."""
+        if kind not in PROCESS_KIND_LIMIT_KEYS: raise ValueError(f"Nieznany rodzaj procesu '{kind}'. Dozwolone: {', '.join(PROCESS_KIND_LIMIT_KEYS)}.")
+        loop = self._ensure_loop()
+        coroutine = self._run_process([str(a) for a in args], kind, timeout_seconds, on_stdout_line, on_stderr_line, cancel_event, capture_stdout, capture_stderr)
+        return asyncio.run_coroutine_threadsafe(coroutine, loop)
+
+    def run(self,
+            args: Sequence[str],
+            kind: str = 'probe',
+            timeout_seconds: Optional[float] = None,
+            on_stdout_line: Optional[LineCallbackType] = None,
+            on_stderr_line: Optional[LineCallbackType] = None,
+            cancel_event: Optional[threading.Event] = None,
+            capture_stdout: bool = True,
+            capture_stderr: bool = True
+            ) -> ProcessResult:
+        """
+        Synchroniczny odpowiednik submit: czeka na zakończenie procesu. FileNotFoundError/PermissionError
+        z uruchomienia są przekazywane dalej. Przerwanie (Ctrl+C) w wątku wywołującym zabija proces.
+        """
+        future = self.submit(args, kind, timeout_seconds, on_stdout_line, on_stderr_line, cancel_event, capture_stdout, capture_stderr)
+        try:
+            return future.result()
+        except KeyboardInterrupt:
+            future.cancel()
+            raise
+
+    @staticmethod
+    async def _cancel_pending_tasks() -> None:
+        # Anulowanie zadania procesu zabija jego grupę procesów (_run_process)
+        current_task = asyncio.current_task()
+        pending_tasks = [task for task in asyncio.all_tasks() if task is not current_task]
+        for task in pending_tasks: task.cancel()
+        await asyncio.gather(*pending_tasks, return_exceptions=True)
+
+    def shutdown(self, timeout: Optional[float] = 5.0) -> None:
+        """Zabija trwające procesy narzędzi i zatrzymuje pętlę (przy zamykaniu aplikacji)."""
+        with self._start_lock:
+            loop, thread = self._loop, self._thread
+            self._loop = None; self._thread = None
+        if loop is None: return
+        if thread is not None and thread.is_alive():
+            try: asyncio.run_coroutine_threadsafe(self._cancel_pending_tasks(), loop).result(timeout)
+            except Exception as e: logger.warning(f"ProcessSupervisor: Nie udało się anulować trwających procesów przy zamykaniu: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None: thread.join(timeout)
+        if thread is None or not thread.is_alive(): loop.close()
+
+    @staticmethod
+    def _kill_process_group(process: asyncio.subprocess.Process) -> None:
+        if process.returncode is not None: return
+        try:
+            if os.name == 'posix': os.killpg(process.pid, signal.SIGKILL)
+            else: process.kill()
+        except OSError:
+            try: process.kill()
+            except ProcessLookupError: pass
+
+    @staticmethod
+    async def _pump_stream(stream: Optional[asyncio.StreamReader], on_line: Optional[LineCallbackType], captured: Optional[List[str]]) -> None:
+        if stream is None: return
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        pending = ""
+        while True:
+            chunk = await stream.read(STREAM_READ_CHUNK_BYTES)
+            text = decoder.decode(chunk, final=not chunk)
+            if captured is not None and text: captured.append(text)
+            if on_line is not None:
+                parts = _LINE_SPLIT_RE.split(pending + text)
+                pending = parts.pop() if chunk else ""
+                for line in parts:
+                    if not line: continue
+                    try: on_line(line)
+                    except Exception as e: logger.error(f"ProcessSupervisor: Błąd w obsłudze linii wyjścia procesu: {e}", exc_info=True)
+                if not chunk and pending:
+                    try: on_line(pending)
+                    except Exception as e: logger.error(f"ProcessSupervisor: Błąd w obsłudze linii wyjścia procesu: {e}", exc_info=True)
+            if not chunk: return
+
+    async def _run_process(self,
+                           args: List[str],
+                           kind: str,
+                           timeout_seconds: Optional[float],
+                           on_stdout_line: Optional[LineCallbackType],
+                           on_stderr_line: Optional[LineCallbackType],
+                           cancel_event: Optional[threading.Event],
+                           capture_stdout: bool,
+                           capture_stderr: bool
+                           ) -> ProcessResult:
+        tool_name = Path(args[0]).name
+        limiter = self._get_limiter(kind)
+        await limiter.acquire()
+        try:
+            if cancel_event is not None and cancel_event.is_set():
+                return ProcessResult(args, None, cancelled=True)
+            start_time = time.monotonic()
+            # Własna grupa procesów (POSIX), aby zabić również procesy potomne narzędzia
+            process = await asyncio.create_subprocess_exec(*args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=(os.name == 'posix'))
+            logger.debug(f"ProcessSupervisor: Uruchomiono '{tool_name}' (PID: {process.pid}, rodzaj: {kind}, aktywne: {limiter.active}).")
+            usage_summary: Optional[ProcessUsageSummary] = None; sampler_task: Optional[asyncio.Future] = None
+            sample_interval = self._get_sample_interval()
+            if sample_interval > 0 and ChildProcessSampler.is_available():
+                usage_summary = ProcessUsageSummary()
+                sampler_task = asyncio.ensure_future(self._sample_usage(ChildProcessSampler(process.pid, tool_name, kind), usage_summary, sample_interval))
+            stdout_parts: Optional[List[str]] = [] if capture_stdout else None
+            stderr_parts: Optional[List[str]] = [] if capture_stderr else None
+            readers = [asyncio.ensure_future(self._pump_stream(process.stdout, on_stdout_line, stdout_parts)),
+                       asyncio.ensure_future(self._pump_stream(process.stderr, on_stderr_line, stderr_parts))]
+            wait_task = asyncio.ensure_future(process.wait())
+            deadline = start_time + timeout_seconds if timeout_seconds else None
+            timed_out = cancelled = False
+            try:
+                while not wait_task.done():
+                    poll_interval = CANCEL_POLL_INTERVAL_SECONDS if cancel_event is not None else None
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            timed_out = True; break
+                        poll_interval = min(poll_interval, remaining) if poll_interval is not None else remaining
+                    await asyncio.wait({wait_task}, timeout=poll_interval)
+                    if not wait_task.done() and cancel_event is not None and cancel_event.is_set():
+                        cancelled = True; break
+                if timed_out or cancelled:
+                    self._kill_process_group(process)
+                    if timed_out: logger.warning(f"ProcessSupervisor: '{tool_name}' (PID: {process.pid}) przekroczył limit czasu ({timeout_seconds}s) i został zabity.")
+                    else: logger.info(f"ProcessSupervisor: Proces '{tool_name}' (PID: {process.pid}) anulowany.")
+                await wait_task
+                # Wnuki narzędzia mogą trzymać otwarte potoki - nie czekamy na nie bez końca
+                _, still_reading = await asyncio.wait(readers, timeout=STREAM_DRAIN_TIMEOUT_SECONDS)
+                for reader in still_reading: reader.cancel()
+            except asyncio.CancelledError:
+                self._kill_process_group(process)
+                for reader in readers: reader.cancel()
+                logger.info(f"ProcessSupervisor: Zadanie procesu '{tool_name}' (PID: {process.pid}) anulowane - proces zabity.")
+                raise
+            finally:
+                if sampler_task is not None: sampler_task.cancel()
+            return ProcessResult(args, None if cancelled else process.returncode,
+                                 "".join(stdout_parts) if stdout_parts is not None else "",
+                                 "".join(stderr_parts) if stderr_parts is not None else "",
+                                 timed_out=timed_out, cancelled=cancelled, duration_seconds=time.monotonic() - start_time,
+                                 usage=usage_summary if usage_summary is not None and usage_summary.sample_count else None)
+        finally:
+            await limiter.release()
+
+
+_supervisor: Optional[ProcessSupervisor] = None
+_supervisor_lock = threading.Lock()
+
+
+def get_process_supervisor(config_manager: ConfigManager) -> ProcessSupervisor:
+    """Wspólny nadzorca procesów aplikacji (jedna pętla zdarzeń dla ffprobe, kodowań i napraw)."""
+    global _supervisor
+    with _supervisor_lock:
+        if _supervisor is None: _supervisor = ProcessSupervisor(config_manager)
+        return _supervisor
+
+
+def peek_process_supervisor() -> Optional[ProcessSupervisor]:
+    """Wspólny nadzorca, jeśli już powstał (np. do odczytu metryk) - bez jego tworzenia."""
+    return _supervisor
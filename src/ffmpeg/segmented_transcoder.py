@@ -0,0 +1,203 @@
+# src/ffmpeg/segmented_transcoder.py
+import subprocess
+import logging
+import math
+import shutil
+import time
+from pathlib import Path
+from typing import List, Optional, Callable, Tuple
+
+from ..config_manager import ConfigManager
+from ..models import EncodingProfile, MediaInfo, ProcessedFile
+from .transcoder import Transcoder
+from .process_supervisor import get_process_supervisor
+from .output_capture import parse_benchmark_report
+from ..filesystem.performance_log import FilePerformanceRecord
+
+logger = logging.getLogger(__name__)
+
+CheckpointCallbackType = Callable[[], None]
+
+SEGMENTS_DIR_SUFFIX = ".segments"
+CONCAT_LIST_FILENAME = "concat_list.txt"
+
+
+class SegmentedTranscoder:
+    """
+    Transkoduje długie pliki w segmentach o stałej długości (-ss/-t), zapisując
+    ukończone segmenty w ProcessedFile. Po przerwaniu zadania wznowienie koduje
+    tylko brakujące segmenty, a następnie łączy wszystkie demuxerem concat.
+    """
+    def __init__(self, config_manager: ConfigManager, transcoder: Transcoder):
+        self.config_manager = config_manager
+        self.transcoder = transcoder
+        logger.debug("SegmentedTranscoder zainicjalizowany.")
+
+    def is_enabled_for(self, media_info: Optional[MediaInfo]) -> bool:
+        ffmpeg_cfg = self.config_manager.snapshot.ffmpeg
+        if not ffmpeg_cfg.segmented_encoding_enabled: return False
+        if not media_info or not media_info.duration or media_info.duration <= 0: return False
+        segment_duration = self.get_segment_duration()
+        min_duration = ffmpeg_cfg.segment_min_file_duration_seconds
+        return segment_duration > 0 and media_info.duration >= max(min_duration, segment_duration * 2)
+
+    def get_segment_duration(self) -> float:
+        return float(self.config_manager.snapshot.ffmpeg.segment_duration_seconds)
+
+    @staticmethod
+    def get_segments_dir(output_file_path: Path) -> Path:
+        return output_file_path.parent / f".{output_file_path.stem}{SEGMENTS_DIR_SUFFIX}"
+
+    @staticmethod
+    def _file_size(file_path: Path) -> int:
+        try: return file_path.stat().st_size
+        except OSError: return 0
+
+    @staticmethod
+    def _segment_path(segments_dir: Path, index: int, extension: str) -> Path:
+        return segments_dir / f"seg_{index:05d}{extension}"
+
+    def _segment_timeout(self, segment_duration: float) -> Optional[float]:
+        ffmpeg_cfg = self.config_manager.snapshot.ffmpeg
+        if ffmpeg_cfg.enable_dynamic_timeout:
+            return (segment_duration * ffmpeg_cfg.dynamic_timeout_multiplier) + ffmpeg_cfg.dynamic_timeout_buffer_seconds
+        fixed_timeout_s = ffmpeg_cfg.fixed_timeout_seconds
+        return float(fixed_timeout_s) if fixed_timeout_s > 0 else None
+
+    def _prepare_checkpoint(self, processed_file: ProcessedFile, segments_dir: Path, segment_duration: float, extension: str) -> None:
+        """Odrzuca checkpoint, jeśli zmieniła się długość segmentu lub brakuje plików segmentów."""
+        if processed_file.segment_duration_seconds != segment_duration:
+            if processed_file.completed_segments:
+                logger.warning(f"Zmieniono długość segmentu ({processed_file.segment_duration_seconds}s -> {segment_duration}s) dla '{processed_file.original_path.name}'. Checkpoint zostanie odrzucony.")
+            processed_file.completed_segments = []
+            processed_file.segment_duration_seconds = segment_duration
+            if segments_dir.exists(): shutil.rmtree(segments_dir, ignore_errors=True)
+            return
+        valid_segments = []
+        for index in processed_file.completed_segments:
+            seg_path = self._segment_path(segments_dir, index, extension)
+            if seg_path.is_file() and seg_path.stat().st_size > 0: valid_segments.append(index)
+            else: logger.warning(f"Brak pliku ukończonego segmentu {index} ('{seg_path}'). Segment zostanie zakodowany ponownie.")
+        processed_file.completed_segments = sorted(set(valid_segments))
+
+    def _encode_segment(self, input_file_path: Path, seg_path: Path, profile: EncodingProfile, start_s: float, duration_s: float, performance: Optional[FilePerformanceRecord] = None) -> Tuple[bool, Optional[str]]:
+        tmp_path = seg_path.with_name(f"{seg_path.stem}.part{seg_path.suffix}")
+        command = [self.transcoder.ffmpeg_path, '-y', '-nostdin', '-benchmark', '-ss', f"{start_s:.3f}", '-t', f"{duration_s:.3f}", '-i', str(input_file_path)]
+        command.extend(profile.ffmpeg_params)
+        command.extend(['-avoid_negative_ts', 'make_zero', str(tmp_path)])
+        logger.debug(f"Polecenie FFmpeg (segment): {' '.join(command)}")
+        timeout_s = self._segment_timeout(duration_s)
+        try:
+            result = get_process_supervisor(self.config_manager).run(command, kind='transcode', timeout_seconds=timeout_s)
+            if result.timed_out: raise subprocess.TimeoutExpired(command, timeout_s)
+        except subprocess.TimeoutExpired:
+            tmp_path.unlink(missing_ok=True)
+            return False, f"Przekroczono limit czasu ({timeout_s}s) kodowania segmentu '{seg_path.name}'."
+        if performance is not None:
+            performance.add_process_usage(*parse_benchmark_report(result.stderr or ""))
+            performance.add_sampled_usage(result.usage)
+        if result.returncode != 0 or not tmp_path.exists() or tmp_path.stat().st_size == 0:
+            stderr_tail = "\n".join(result.stderr.strip().splitlines()[-20:]) if result.stderr else 'Brak'
+            logger.error(f"FFmpeg zakończył z kodem {result.returncode} dla segmentu '{seg_path.name}'. Stderr (koniec):\n{stderr_tail}")
+            tmp_path.unlink(missing_ok=True)
+            return False, f"Błąd FFmpeg (kod: {result.returncode}) dla segmentu '{seg_path.name}'. Szczegóły w pliku app.log."
+        tmp_path.replace(seg_path)
+        return True, None
+
+    def _concat_segments(self, segments_dir: Path, segment_count: int, extension: str, output_file_path: Path, total_duration: float, performance: Optional[FilePerformanceRecord] = None) -> Tuple[bool, Optional[str]]:
+        list_path = segments_dir / CONCAT_LIST_FILENAME
+        with open(list_path, 'w', encoding='utf-8') as f:
+            for index in range(segment_count):
+                seg_name = self._segment_path(segments_dir, index, extension).name.replace("'", "'\\''")
+                f.write(f"file '{seg_name}'\n")
+        command = [self.transcoder.ffmpeg_path, '-y', '-nostdin', '-benchmark', '-f', 'concat', '-safe', '0', '-i', str(list_path), '-map', '0', '-c', 'copy', str(output_file_path)]
+        logger.info(f"Łączenie {segment_count} segmentów do '{output_file_path.name}'.")
+        logger.debug(f"Polecenie FFmpeg (concat): {' '.join(command)}")
+        try:
+            # Kopiowanie strumieni całego pliku - limit liczony od pełnej długości, nie od jednego segmentu
+            timeout_s = self._segment_timeout(total_duration)
+            result = get_process_supervisor(self.config_manager).run(command, kind='transcode', timeout_seconds=timeout_s)
+            if result.timed_out: raise subprocess.TimeoutExpired(command, timeout_s)
+        except subprocess.TimeoutExpired:
+            output_file_path.unlink(missing_ok=True)
+            return False, f"Przekroczono limit czasu łączenia segmentów dla '{output_file_path.name}'."
+        if performance is not None:
+            performance.add_process_usage(*parse_benchmark_report(result.stderr or ""))
+            performance.add_sampled_usage(result.usage)
+        if result.returncode != 0:
+            logger.error(f"FFmpeg (concat) zakończył z kodem {result.returncode} dla '{output_file_path.name}'. Stderr:\n{result.stderr.strip() if result.stderr else 'Brak'}")
+            output_file_path.unlink(missing_ok=True)
+            return False, f"Błąd łączenia segmentów (kod: {result.returncode}). Szczegóły w pliku app.log."
+        return True, None
+
+    def transcode_file(self,
+                       input_file_path: Path,
+                       output_file_path: Path,
+                       profile: EncodingProfile,
+                       media_info: MediaInfo,
+                       processed_file: ProcessedFile,
+                       checkpoint_callback: Optional[CheckpointCallbackType] = None,
+                       file_index: Optional[int] = None,
+                       total_files_in_job: Optional[int] = None,
+                       performance: Optional[FilePerformanceRecord] = None
+                       ) -> Tuple[bool, Optional[str]]:
+        file_label = f"'{input_file_path.name}'"
+        if not self.transcoder._verify_ffmpeg_executable(): error_msg = f"FFmpeg ('{self.transcoder.ffmpeg_path}') niedostępny."; logger.error(error_msg); return False, error_msg
+        if not input_file_path.is_file(): error_msg = f"Plik wejściowy {file_label} ('{input_file_path}') nie istnieje."; logger.error(error_msg); return False, error_msg
+
+        total_duration = float(media_info.duration or 0)
+        segment_duration = self.get_segment_duration()
+        segment_count = max(1, math.ceil(total_duration / segment_duration))
+        extension = output_file_path.suffix or f".{profile.output_extension}"
+        segments_dir = self.get_segments_dir(output_file_path)
+        self._prepare_checkpoint(processed_file, segments_dir, segment_duration, extension)
+        try: segments_dir.mkdir(parents=True, exist_ok=True)
+        except OSError as e: error_msg = f"Nie można utworzyć katalogu segmentów '{segments_dir}': {e}"; logger.error(error_msg, exc_info=True); return False, error_msg
+        done = set(processed_file.completed_segments)
+        if done: logger.info(f"Wznawianie {file_label} od checkpointu: {len(done)}/{segment_count} segmentów już ukończonych.")
+        else: logger.info(f"Transkodowanie segmentowe {file_label}: {segment_count} segmentów po {segment_duration:.0f}s.")
+        if checkpoint_callback: checkpoint_callback()
+
+        start_wall_time = time.time()
+        encoded_media_s = 0.0
+        # Rozmiar ukończonych segmentów (także z checkpointu) - pokazywany jako bieżący rozmiar wyniku
+        segments_size_bytes = sum(self._file_size(self._segment_path(segments_dir, i, extension)) for i in done)
+        try:
+            for index in range(segment_count):
+                if index in done: continue
+                start_s = index * segment_duration
+                duration_s = min(segment_duration, total_duration - start_s)
+                if duration_s <= 0: break
+                segment_path = self._segment_path(segments_dir, index, extension)
+                success, error_msg = self._encode_segment(input_file_path, segment_path, profile, start_s, duration_s, performance)
+                if not success:
+                    return False, error_msg
+                segments_size_bytes += self._file_size(segment_path)
+                done.add(index)
+                processed_file.completed_segments = sorted(done)
+                if checkpoint_callback: checkpoint_callback()
+                encoded_media_s += duration_s
+                if self.transcoder.display_progress_callback:
+                    elapsed = time.time() - start_wall_time
+                    percentage = min(100.0, len(done) / segment_count * 100.0)
+                    remaining_s = sum(min(segment_duration, total_duration - i * segment_duration) for i in range(segment_count) if i not in done)
+                    eta_s = (remaining_s / (encoded_media_s / elapsed)) if elapsed > 0 and encoded_media_s > 0 else None
+                    speed_str = f"{encoded_media_s / elapsed:.2f}x" if elapsed > 0 else None
+                    progress_label = f"{input_file_path.name} [seg. {len(done)}/{segment_count}]"
+                    self.transcoder.display_progress_callback(percentage, elapsed, progress_label, file_index, total_files_in_job, None, speed_str, None, eta_s, f"{segments_size_bytes // 1024}kB", str(output_file_path))
+
+            success, error_msg = self._concat_segments(segments_dir, segment_count, extension, output_file_path, total_duration, performance)
+            if not success: return False, error_msg
+            if performance is not None and encoded_media_s > 0:
+                # Średnia tylko z segmentów kodowanych w tym przebiegu (wznowienie pomija ukończone)
+                performance.average_speed = encoded_media_s / (time.time() - start_wall_time)
+            shutil.rmtree(segments_dir, ignore_errors=True)
+            processed_file.completed_segments = []
+            processed_file.segment_duration_seconds = None
+            logger.info(f"Transkodowanie segmentowe {file_label} zakończone pomyślnie.")
+            return True, None
+        finally:
+            if self.transcoder.display_progress_callback:
+                callback_object = getattr(self.transcoder.display_progress_callback, '__self__', None)
+                if callback_object and hasattr(callback_object, 'stop_progress_rendering'):
+                    callback_object.stop_progress_rendering()
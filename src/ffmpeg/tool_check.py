@@ -0,0 +1,65 @@
+# src/ffmpeg/tool_check.py
+import logging
+import subprocess
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOOL_CHECK_TIMEOUT_SECONDS = 5
+
+# (ścieżka narzędzia, argument wersji) -> Future[bool]. Udane sprawdzenie jest pamiętane do końca
+# działania aplikacji; nieudane jest zapominane po zakończeniu, więc kolejne wywołanie spróbuje ponownie.
+_checks: Dict[Tuple[str, str], "Future[bool]"] = {}
+_checks_lock = threading.Lock()
+
+
+def _run_version_check(tool_path: str, version_arg: str, tool_name: str) -> bool:
+    try:
+        process = subprocess.Popen([tool_path, version_arg], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8')
+        stdout, stderr = process.communicate(timeout=TOOL_CHECK_TIMEOUT_SECONDS)
+        if process.returncode == 0: logger.debug(f"{tool_name} zweryfikowany pomyślnie: {tool_path}"); return True
+        logger.error(f"{tool_name} nie powiódł się przy weryfikacji (kod: {process.returncode}). Ścieżka: {tool_path}. Stderr: {stderr.strip()}"); return False
+    except FileNotFoundError: logger.error(f"Plik wykonywalny {tool_name} nie znaleziony: {tool_path}. Sprawdź konfigurację i PATH."); return False
+    except subprocess.TimeoutExpired:
+        process.kill(); process.communicate()
+        logger.error(f"Timeout podczas weryfikacji {tool_name}: {tool_path}"); return False
+    except Exception as e: logger.error(f"Nieoczekiwany błąd weryfikacji {tool_name} ({tool_path}): {e}", exc_info=True); return False
+
+
+def verify_tool_executable(tool_path: str, version_arg: str = '-version', tool_name: str = 'FFmpeg') -> bool:
+    """
+    Sprawdza, czy narzędzie uruchamia się z argumentem wersji. Dla danej ścieżki proces startuje najwyżej
+    raz naraz: równoległe wywołania czekają na trwające sprawdzenie, a po sukcesie wynik jest brany z pamięci.
+    """
+    key = (str(tool_path), version_arg)
+    with _checks_lock:
+        future = _checks.get(key)
+        is_owner = future is None
+        if is_owner: future = Future(); _checks[key] = future
+    if not is_owner: return future.result()
+    result = _run_version_check(str(tool_path), version_arg, tool_name)
+    if not result:
+        with _checks_lock:
+            if _checks.get(key) is future: del _checks[key]
+    future.set_result(result)
+    return result
+
+
+def verify_tools_in_background(tools: List[Tuple[str, str, str]]) -> Dict[str, "Future[bool]"]:
+    """
+    Uruchamia sprawdzenia (ścieżka, argument wersji, nazwa) równolegle, każde w osobnym wątku tła,
+    i od razu zwraca słownik nazwa -> Future z wynikiem. Pierwsze użycie narzędzia poczeka
+    najwyżej na jego własne sprawdzenie, a nie na wszystkie po kolei.
+    """
+    results: Dict[str, "Future[bool]"] = {}
+    for tool_path, version_arg, tool_name in tools:
+        result_future: "Future[bool]" = Future()
+        results[tool_name] = result_future
+
+        def run_check(path: str = tool_path, arg: str = version_arg, name: str = tool_name, target: "Future[bool]" = result_future) -> None:
+            target.set_result(verify_tool_executable(path, arg, name))
+
+        threading.Thread(target=run_check, name=f"tool_check_{tool_name.lower()}", daemon=True).start()
+    return results
@@ -0,0 +1,178 @@
+# src/filesystem/damage_triage.py
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import List, Optional, Callable, Tuple, Dict
+
+from ..models import MediaInfo
+from ..config_manager import ConfigManager
+from ..ffmpeg.ffmpeg_manager import FFmpegManager
+from .damaged_files_manager import DamagedFilesManager
+
+logger = logging.getLogger(__name__)
+
+TriageProgressCallback = Callable[[int, int, str], None]
+
+TIER_HEADER = 1
+TIER_PROBE = 2
+TIER_PACKETS = 3
+TIER_DECODE = 4
+TRIAGE_TIER_NAMES: Dict[int, str] = {TIER_HEADER: "Nagłówek", TIER_PROBE: "FFprobe", TIER_PACKETS: "Pakiety", TIER_DECODE: "Dekodowanie"}
+
+VERDICT_OK = "ok"
+VERDICT_SUSPECT = "suspect"
+VERDICT_DAMAGED = "damaged"
+
+HEADER_READ_BYTES = 512
+# Uszkodzone pliki z triażu są zapisywane do rejestru paczkami (jeden odczyt i zapis JSON na paczkę)
+DAMAGED_REGISTRY_FLUSH_EVERY = 50
+
+# Każde rozszerzenie ma listę alternatywnych sygnatur; sygnatura to lista wymaganych (offset, bajty).
+_EBML = [[(0, b'\x1a\x45\xdf\xa3')]]
+_ISO_BMFF = [[(4, box)] for box in (b'ftyp', b'moov', b'mdat', b'free', b'wide', b'skip', b'pnot')]
+_MPEG_PS = [[(0, b'\x00\x00\x01\xba')], [(0, b'\x00\x00\x01\xb3')]]
+CONTAINER_SIGNATURES: Dict[str, List[List[Tuple[int, bytes]]]] = {
+    '.mkv': _EBML, '.webm': _EBML,
+    '.mp4': _ISO_BMFF, '.m4v': _ISO_BMFF, '.mov': _ISO_BMFF,
+    '.avi': [[(0, b'RIFF'), (8, b'AVI ')]],
+    '.flv': [[(0, b'FLV')]],
+    '.wmv': [[(0, b'\x30\x26\xb2\x75\x8e\x66\xcf\x11')]],
+    '.mpg': _MPEG_PS, '.mpeg': _MPEG_PS, '.vob': _MPEG_PS,
+    '.ts': [[(0, b'\x47'), (188, b'\x47')]],
+    '.mts': [[(4, b'\x47'), (196, b'\x47')]], '.m2ts': [[(4, b'\x47'), (196, b'\x47')]],
+}
+
+
+class TriageResult:
+    """Wynik triażu pojedynczego pliku: werdykt, ostatni wykonany poziom i szczegóły."""
+    def __init__(self, file_path: Path, verdict: str, tier: int, details: str, media_info: Optional[MediaInfo] = None):
+        self.file_path = file_path
+        self.verdict = verdict
+        self.tier = tier
+        self.details = details
+        self.media_info = media_info
+
+    @property
+    def is_damaged(self) -> bool:
+        return self.verdict != VERDICT_OK
+
+    def describe(self) -> str:
+        return f"[T{self.tier} {TRIAGE_TIER_NAMES.get(self.tier, '?')}] {self.details}"
+
+
+class DamageTriage:
+    """
+    Stopniowy triaż plików pod kątem uszkodzeń. Tańsze poziomy idą pierwsze:
+    (1) stat + sygnatura kontenera, (2) FFprobe, (3) przejście pakietów (-count_packets),
+    (4) próbkowane dekodowanie. Plik przechodzi na droższy poziom tylko gdy wybrana
+    głębokość tego wymaga lub wynik tańszego poziomu jest niejednoznaczny.
+    """
+    def __init__(self, config_manager: ConfigManager, ffmpeg_manager: FFmpegManager, damaged_files_manager: DamagedFilesManager):
+        self.config_manager = config_manager
+        self.ffmpeg_manager = ffmpeg_manager
+        self.damaged_files_manager = damaged_files_manager
+        logger.debug("DamageTriage zainicjalizowany.")
+
+    @staticmethod
+    def check_header(file_path: Path) -> Tuple[str, str]:
+        try:
+            size = file_path.stat().st_size
+            if size == 0: return VERDICT_DAMAGED, "Plik jest pusty (0 B)."
+            with open(file_path, 'rb') as f: header = f.read(HEADER_READ_BYTES)
+        except OSError as e:
+            return VERDICT_DAMAGED, f"Nie można odczytać pliku: {e}"
+        signatures = CONTAINER_SIGNATURES.get(file_path.suffix.lower())
+        if not signatures: return VERDICT_OK, "Nieznany typ kontenera - brak sygnatury do sprawdzenia."
+        for signature in signatures:
+            if all(header[offset:offset + len(magic)] == magic for offset, magic in signature):
+                return VERDICT_OK, "Sygnatura kontenera poprawna."
+        return VERDICT_SUSPECT, f"Nagłówek nie pasuje do kontenera '{file_path.suffix.lower()}'."
+
+    def _check_probe(self, file_path: Path) -> Tuple[str, str, MediaInfo]:
+        media_info = self.ffmpeg_manager.get_media_info(file_path)
+        if media_info.error_message: return VERDICT_DAMAGED, media_info.error_message, media_info
+        if media_info.duration is None or media_info.duration <= 0: return VERDICT_DAMAGED, "Plik ma nieprawidłowy lub zerowy czas trwania.", media_info
+        if not media_info.video_codec and not media_info.audio_codec: return VERDICT_SUSPECT, "FFprobe nie znalazł strumieni audio/wideo.", media_info
+        return VERDICT_OK, "FFprobe odczytał kontener.", media_info
+
+    def _check_packets(self, file_path: Path) -> Tuple[str, str]:
+        timeout_s = self.config_manager.get_config_value('processing', 'triage.packet_walk_timeout_seconds', 120)
+        packets = self.ffmpeg_manager.count_packets(file_path, float(timeout_s) if timeout_s > 0 else None)
+        streams = packets['streams']; errors = packets['errors']
+        if packets['return_code'] is None: return VERDICT_SUSPECT, f"Przejście pakietów nie zakończyło się: {errors[0] if errors else 'brak danych'}."
+        if not streams: return VERDICT_DAMAGED, "Brak strumieni przy przejściu pakietów."
+        empty_streams = [s for s in streams if s['codec_type'] in ('video', 'audio') and s['nb_read_packets'] == 0]
+        if empty_streams: return VERDICT_DAMAGED, f"Strumienie bez pakietów: {', '.join(str(s['index']) for s in empty_streams)}."
+        if errors: return VERDICT_SUSPECT, f"Błędy demuksowania ({len(errors)}): {errors[0][:120]}"
+        return VERDICT_OK, f"Pakiety odczytane ({sum(s['nb_read_packets'] for s in streams)})."
+
+    def _check_decode(self, file_path: Path, media_info: Optional[MediaInfo]) -> Tuple[str, str]:
+        report = self.ffmpeg_manager.check_file_integrity(file_path, media_info)
+        return (VERDICT_OK if report.is_ok else VERDICT_DAMAGED), report.summary()
+
+    def triage_file(self, file_path: Path, depth: int) -> TriageResult:
+        depth = max(TIER_HEADER, min(TIER_DECODE, depth))
+        max_tier = depth; tier = TIER_HEADER
+        media_info: Optional[MediaInfo] = None
+        verdict, details = VERDICT_OK, ""
+        while tier <= max_tier:
+            if tier == TIER_HEADER: verdict, details = self.check_header(file_path)
+            elif tier == TIER_PROBE: verdict, details, media_info = self._check_probe(file_path)
+            elif tier == TIER_PACKETS: verdict, details = self._check_packets(file_path)
+            else: verdict, details = self._check_decode(file_path, media_info)
+            logger.debug(f"Triaż '{file_path.name}' T{tier}: {verdict} - {details}")
+            if verdict == VERDICT_DAMAGED: break
+            if verdict == VERDICT_SUSPECT:
+                # Wynik niejednoznaczny - eskalacja do kolejnego (droższego) poziomu
+                max_tier = max(max_tier, min(tier + 1, TIER_DECODE))
+                if tier == TIER_DECODE: break
+            tier += 1
+        return TriageResult(file_path, verdict, min(tier, max_tier), details, media_info)
+
+    def triage_files(self,
+                     files: List[Path],
+                     depth: Optional[int] = None,
+                     progress_callback: Optional[TriageProgressCallback] = None,
+                     register_damaged: bool = True
+                     ) -> List[TriageResult]:
+        """Triaż wielu plików równolegle. Uszkodzone pliki trafiają do rejestru paczkami w trakcie i na końcu triażu."""
+        if depth is None: depth = self.config_manager.get_config_value('processing', 'triage.default_depth', TIER_PROBE)
+        max_workers = max(1, self.config_manager.get_config_value('processing', 'triage.max_workers', 4))
+        total = len(files)
+        logger.info(f"Rozpoczynanie triażu {total} plików (głębokość: {depth}, wątki: {max_workers}).")
+        if progress_callback and total == 0: progress_callback(0, 0, "Brak plików do analizy")
+        results: List[TriageResult] = []
+        pending_damaged: List[Tuple[Path, str, Optional[MediaInfo]]] = []
+        # Pliki są zlecane na bieżąco (najwyżej max_workers naraz) - po przerwaniu (Ctrl+C)
+        # wyjście z puli czeka tylko na trwające analizy, a nie na całą kolejkę
+        files_to_submit = iter(files)
+        futures: Dict[Future, Path] = {}
+        done_count = 0
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="triage") as executor:
+                while True:
+                    while len(futures) < max_workers:
+                        file_path = next(files_to_submit, None)
+                        if file_path is None: break
+                        futures[executor.submit(self.triage_file, file_path, depth)] = file_path
+                    if not futures: break
+                    finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        file_path = futures.pop(future); done_count += 1
+                        try: result = future.result()
+                        except Exception as e:
+                            logger.error(f"Nieoczekiwany błąd triażu pliku '{file_path.name}': {e}", exc_info=True)
+                            result = TriageResult(file_path, VERDICT_SUSPECT, TIER_HEADER, f"Błąd triażu: {e}")
+                        results.append(result)
+                        if result.is_damaged and register_damaged:
+                            pending_damaged.append((file_path, result.describe(), result.media_info))
+                            if len(pending_damaged) >= DAMAGED_REGISTRY_FLUSH_EVERY:
+                                # Zapis z wątku głównego - rejestr JSON nie jest bezpieczny dla wielu wątków
+                                self.damaged_files_manager.add_damaged_files_batch(pending_damaged); pending_damaged = []
+                        if progress_callback: progress_callback(done_count, total, file_path.name)
+        finally:
+            # Również po przerwaniu - wykryte dotąd uszkodzenia nie przepadają
+            if pending_damaged: self.damaged_files_manager.add_damaged_files_batch(pending_damaged)
+        damaged_count = sum(1 for r in results if r.is_damaged)
+        logger.info(f"Triaż zakończony. Uszkodzone/podejrzane: {damaged_count}/{total}.")
+        return results
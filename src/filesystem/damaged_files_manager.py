@@ -1,16 +1,21 @@
 # src/filesystem/damaged_files_manager.py
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Callable
 from datetime import datetime
 
-from ..models import AppJSONEncoder, AppJSONDecoder, MediaInfo
+from ..models import AppJSONEncoder, MediaInfo
+from ..state_codec import read_json_file, decode_damaged_entries
 from ..config_manager import ConfigManager
 from ..ffmpeg.ffmpeg_manager import FFmpegManager
+from .repair_history_manager import normalize_error_signature
 
 logger = logging.getLogger(__name__)
 
+VerifyProgressCallback = Callable[[int, int, str], None]
+
 class DamagedFilesManager:
     """
     Zarządza listą plików zidentyfikowanych jako potencjalnie uszkodzone.
@@ -34,8 +39,7 @@ class DamagedFilesManager:
             logger.info("Nie znaleziono pliku listy uszkodzonych plików. Zwracanie pustej listy.")
             return []
         try:
-            with open(self.damaged_files_list_file, 'r', encoding='utf-8') as f:
-                damaged_list = json.load(f, cls=AppJSONDecoder)
+            damaged_list = decode_damaged_entries(read_json_file(self.damaged_files_list_file))
             if not isinstance(damaged_list, list):
                 logger.error(f"Zawartość pliku uszkodzonych plików nie jest listą ({type(damaged_list)}). Zwracanie pustej listy.")
                 self._backup_corrupted_file("not_a_list")
@@ -83,33 +87,39 @@ class DamagedFilesManager:
         except Exception as backup_e:
             logger.error(f"Nie udało się utworzyć kopii zapasowej uszkodzonego pliku listy uszkodzonych plików {self.damaged_files_list_file}: {backup_e}", exc_info=True)
 
-    def add_damaged_file(self, file_path: Path, error_details: str, media_info: Optional[MediaInfo] = None):
+    def add_damaged_file(self, file_path: Path, error_details: str, media_info: Optional[MediaInfo] = None, status: str = 'Reported'):
         logger.info(f"Próba dodania pliku '{file_path.name}' do listy uszkodzonych. Powód: {error_details[:100]}...")
+        self.add_damaged_files_batch([(file_path, error_details, media_info)], status)
+
+    def add_damaged_files_batch(self, additions: List[Tuple[Path, str, Optional[MediaInfo]]], status: str = 'Reported') -> int:
+        """
+        Dodaje (lub aktualizuje istniejące) wpisy wielu plików przy jednym odczycie i jednym zapisie rejestru.
+        Zwraca liczbę nowych wpisów.
+        """
+        if not additions: return 0
         damaged_files = self._load_damaged_files_list()
-        resolved_file_path = file_path.resolve()
+        entries_by_path: Dict[Path, Dict[str, Any]] = {}
         for entry in damaged_files:
             entry_path = entry.get('file_path')
-            if isinstance(entry_path, Path) and entry_path.resolve() == resolved_file_path:
+            if isinstance(entry_path, Path): entries_by_path.setdefault(entry_path.resolve(), entry)
+        added_count = 0
+        for file_path, error_details, media_info in additions:
+            resolved_file_path = file_path.resolve()
+            entry = entries_by_path.get(resolved_file_path)
+            if entry is not None:
                 logger.info(f"Plik '{file_path.name}' jest już na liście uszkodzonych. Aktualizacja informacji.")
-                entry['timestamp'] = datetime.now()
-                entry['error_details'] = error_details
-                if media_info:
-                    entry['media_info'] = media_info.to_dict()
-                self._save_damaged_files_list(damaged_files)
-                return
-
-        new_entry: Dict[str, Any] = {
-            'file_path': file_path,
-            'timestamp': datetime.now(),
-            'error_details': error_details,
-            'status': 'Reported'
-        }
-        if media_info:
-            new_entry['media_info'] = media_info.to_dict()
-
-        damaged_files.append(new_entry)
+            else:
+                entry = {'file_path': file_path}
+                damaged_files.append(entry); entries_by_path[resolved_file_path] = entry; added_count += 1
+                logger.info(f"Dodano plik '{file_path.name}' do listy uszkodzonych.")
+            entry['timestamp'] = datetime.now()
+            entry['error_details'] = error_details
+            entry['error_signature'] = normalize_error_signature(error_details)
+            entry['status'] = status
+            if media_info:
+                entry['media_info'] = media_info.to_dict()
         self._save_damaged_files_list(damaged_files)
-        logger.info(f"Dodano plik '{file_path.name}' do listy uszkodzonych.")
+        return added_count
 
     def remove_damaged_file(self, file_path: Path) -> bool:
         logger.info(f"Próba usunięcia pliku '{file_path.name}' z listy uszkodzonych.")
@@ -152,26 +162,97 @@ class DamagedFilesManager:
             logger.warning(f"Nie znaleziono pliku '{file_path.name}' na liście uszkodzonych do aktualizacji statusu.")
         return updated
 
-    def verify_files_on_list(self) -> List[Dict[str, Any]]:
+    def commit_batch_updates(self, status_updates: List[Tuple[Path, str, Optional[str]]], removals: List[Path]) -> int:
+        """Stosuje wiele zmian statusu i usunięć przy jednym odczycie i jednym zapisie rejestru. Zwraca liczbę zmienionych wpisów."""
+        if not status_updates and not removals: return 0
+        damaged_files = self._load_damaged_files_list()
+        updates_by_path = {file_path.resolve(): (new_status, new_error_details) for file_path, new_status, new_error_details in status_updates}
+        removal_paths = {file_path.resolve() for file_path in removals}
+        kept_entries: List[Dict[str, Any]] = []
+        changed_count = 0
+        for entry in damaged_files:
+            entry_path = entry.get('file_path')
+            resolved_entry_path = entry_path.resolve() if isinstance(entry_path, Path) else None
+            if resolved_entry_path in removal_paths:
+                changed_count += 1
+                continue
+            if resolved_entry_path in updates_by_path:
+                new_status, new_error_details = updates_by_path[resolved_entry_path]
+                entry['status'] = new_status
+                entry['timestamp'] = datetime.now()
+                if new_error_details is not None:
+                    entry['error_details'] = new_error_details
+                changed_count += 1
+            kept_entries.append(entry)
+        if changed_count:
+            self._save_damaged_files_list(kept_entries)
+        logger.info(f"Zatwierdzono paczkę zmian rejestru uszkodzonych plików: {len(status_updates)} statusów, {len(removals)} usunięć (zmienione wpisy: {changed_count}).")
+        return changed_count
+
+    @staticmethod
+    def _file_fingerprint(file_path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            stat_result = file_path.stat()
+        except OSError:
+            return None
+        return {'size': stat_result.st_size, 'mtime_ns': stat_result.st_mtime_ns}
+
+    def verify_files_on_list(self, progress_callback: Optional[VerifyProgressCallback] = None, force: bool = False) -> List[Dict[str, Any]]:
+        """
+        Weryfikuje wpisy równolegle (processing.verify_max_workers). Wpisy, których odcisk
+        (rozmiar + mtime) nie zmienił się od ostatniej nieudanej weryfikacji, są pomijane,
+        chyba że force=True. Rejestr jest zapisywany raz, na końcu.
+        """
         logger.info("Rozpoczynanie weryfikacji plików z listy uszkodzonych...")
         damaged_files = self._load_damaged_files_list()
-        files_to_keep = []
-        files_removed_count = 0
+        total = len(damaged_files)
+        max_workers = max(1, self.config_manager.get_config_value('processing', 'verify_max_workers', 4))
+        files_to_keep: List[Dict[str, Any]] = []
+        entries_to_check: List[Tuple[Dict[str, Any], Path, Optional[Dict[str, Any]]]] = []
+        done_count = 0
         for entry in damaged_files:
             file_path = entry.get('file_path')
             if not isinstance(file_path, Path):
                 logger.warning(f"Pominięto wpis z nieprawidłową ścieżką podczas weryfikacji: {entry}")
-                files_to_keep.append(entry)
+                files_to_keep.append(entry); done_count += 1
+                if progress_callback: progress_callback(done_count, total, str(file_path))
                 continue
-            logger.debug(f"Weryfikacja pliku: {file_path.name}")
-            if self.ffmpeg_manager.is_file_readable_by_ffprobe(file_path):
-                logger.info(f"Plik '{file_path.name}' z listy uszkodzonych jest teraz czytelny. Usuwanie z listy.")
-                files_removed_count += 1
-            else:
-                logger.info(f"Plik '{file_path.name}' nadal nie jest czytelny. Pozostawianie na liście.")
-                files_to_keep.append(entry)
-        if files_removed_count > 0:
+            fingerprint = self._file_fingerprint(file_path)
+            if not force and fingerprint is not None and entry.get('verify_fingerprint') == fingerprint:
+                logger.debug(f"Plik '{file_path.name}' nie zmienił się od ostatniej nieudanej weryfikacji. Pomijanie.")
+                files_to_keep.append(entry); done_count += 1
+                if progress_callback: progress_callback(done_count, total, file_path.name)
+                continue
+            entries_to_check.append((entry, file_path, fingerprint))
+
+        files_removed_count = 0
+        fingerprints_changed = False
+        logger.info(f"Weryfikacja: {len(entries_to_check)}/{total} wpisów do sprawdzenia (pominięte niezmienione: {total - len(entries_to_check)}), wątki: {max_workers}.")
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="verify") as executor:
+            futures = {executor.submit(self.ffmpeg_manager.is_file_readable_by_ffprobe, file_path): (entry, file_path, fingerprint) for entry, file_path, fingerprint in entries_to_check}
+            for future in as_completed(futures):
+                entry, file_path, fingerprint = futures[future]
+                try: is_readable = future.result()
+                except Exception as e:
+                    logger.error(f"Nieoczekiwany błąd weryfikacji pliku '{file_path.name}': {e}", exc_info=True)
+                    is_readable = False; fingerprint = None
+                if is_readable:
+                    logger.info(f"Plik '{file_path.name}' z listy uszkodzonych jest teraz czytelny. Usuwanie z listy.")
+                    files_removed_count += 1
+                else:
+                    logger.info(f"Plik '{file_path.name}' nadal nie jest czytelny. Pozostawianie na liście.")
+                    if entry.get('verify_fingerprint') != fingerprint:
+                        entry['verify_fingerprint'] = fingerprint; fingerprints_changed = True
+                    files_to_keep.append(entry)
+                done_count += 1
+                if progress_callback: progress_callback(done_count, total, file_path.name)
+
+        # Zachowanie pierwotnej kolejności wpisów
+        kept_ids = {id(entry) for entry in files_to_keep}
+        files_to_keep = [entry for entry in damaged_files if id(entry) in kept_ids]
+        if files_removed_count > 0 or fingerprints_changed:
             self._save_damaged_files_list(files_to_keep)
+        if files_removed_count > 0:
             logger.info(f"Zakończono weryfikację. Usunięto {files_removed_count} plików z listy uszkodzonych.")
         else:
             logger.info("Zakończono weryfikację. Żaden plik nie został usunięty z listy uszkodzonych.")
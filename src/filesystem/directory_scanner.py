@@ -2,14 +2,18 @@
 import logging
 import os
 from pathlib import Path
-from typing import List, Optional, Callable, Tuple 
+from typing import List, Optional, Callable, Tuple, Dict
 import uuid 
 
-from ..models import ProcessedFile, MediaInfo, JobState 
+from ..models import ProcessedFile, MediaInfo, JobState, EncodingProfile
 from ..ffmpeg.ffmpeg_manager import FFmpegManager 
 from ..config_manager import ConfigManager 
 from ..filesystem.path_resolver import PathResolver # <-- DODANO
 from ..filesystem.damaged_files_manager import DamagedFilesManager # <-- DODANO
+from ..filesystem.duplicate_detector import DuplicateDetector
+from ..filesystem.transcode_ledger import TranscodeLedger
+
+DUPLICATE_STATUS = "Duplikat"
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +30,8 @@ class DirectoryScanner:
         self.ffmpeg_manager = ffmpeg_manager
         self.path_resolver = path_resolver                # <-- DODANO
         self.damaged_files_manager = damaged_files_manager  # <-- DODANO
+        self.duplicate_detector = DuplicateDetector(config_manager)
+        self.transcode_ledger = TranscodeLedger(config_manager)
         logger.debug("DirectoryScanner zainicjalizowany.")
 
     def _try_auto_repair(self, original_file_path: Path, original_media_info: MediaInfo) -> Optional[MediaInfo]:
@@ -132,19 +138,11 @@ class DirectoryScanner:
         return original_media_info
 
 
-    def scan_directory_for_media_files(
-            self,
-            source_directory: Path,
-            recursive: bool,
-            file_extensions: Optional[List[str]],
-            progress_callback: Optional[ScanProgressCallback] = None
-        ) -> List[MediaInfo]:
-        logger.info(f"Rozpoczynanie skanowania katalogu '{source_directory}'. Rekursywnie: {recursive}")
-        found_media_infos: List[MediaInfo] = []
-
+    def list_candidate_files(self, source_directory: Path, recursive: bool, file_extensions: Optional[List[str]]) -> List[Path]:
+        """Zwraca listę plików z katalogu pasujących do rozszerzeń, bez uruchamiania FFprobe."""
         if not source_directory.is_dir():
             logger.error(f"Podana ścieżka źródłowa nie jest katalogiem: {source_directory}")
-            return found_media_infos 
+            return []
 
         normalized_extensions = [ext.lower() for ext in file_extensions] if file_extensions else None
         
@@ -161,24 +159,47 @@ class DirectoryScanner:
             for pf_path in potential_files:
                 if pf_path.suffix.lower() in normalized_extensions: files_to_analyze.append(pf_path)
         else: files_to_analyze = potential_files
-        
-        total_to_analyze = len(files_to_analyze)
-        logger.info(f"Znaleziono {total_to_analyze} plików pasujących do kryteriów rozszerzeń do analizy.")
-        if progress_callback and total_to_analyze == 0: progress_callback(0, 0, "Brak plików do analizy")
+        return files_to_analyze
 
+    def _scan_files(self, files_to_analyze: List[Path], progress_callback: Optional[ScanProgressCallback] = None) -> List[Tuple[Path, MediaInfo]]:
+        """Skanuje pliki po kolei; zwraca pary (ścieżka źródłowa, MediaInfo) dla plików, które nie zostały pominięte."""
+        results: List[Tuple[Path, MediaInfo]] = []
+        total_to_analyze = len(files_to_analyze)
         for idx, file_path in enumerate(files_to_analyze):
             if progress_callback: progress_callback(idx + 1, total_to_analyze, file_path.name)
             
             media_info = self.scan_single_file(file_path) # scan_single_file teraz obsługuje logikę auto-naprawy
             if media_info: # scan_single_file zwróci MediaInfo (oryginalne lub naprawione) lub None jeśli np. złe rozszerzenie
-                found_media_infos.append(media_info)
+                results.append((file_path, media_info))
             # Jeśli scan_single_file zwróciło None (np. z powodu nieobsługiwanego rozszerzenia), po prostu pomijamy
+        return results
+
+    def scan_directory_for_media_files(
+            self,
+            source_directory: Path,
+            recursive: bool,
+            file_extensions: Optional[List[str]],
+            progress_callback: Optional[ScanProgressCallback] = None
+        ) -> List[MediaInfo]:
+        logger.info(f"Rozpoczynanie skanowania katalogu '{source_directory}'. Rekursywnie: {recursive}")
+        found_media_infos: List[MediaInfo] = []
+
+        if not source_directory.is_dir():
+            logger.error(f"Podana ścieżka źródłowa nie jest katalogiem: {source_directory}")
+            return found_media_infos 
+
+        files_to_analyze = self.list_candidate_files(source_directory, recursive, file_extensions)
+        total_to_analyze = len(files_to_analyze)
+        logger.info(f"Znaleziono {total_to_analyze} plików pasujących do kryteriów rozszerzeń do analizy.")
+        if progress_callback and total_to_analyze == 0: progress_callback(0, 0, "Brak plików do analizy")
+
+        found_media_infos = [media_info for _, media_info in self._scan_files(files_to_analyze, progress_callback)]
 
         logger.info(f"Skanowanie MediaInfo zakończone. Przeanalizowano/próbowano naprawić {len(files_to_analyze)} plików. Zebrano {len(found_media_infos)} obiektów MediaInfo.")
         return found_media_infos
 
 
-    def scan_directory_and_populate_job_state(self, job_state: JobState, progress_callback: Optional[ScanProgressCallback] = None):
+    def scan_directory_and_populate_job_state(self, job_state: JobState, progress_callback: Optional[ScanProgressCallback] = None, profile: Optional[EncodingProfile] = None):
         source_dir = job_state.source_directory
         recursive = self.config_manager.get_config_value('general', 'recursive_scan', False)
         file_extensions = self.config_manager.get_config_value('processing', 'supported_file_extensions', [])
@@ -194,14 +215,28 @@ class DirectoryScanner:
             logger.error(job_state.error_message)
             return
 
-        all_media_infos = self.scan_directory_for_media_files(
-            source_directory=source_dir,
-            recursive=recursive,
-            file_extensions=file_extensions,
-            progress_callback=progress_callback
-        )
+        candidate_files = self.list_candidate_files(source_dir, recursive, file_extensions)
+        logger.info(f"Znaleziono {len(candidate_files)} plików pasujących do kryteriów rozszerzeń do analizy.")
+        ledger_hits: List[Tuple[Path, Path]] = []
+        if profile is not None and self.transcode_ledger.is_enabled():
+            # Pliki już przetworzone tym samym profilem w poprzednich zadaniach - wystarczy stat
+            remaining_files: List[Path] = []
+            for file_path in candidate_files:
+                previous_output = self.transcode_ledger.lookup(file_path, profile)
+                if previous_output is not None: ledger_hits.append((file_path, previous_output))
+                else: remaining_files.append(file_path)
+            candidate_files = remaining_files
+            if ledger_hits: logger.info(f"Rejestr transkodowań: {len(ledger_hits)} plików już przetworzonych profilem '{profile.name}' - oznaczane jako ukończone.")
+        duplicates_of: Dict[Path, Path] = {}
+        if self.config_manager.get_config_value('processing', 'dedupe.enabled', True):
+            for group in self.duplicate_detector.find_duplicate_groups(candidate_files):
+                for duplicate_path in group[1:]: duplicates_of[duplicate_path] = group[0]
+        if progress_callback and not candidate_files: progress_callback(0, 0, "Brak plików do analizy")
+        # FFprobe tylko dla reprezentantów - duplikaty dziedziczą ich MediaInfo
+        scanned = self._scan_files([f for f in candidate_files if f not in duplicates_of], progress_callback)
         
-        for media_info in all_media_infos:
+        representatives: Dict[Path, ProcessedFile] = {}
+        for source_path, media_info in scanned:
             # media_info.file_path będzie teraz wskazywać na oryginalny lub naprawiony plik
             pf_status = "Oczekuje"
             if media_info.error_message: # Jeśli nadal jest błąd (nawet po próbie naprawy)
@@ -216,6 +251,22 @@ class DirectoryScanner:
                 error_message=media_info.error_message # Zapisz komunikat błędu, jeśli nadal istnieje
             )
             job_state.processed_files.append(processed_file)
+            representatives[source_path] = processed_file
+
+        for duplicate_path, representative_path in sorted(duplicates_of.items()):
+            representative = representatives.get(representative_path)
+            if representative is None: continue
+            duplicate_media_info = MediaInfo.from_dict({**representative.media_info.to_dict(), 'file_path': str(duplicate_path)}) if representative.media_info else None
+            job_state.processed_files.append(ProcessedFile(
+                file_id=uuid.uuid4(), original_path=duplicate_path, status=DUPLICATE_STATUS, media_info=duplicate_media_info,
+                duration_seconds=representative.duration_seconds, duplicate_of=representative.file_id
+            ))
+        for source_path, previous_output in ledger_hits:
+            job_state.processed_files.append(ProcessedFile(
+                file_id=uuid.uuid4(), original_path=source_path, status="Ukończono", output_path=previous_output,
+                error_message="Wynik z poprzedniego zadania (rejestr transkodowań)."
+            ))
+        if duplicates_of: logger.info(f"Pominięto kodowanie {len(duplicates_of)} duplikatów - otrzymają kopię wyniku reprezentanta.")
         
         job_state.total_files = len(job_state.processed_files)
         if job_state.total_files > 0:
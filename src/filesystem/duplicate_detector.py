@@ -0,0 +1,103 @@
+# src/filesystem/duplicate_detector.py
+import hashlib
+import logging
+import mmap
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+from ..config_manager import ConfigManager
+
+logger = logging.getLogger(__name__)
+
+FULL_HASH_CHUNK_BYTES = 4 * 1024 * 1024
+
+
+class DuplicateDetector:
+    """
+    Wykrywa identyczne pliki źródłowe w trzech etapach, od najtańszego:
+    (1) grupowanie po rozmiarze, (2) skrót z próbek początku, środka i końca pliku
+    czytanych przez mmap, (3) pełny skrót - tylko dla plików, które przeszły etap 2.
+    """
+    def __init__(self, config_manager: ConfigManager):
+        self.config_manager = config_manager
+        logger.debug("DuplicateDetector zainicjalizowany.")
+
+    def _get_setting(self, key: str, default):
+        return self.config_manager.get_config_value('processing', f"dedupe.{key}", default)
+
+    @staticmethod
+    def partial_hash(file_path: Path, block_bytes: int) -> Tuple[Optional[str], bool]:
+        """
+        Zwraca (skrót próbek, czy_skrót_obejmuje_cały_plik). Dla małych plików próbki
+        pokryłyby cały plik, więc liczony jest od razu skrót pełny.
+        """
+        try:
+            size = file_path.stat().st_size
+            digest = hashlib.blake2b(str(size).encode('ascii'), digest_size=20)
+            with open(file_path, 'rb') as f:
+                if size <= block_bytes * 3:
+                    digest.update(f.read())
+                    return digest.hexdigest(), True
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    middle_start = (size - block_bytes) // 2
+                    for start in (0, middle_start, size - block_bytes):
+                        digest.update(mapped[start:start + block_bytes])
+            return digest.hexdigest(), False
+        except (OSError, ValueError) as e:
+            logger.warning(f"Nie można obliczyć skrótu próbek pliku '{file_path}': {e}")
+            return None, False
+
+    @staticmethod
+    def full_hash(file_path: Path) -> Optional[str]:
+        try:
+            digest = hashlib.blake2b(digest_size=20)
+            with open(file_path, 'rb') as f:
+                while True:
+                    chunk = f.read(FULL_HASH_CHUNK_BYTES)
+                    if not chunk: break
+                    digest.update(chunk)
+            return digest.hexdigest()
+        except OSError as e:
+            logger.warning(f"Nie można obliczyć pełnego skrótu pliku '{file_path}': {e}")
+            return None
+
+    def find_duplicate_groups(self, files: List[Path]) -> List[List[Path]]:
+        """Zwraca grupy (≥2) identycznych plików; pierwszy plik w grupie (wg ścieżki) jest reprezentantem."""
+        block_bytes = max(4096, self._get_setting('sample_block_bytes', 1048576))
+        max_workers = max(1, self._get_setting('max_workers', 4))
+
+        by_size: Dict[int, List[Path]] = {}
+        for file_path in files:
+            try: size = file_path.stat().st_size
+            except OSError: continue
+            if size > 0: by_size.setdefault(size, []).append(file_path)
+        size_candidates = [path for group in by_size.values() if len(group) > 1 for path in group]
+        if not size_candidates: return []
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dedupe") as executor:
+            partial_results = dict(zip(size_candidates, executor.map(lambda p: self.partial_hash(p, block_bytes), size_candidates)))
+            by_partial: Dict[Tuple[str, bool], List[Path]] = {}
+            for file_path, (digest, is_complete) in partial_results.items():
+                if digest is not None: by_partial.setdefault((digest, is_complete), []).append(file_path)
+
+            groups: List[List[Path]] = []
+            needs_full_hash: List[List[Path]] = []
+            for (_, is_complete), group in by_partial.items():
+                if len(group) < 2: continue
+                if is_complete: groups.append(group)
+                else: needs_full_hash.append(group)
+
+            full_candidates = [path for group in needs_full_hash for path in group]
+            full_results = dict(zip(full_candidates, executor.map(self.full_hash, full_candidates)))
+        for group in needs_full_hash:
+            by_full: Dict[str, List[Path]] = {}
+            for file_path in group:
+                digest = full_results.get(file_path)
+                if digest is not None: by_full.setdefault(digest, []).append(file_path)
+            groups.extend(g for g in by_full.values() if len(g) > 1)
+
+        groups = [sorted(group) for group in groups]
+        duplicate_count = sum(len(g) - 1 for g in groups)
+        logger.info(f"Deduplikacja: {len(files)} plików, kandydaci wg rozmiaru: {len(size_candidates)}, pełne skróty: {len(full_candidates)}, grupy duplikatów: {len(groups)} (duplikaty: {duplicate_count}).")
+        return groups
@@ -0,0 +1,307 @@
+# src/filesystem/job_snapshot.py
+"""
+Zwięzły, binarny format migawki stanu zadania (alternatywa dla JSON z indent=4).
+
+Układ pliku:
+    nagłówek:   MAGIC (4 B) | wersja (1 B) | kompresja (1 B)
+    dane (opcjonalnie skompresowane gzip/zstd):
+        tabela napisów: liczba (u32) | długość bloku UTF-8 (u32) | napisy rozdzielone NUL
+        rekord zadania: długość (u32) | pola
+        liczba plików (u32), potem dla każdego pliku: długość (u32) | rekord ProcessedFile
+                        [| MediaInfo | liczba strumieni (u8) | rekordy StreamInfo]
+Napisy (ścieżki, statusy, kodeki, daty ISO) są zapisywane raz w tabeli i wskazywane indeksem;
+indeks 0 oznacza None. Brak wartości liczbowej to NaN (float) lub -1 (int).
+"""
+import argparse
+import gc
+import gzip
+import json
+import logging
+import math
+import struct
+import sys
+import uuid
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from ..models import JobState, ProcessedFile, MediaInfo, StreamInfo, AppJSONEncoder
+from ..state_codec import read_json_file, decode_job_state
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+    _ZSTD_ERRORS: Tuple[type, ...] = (zstandard.ZstdError,)
+except ImportError:
+    ZSTD_AVAILABLE = False
+    _ZSTD_ERRORS = ()
+
+SNAPSHOT_MAGIC = b"NTJS"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".snap"
+COMPRESSION_CODES = {'none': 0, 'gzip': 1, 'zstd': 2}
+COMPRESSION_NAMES = {code: name for name, code in COMPRESSION_CODES.items()}
+
+_HEADER = struct.Struct("<4sBB")
+_U32 = struct.Struct("<I")
+_U8 = struct.Struct("<B")
+# JobState: job_id, selected_profile_id, source_directory, status, start_time, end_time, error_message, total_files
+_JOB = struct.Struct("<16s16sIIIIIq")
+# ProcessedFile: file_id, duplicate_of, original_path, status, start_time, end_time, output_path, error_message,
+#                duration_seconds, segment_duration_seconds, liczba segmentów, czy jest MediaInfo
+_FILE = struct.Struct("<16s16sIIIIIIddIB")
+# MediaInfo: file_path, video_codec, audio_codec, format_name, frame_rate, error_message, duration, width, height, bit_rate
+_MEDIA = struct.Struct("<IIIIIIdiiq")
+# StreamInfo (kolejność jak StreamInfo.FIELDS)
+_STREAM = struct.Struct("<iIIIiiIiIIIbIqqdiIiIIbb")
+
+_NO_UUID = b"\x00" * 16
+
+
+class SnapshotFormatError(ValueError):
+    """Plik nie jest poprawną migawką stanu zadania (zły nagłówek, wersja lub uszkodzone dane)."""
+
+
+class _StringTable:
+    def __init__(self) -> None:
+        self._index: Dict[str, int] = {}
+        self._strings: List[str] = [""]
+
+    def ref(self, value: Any) -> int:
+        if value is None: return 0
+        text = str(value).replace("\x00", "")
+        index = self._index.get(text)
+        if index is None:
+            index = len(self._strings); self._index[text] = index; self._strings.append(text)
+        return index
+
+    def encode(self) -> bytes:
+        blob = "\x00".join(self._strings[1:]).encode('utf-8')
+        return _U32.pack(len(self._strings) - 1) + _U32.pack(len(blob)) + blob
+
+
+def _opt_float(value: Optional[float]) -> float:
+    return float(value) if value is not None else math.nan
+
+def _opt_int(value: Optional[int]) -> int:
+    return int(value) if value is not None else -1
+
+def _opt_bool(value: Optional[bool]) -> int:
+    return -1 if value is None else int(bool(value))
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _encode_stream(stream: StreamInfo, strings: _StringTable) -> bytes:
+    return _STREAM.pack(
+        _opt_int(stream.index), strings.ref(stream.codec_type), strings.ref(stream.codec_name), strings.ref(stream.profile),
+        _opt_int(stream.width), _opt_int(stream.height), strings.ref(stream.pix_fmt), _opt_int(stream.bit_depth),
+        strings.ref(stream.color_space), strings.ref(stream.color_transfer), strings.ref(stream.color_primaries), _opt_bool(stream.has_hdr_side_data),
+        strings.ref(stream.frame_rate), _opt_int(stream.nb_frames), _opt_int(stream.bit_rate), _opt_float(stream.duration),
+        _opt_int(stream.channels), strings.ref(stream.channel_layout), _opt_int(stream.sample_rate), strings.ref(stream.language),
+        strings.ref(stream.title), _opt_bool(stream.is_default), _opt_bool(stream.is_forced))
+
+
+def _encode_file(processed_file: ProcessedFile, strings: _StringTable) -> bytes:
+    segments = list(processed_file.completed_segments)
+    media_info = processed_file.media_info
+    parts = [_FILE.pack(
+        processed_file.file_id.bytes, processed_file.duplicate_of.bytes if processed_file.duplicate_of else _NO_UUID,
+        strings.ref(processed_file.original_path), strings.ref(processed_file.status), strings.ref(_iso(processed_file.start_time)),
+        strings.ref(_iso(processed_file.end_time)), strings.ref(processed_file.output_path), strings.ref(processed_file.error_message),
+        _opt_float(processed_file.duration_seconds), _opt_float(processed_file.segment_duration_seconds), len(segments), 1 if media_info else 0)]
+    if segments: parts.append(struct.pack(f"<{len(segments)}I", *segments))
+    if media_info:
+        streams = media_info.streams[:255]
+        parts.append(_MEDIA.pack(
+            strings.ref(media_info.file_path), strings.ref(media_info.video_codec), strings.ref(media_info.audio_codec),
+            strings.ref(media_info.format_name), strings.ref(media_info.frame_rate), strings.ref(media_info.error_message),
+            _opt_float(media_info.duration), _opt_int(media_info.width), _opt_int(media_info.height), _opt_int(media_info.bit_rate)))
+        parts.append(_U8.pack(len(streams)))
+        parts.extend(_encode_stream(stream, strings) for stream in streams)
+    return b"".join(parts)
+
+
+def encode_snapshot(job_state: JobState, compression: str = 'gzip') -> bytes:
+    if compression == 'zstd' and not ZSTD_AVAILABLE:
+        logger.warning("Kompresja zstd niedostępna (brak pakietu 'zstandard'). Używam gzip.")
+        compression = 'gzip'
+    if compression not in COMPRESSION_CODES:
+        logger.warning(f"Nieznany rodzaj kompresji migawki '{compression}'. Używam gzip.")
+        compression = 'gzip'
+    strings = _StringTable()
+    job_record = _JOB.pack(
+        job_state.job_id.bytes, job_state.selected_profile_id.bytes, strings.ref(job_state.source_directory), strings.ref(job_state.status),
+        strings.ref(_iso(job_state.start_time)), strings.ref(_iso(job_state.end_time)), strings.ref(job_state.error_message), int(job_state.total_files or 0))
+    file_records = [_encode_file(pf, strings) for pf in job_state.processed_files]
+    body = [strings.encode(), _U32.pack(len(job_record)), job_record, _U32.pack(len(file_records))]
+    for record in file_records: body.append(_U32.pack(len(record))); body.append(record)
+    payload = b"".join(body)
+    if compression == 'gzip': payload = gzip.compress(payload, compresslevel=6)
+    elif compression == 'zstd': payload = zstandard.ZstdCompressor(level=3).compress(payload)
+    return _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, COMPRESSION_CODES[compression]) + payload
+
+
+def _decompress(data: bytes) -> bytes:
+    if len(data) < _HEADER.size: raise SnapshotFormatError("Plik migawki jest za krótki.")
+    magic, version, compression_code = _HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC: raise SnapshotFormatError("Nieprawidłowy nagłówek migawki stanu zadania.")
+    if version != SNAPSHOT_VERSION: raise SnapshotFormatError(f"Nieobsługiwana wersja migawki: {version}.")
+    payload = data[_HEADER.size:]
+    compression = COMPRESSION_NAMES.get(compression_code)
+    if compression == 'none': return payload
+    if compression == 'gzip': return gzip.decompress(payload)
+    if compression == 'zstd':
+        if not ZSTD_AVAILABLE: raise SnapshotFormatError("Migawka jest skompresowana zstd, a pakiet 'zstandard' nie jest zainstalowany.")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    raise SnapshotFormatError(f"Nieznany kod kompresji migawki: {compression_code}.")
+
+
+def decode_snapshot(data: bytes) -> JobState:
+    gc_was_enabled = gc.isenabled(); gc.disable()
+    try:
+        return _decode_snapshot(data)
+    finally:
+        if gc_was_enabled: gc.enable()
+
+
+def _decode_snapshot(data: bytes) -> JobState:
+    try:
+        payload = _decompress(data)
+        string_count, blob_length = struct.unpack_from("<II", payload, 0)
+        offset = 8 + blob_length
+        strings: List[Optional[str]] = [None]
+        if string_count: strings.extend(map(sys.intern, payload[8:offset].decode('utf-8').split("\x00")))
+        if len(strings) != string_count + 1: raise SnapshotFormatError("Uszkodzona tabela napisów migawki.")
+
+        def to_datetime(index: int) -> Optional[datetime]:
+            return datetime.fromisoformat(strings[index]) if index else None
+
+        (job_length,) = _U32.unpack_from(payload, offset); offset += 4
+        job_id, profile_id, source_dir, status, start_time, end_time, error_message, total_files = _JOB.unpack_from(payload, offset)
+        offset += job_length
+        (file_count,) = _U32.unpack_from(payload, offset); offset += 4
+
+        processed_files: List[ProcessedFile] = []
+        for _ in range(file_count):
+            (record_length,) = _U32.unpack_from(payload, offset); offset += 4
+            record_end = offset + record_length
+            (file_id, duplicate_of, original_path, file_status, file_start, file_end, output_path, file_error,
+             duration_seconds, segment_duration, segment_count, has_media) = _FILE.unpack_from(payload, offset)
+            position = offset + _FILE.size
+            segments: List[int] = []
+            if segment_count:
+                segments = list(struct.unpack_from(f"<{segment_count}I", payload, position)); position += 4 * segment_count
+            original_path_obj = Path(strings[original_path])
+            media_info: Optional[MediaInfo] = None
+            if has_media:
+                (mi_path, video_codec, audio_codec, format_name, frame_rate, mi_error,
+                 mi_duration, width, height, bit_rate) = _MEDIA.unpack_from(payload, position)
+                position += _MEDIA.size
+                (stream_count,) = _U8.unpack_from(payload, position); position += 1
+                streams: List[StreamInfo] = []
+                for _ in range(stream_count):
+                    values = _STREAM.unpack_from(payload, position); position += _STREAM.size
+                    streams.append(_decode_stream(values, strings))
+                media_info = MediaInfo(
+                    file_path=original_path_obj if mi_path == original_path else Path(strings[mi_path]),
+                    duration=None if math.isnan(mi_duration) else mi_duration, video_codec=strings[video_codec], audio_codec=strings[audio_codec],
+                    width=None if width < 0 else width, height=None if height < 0 else height, format_name=strings[format_name],
+                    bit_rate=None if bit_rate < 0 else bit_rate, frame_rate=strings[frame_rate], error_message=strings[mi_error], streams=streams)
+            processed_files.append(ProcessedFile(
+                file_id=uuid.UUID(bytes=file_id), original_path=original_path_obj, status=strings[file_status],
+                start_time=to_datetime(file_start), end_time=to_datetime(file_end),
+                duration_seconds=None if math.isnan(duration_seconds) else duration_seconds,
+                output_path=Path(strings[output_path]) if output_path else None, error_message=strings[file_error],
+                media_info=media_info, completed_segments=segments,
+                segment_duration_seconds=None if math.isnan(segment_duration) else segment_duration,
+                duplicate_of=uuid.UUID(bytes=duplicate_of) if duplicate_of != _NO_UUID else None))
+            offset = record_end
+
+        return JobState(
+            job_id=uuid.UUID(bytes=job_id), source_directory=Path(strings[source_dir]), selected_profile_id=uuid.UUID(bytes=profile_id),
+            status=strings[status], start_time=to_datetime(start_time), processed_files=processed_files,
+            total_files=total_files, end_time=to_datetime(end_time), error_message=strings[error_message])
+    except SnapshotFormatError:
+        raise
+    # zlib.error/ZstdError - uszkodzone dane skompresowane; ValueError/TypeError - nieprawidłowe daty ISO, UUID
+    # lub indeksy napisów wskazujące None w polach wymaganych
+    except (struct.error, IndexError, UnicodeDecodeError, OSError, EOFError, zlib.error, ValueError, TypeError) + _ZSTD_ERRORS as e:
+        raise SnapshotFormatError(f"Uszkodzona migawka stanu zadania: {e}") from e
+
+
+def _decode_stream(values: Tuple[Any, ...], strings: List[Optional[str]]) -> StreamInfo:
+    (index, codec_type, codec_name, profile, width, height, pix_fmt, bit_depth, color_space, color_transfer, color_primaries,
+     has_hdr, frame_rate, nb_frames, bit_rate, duration, channels, channel_layout, sample_rate, language, title,
+     is_default, is_forced) = values
+    # Argumenty pozycyjne w kolejności StreamInfo.FIELDS (szybsze niż nazwane przy dziesiątkach tysięcy strumieni)
+    return StreamInfo(
+        index, strings[codec_type], strings[codec_name], strings[profile],
+        None if width < 0 else width, None if height < 0 else height, strings[pix_fmt],
+        None if bit_depth < 0 else bit_depth, strings[color_space], strings[color_transfer],
+        strings[color_primaries], None if has_hdr < 0 else bool(has_hdr),
+        strings[frame_rate], None if nb_frames < 0 else nb_frames, None if bit_rate < 0 else bit_rate,
+        None if duration != duration else duration, None if channels < 0 else channels,
+        strings[channel_layout], None if sample_rate < 0 else sample_rate, strings[language],
+        strings[title], None if is_default < 0 else bool(is_default), None if is_forced < 0 else bool(is_forced))
+
+
+def is_snapshot_file(file_path: Path) -> bool:
+    try:
+        with open(file_path, 'rb') as f:
+            return f.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC
+    except OSError:
+        return False
+
+
+def write_snapshot(job_state: JobState, file_path: Path, compression: str = 'gzip') -> None:
+    data = encode_snapshot(job_state, compression)
+    tmp_path = file_path.with_name(file_path.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    tmp_path.replace(file_path)
+
+
+def read_snapshot(file_path: Path) -> JobState:
+    with open(file_path, 'rb') as f:
+        return decode_snapshot(f.read())
+
+
+def convert_json_to_snapshot(json_path: Path, snapshot_path: Path, compression: str = 'gzip') -> JobState:
+    job_state = decode_job_state(read_json_file(json_path))
+    write_snapshot(job_state, snapshot_path, compression)
+    return job_state
+
+
+def convert_snapshot_to_json(snapshot_path: Path, json_path: Path) -> JobState:
+    """Eksport migawki do czytelnego JSON (ten sam format co plik stanu zadania)."""
+    job_state = read_snapshot(snapshot_path)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(job_state, f, indent=4, cls=AppJSONEncoder)
+    return job_state
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Konwersja stanu zadania między JSON a binarną migawką.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    to_snapshot = subparsers.add_parser('to-snapshot', help="JSON -> migawka")
+    to_snapshot.add_argument('source', type=Path); to_snapshot.add_argument('target', type=Path)
+    to_snapshot.add_argument('--compression', choices=sorted(COMPRESSION_CODES), default='gzip')
+    to_json = subparsers.add_parser('to-json', help="migawka -> JSON")
+    to_json.add_argument('source', type=Path); to_json.add_argument('target', type=Path)
+    args = parser.parse_args(argv)
+    try:
+        if args.command == 'to-snapshot': job_state = convert_json_to_snapshot(args.source, args.target, args.compression)
+        else: job_state = convert_snapshot_to_json(args.source, args.target)
+    except (OSError, ValueError) as e:
+        print(f"Błąd konwersji: {e}", file=sys.stderr); return 1
+    print(f"Zapisano {args.target} (zadanie {job_state.job_id}, plików: {len(job_state.processed_files)}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
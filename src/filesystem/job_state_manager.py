@@ -5,7 +5,9 @@ from pathlib import Path
 from typing import Optional, Dict, Any, List # <<< DODANO IMPORT List
 from datetime import datetime
 
-from ..models import JobState, ProcessedFile, AppJSONEncoder, AppJSONDecoder # Import modeli i (de)serializatorów
+from ..models import JobState, ProcessedFile, AppJSONEncoder # Import modeli i (de)serializatorów
+from ..state_codec import read_json_file, decode_job_state
+from .job_snapshot import SNAPSHOT_SUFFIX, SnapshotFormatError, write_snapshot, read_snapshot, convert_snapshot_to_json
 from ..config_manager import ConfigManager # Dla dostępu do ścieżki job_state_dir
 
 logger = logging.getLogger(__name__)
@@ -22,6 +24,8 @@ class JobStateManager:
         
         # Plik przechowujący stan ostatniego zadania
         self.last_job_state_file: Path = self.job_state_dir / "last_single_job_state.json"
+        # Opcjonalna binarna migawka tego samego stanu (processing.job_state_format: snapshot)
+        self.last_job_snapshot_file: Path = self.last_job_state_file.with_suffix(SNAPSHOT_SUFFIX)
         
         logger.debug(f"JobStateManager zainicjalizowany. Plik stanu ostatniego zadania: {self.last_job_state_file}")
         # Upewnij się, że katalog istnieje
@@ -31,8 +35,20 @@ class JobStateManager:
             logger.critical(f"Nie można utworzyć katalogu stanu zadań {self.job_state_dir}: {e}", exc_info=True)
             # To może być krytyczny błąd, w zależności od wymagań aplikacji
 
+    def _use_snapshot_format(self) -> bool:
+        return self.config_manager.get_config_value('processing', 'job_state_format', 'json') == 'snapshot'
+
     def save_job_state(self, job_state: JobState):
-        """Zapisuje bieżący stan zadania do pliku JSON."""
+        """Zapisuje bieżący stan zadania do pliku JSON lub binarnej migawki (wg processing.job_state_format)."""
+        if self._use_snapshot_format():
+            compression = self.config_manager.get_config_value('processing', 'job_state_snapshot_compression', 'gzip')
+            logger.info(f"Zapisywanie migawki stanu zadania {job_state.job_id} do {self.last_job_snapshot_file}")
+            try:
+                write_snapshot(job_state, self.last_job_snapshot_file, compression)
+                logger.info(f"Pomyślnie zapisano migawkę stanu zadania {job_state.job_id}.")
+            except Exception as e:
+                logger.error(f"Błąd podczas zapisu migawki stanu zadania {job_state.job_id}: {e}", exc_info=True)
+            return
         logger.info(f"Zapisywanie stanu zadania {job_state.job_id} do {self.last_job_state_file}")
         try:
             with open(self.last_job_state_file, 'w', encoding='utf-8') as f:
@@ -42,22 +58,64 @@ class JobStateManager:
             logger.error(f"Błąd podczas zapisu stanu zadania {job_state.job_id}: {e}", exc_info=True)
             # Można rozważyć rzucenie wyjątku w zależności od krytyczności
 
+    def _snapshot_is_newest(self) -> bool:
+        """Czy migawka jest nowsza od pliku JSON - po zmianie formatu w ustawieniach wczytywany jest świeższy z zapisów."""
+        try:
+            snapshot_mtime = self.last_job_snapshot_file.stat().st_mtime_ns
+        except OSError:
+            return False
+        try:
+            return snapshot_mtime >= self.last_job_state_file.stat().st_mtime_ns
+        except OSError:
+            return True
+
+    def _load_last_job_snapshot(self) -> Optional[JobState]:
+        logger.debug(f"Próba wczytania migawki stanu ostatniego zadania z {self.last_job_snapshot_file}")
+        try:
+            job_state = read_snapshot(self.last_job_snapshot_file)
+            logger.info(f"Pomyślnie wczytano stan zadania {job_state.job_id} z migawki.")
+            return job_state
+        except (SnapshotFormatError, OSError) as e:
+            logger.error(f"Błąd podczas wczytywania migawki stanu zadania z {self.last_job_snapshot_file}: {e}", exc_info=True)
+            self._backup_corrupted_job_state_file("snapshot_error", self.last_job_snapshot_file)
+        except Exception as e: # Inne nieoczekiwane błędy - jak przy pliku JSON, bez przerywania aplikacji
+            logger.error(f"Nieoczekiwany błąd podczas wczytywania migawki stanu zadania: {e}", exc_info=True)
+            self._backup_corrupted_job_state_file("unexpected_error", self.last_job_snapshot_file)
+        # Uszkodzona migawka została przeniesiona do kopii - próbujemy starszego zapisu w JSON
+        logger.warning("Migawka stanu zadania nieczytelna. Próba wczytania stanu z pliku JSON.")
+        return self._load_last_job_json()
+
+    def export_last_job_state_to_json(self, target_path: Optional[Path] = None) -> Optional[Path]:
+        """Eksportuje migawkę ostatniego zadania do czytelnego JSON (domyślnie obok migawki)."""
+        if not self.last_job_snapshot_file.exists():
+            logger.warning("Brak migawki stanu zadania do eksportu.")
+            return None
+        target = target_path or self.last_job_snapshot_file.with_suffix(".export.json")
+        try:
+            convert_snapshot_to_json(self.last_job_snapshot_file, target)
+            logger.info(f"Wyeksportowano migawkę stanu zadania do {target}")
+            return target
+        except (SnapshotFormatError, OSError) as e:
+            logger.error(f"Błąd eksportu migawki stanu zadania do JSON: {e}", exc_info=True)
+            return None
+
     def load_last_job_state(self) -> Optional[JobState]:
-        """Wczytuje ostatni zapisany stan zadania z pliku JSON."""
+        """Wczytuje ostatni zapisany stan zadania (nowszy z: binarna migawka, plik JSON)."""
+        if self._snapshot_is_newest(): return self._load_last_job_snapshot()
+        return self._load_last_job_json()
+
+    def _load_last_job_json(self) -> Optional[JobState]:
         logger.debug(f"Próba wczytania stanu ostatniego zadania z {self.last_job_state_file}")
         if not self.last_job_state_file.exists():
             logger.info("Nie znaleziono pliku stanu ostatniego zadania.")
             return None
 
         try:
-            with open(self.last_job_state_file, 'r', encoding='utf-8') as f:
-                # Użyj niestandardowego dekodera do obsługi Path, datetime i UUID
-                job_state_data = json.load(f, cls=AppJSONDecoder)
-            
-            if isinstance(job_state_data, JobState): # Jeśli AppJSONDecoder już przekonwertował
-                 job_state = job_state_data
-            elif isinstance(job_state_data, dict): # Jeśli to słownik, spróbuj przekonwertować
-                 job_state = JobState.from_dict(job_state_data)
+            # Dekodowanie wg schematu: Path, datetime i UUID tylko w znanych polach modeli
+            job_state_data = read_json_file(self.last_job_state_file)
+
+            if isinstance(job_state_data, dict):
+                 job_state = decode_job_state(job_state_data)
             else:
                  logger.error(f"Nieoczekiwany typ danych wczytany z pliku stanu zadania: {type(job_state_data)}")
                  self._backup_corrupted_job_state_file("invalid_type")
@@ -75,17 +133,18 @@ class JobStateManager:
             self._backup_corrupted_job_state_file("unexpected_error")
             return None
             
-    def _backup_corrupted_job_state_file(self, suffix_reason: str):
+    def _backup_corrupted_job_state_file(self, suffix_reason: str, state_file: Optional[Path] = None):
         """Tworzy kopię zapasową uszkodzonego pliku stanu zadania."""
+        state_file = state_file or self.last_job_state_file
         try:
-            backup_path = self.last_job_state_file.with_name(
-                f"{self.last_job_state_file.name}.backup_{suffix_reason}_{datetime.now():%Y%m%d%H%M%S}"
+            backup_path = state_file.with_name(
+                f"{state_file.name}.backup_{suffix_reason}_{datetime.now():%Y%m%d%H%M%S}"
             )
-            if self.last_job_state_file.exists():
-                self.last_job_state_file.rename(backup_path)
+            if state_file.exists():
+                state_file.rename(backup_path)
                 logger.warning(f"Utworzono kopię zapasową uszkodzonego pliku stanu zadania: {backup_path}")
         except Exception as backup_e:
-            logger.error(f"Nie udało się utworzyć kopii zapasowej uszkodzonego pliku stanu zadania {self.last_job_state_file}: {backup_e}", exc_info=True)
+            logger.error(f"Nie udało się utworzyć kopii zapasowej uszkodzonego pliku stanu zadania {state_file}: {backup_e}", exc_info=True)
 
     def get_history_of_jobs(self, limit: int = 10) -> List[JobState]:
         """
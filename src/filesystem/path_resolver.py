@@ -45,9 +45,7 @@ class PathResolver:
             base_output_dir = custom_output_dir.expanduser().resolve()
             logger.debug(f"Używanie niestandardowego katalogu wyjściowego: {base_output_dir}")
         else:
-            default_output_dir_str = self.config_manager.get_config_value(
-                'paths', 'default_output_directory', DEFAULT_CONFIG['paths']['default_output_directory']
-            )
+            default_output_dir_str = self.config_manager.snapshot.paths.default_output_directory
             # default_output_directory z config_manager powinien już być obiektem Path
             if isinstance(default_output_dir_str, Path):
                  base_output_dir = default_output_dir_str
@@ -105,9 +103,7 @@ class PathResolver:
         if custom_output_dir:
             repaired_files_dir = custom_output_dir.expanduser().resolve()
         else:
-            default_repaired_dir_str = self.config_manager.get_config_value(
-                'paths', 'default_repaired_directory', DEFAULT_CONFIG['paths']['default_repaired_directory']
-            )
+            default_repaired_dir_str = self.config_manager.snapshot.paths.default_repaired_directory
             if isinstance(default_repaired_dir_str, Path):
                  repaired_files_dir = default_repaired_dir_str
             else:
@@ -154,13 +150,9 @@ class PathResolver:
 
         # Pobierz odpowiedni wzorzec zmiany nazwy z konfiguracji
         if is_repair_path:
-            rename_pattern_str = self.config_manager.get_config_value(
-                'processing', 'repair_rename_pattern', DEFAULT_CONFIG['processing']['repair_rename_pattern']
-            )
+            rename_pattern_str = self.config_manager.snapshot.processing.repair_rename_pattern
         else:
-            rename_pattern_str = self.config_manager.get_config_value(
-                'processing', 'rename_pattern', DEFAULT_CONFIG['processing']['rename_pattern']
-            )
+            rename_pattern_str = self.config_manager.snapshot.processing.rename_pattern
         
         base_stem = target_output_path.stem
         # Rozszerzenie z kropką, np. ".mp4"
@@ -0,0 +1,130 @@
+# src/filesystem/performance_log.py
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..config_manager import ConfigManager
+from ..models import EncodingProfile, ProcessedFile
+from ..system_monitor.process_sampler import ProcessUsageSummary
+
+logger = logging.getLogger(__name__)
+
+PERFORMANCE_LOG_DIR_NAME = "performance"
+
+
+def _file_size(file_path: Optional[Path]) -> Optional[int]:
+    if file_path is None: return None
+    try: return file_path.stat().st_size
+    except OSError: return None
+
+
+class FilePerformanceRecord:
+    """
+    Pomiary jednego przetworzonego pliku. Transkoder uzupełnia dane procesu ffmpeg (czas CPU
+    i szczytowe RSS z raportu -benchmark, CPU%, wątki i liczniki I/O z próbkowania psutil, średnie
+    fps/prędkość), obsługa zadania - rozmiary, wynik i czasy. Pola, których nie udało się zmierzyć,
+    pozostają None (null w JSONL).
+    """
+    __slots__ = ('started_at', '_start_monotonic', 'input_size_bytes', 'wall_seconds', 'cpu_user_seconds', 'cpu_system_seconds',
+                 'peak_rss_bytes', 'bytes_read', 'bytes_written', 'average_fps', 'average_speed', 'process_count',
+                 'usage_sample_count', '_cpu_percent_total', 'peak_cpu_percent', 'peak_threads')
+
+    def __init__(self, input_file_path: Optional[Path] = None):
+        self.started_at = datetime.now()
+        self._start_monotonic = time.monotonic()
+        # Rozmiar wejścia mierzony przed kodowaniem - oryginał może zostać usunięty po sukcesie
+        self.input_size_bytes = _file_size(input_file_path)
+        self.wall_seconds: Optional[float] = None
+        self.cpu_user_seconds: Optional[float] = None
+        self.cpu_system_seconds: Optional[float] = None
+        self.peak_rss_bytes: Optional[int] = None
+        self.bytes_read: Optional[int] = None
+        self.bytes_written: Optional[int] = None
+        self.average_fps: Optional[float] = None
+        self.average_speed: Optional[float] = None
+        self.process_count = 0
+        self.usage_sample_count = 0
+        self._cpu_percent_total = 0.0
+        self.peak_cpu_percent: Optional[float] = None
+        self.peak_threads: Optional[int] = None
+
+    def add_process_usage(self, cpu_user_seconds: Optional[float], cpu_system_seconds: Optional[float], peak_rss_bytes: Optional[int]) -> None:
+        """Dolicza zużycie jednego procesu ffmpeg (kodowanie segmentowe: suma CPU, maksimum RSS)."""
+        self.process_count += 1
+        if cpu_user_seconds is not None: self.cpu_user_seconds = (self.cpu_user_seconds or 0.0) + cpu_user_seconds
+        if cpu_system_seconds is not None: self.cpu_system_seconds = (self.cpu_system_seconds or 0.0) + cpu_system_seconds
+        if peak_rss_bytes is not None: self.peak_rss_bytes = max(self.peak_rss_bytes or 0, peak_rss_bytes)
+
+    def add_sampled_usage(self, usage: Optional[ProcessUsageSummary]) -> None:
+        """Dolicza odczyty psutil jednego procesu: liczniki I/O się sumują, szczyty - maksimum."""
+        if usage is None: return
+        self.usage_sample_count += usage.sample_count
+        self._cpu_percent_total += usage.cpu_percent_total
+        self.peak_cpu_percent = max(self.peak_cpu_percent or 0.0, usage.peak_cpu_percent)
+        self.peak_threads = max(self.peak_threads or 0, usage.peak_threads)
+        self.peak_rss_bytes = max(self.peak_rss_bytes or 0, usage.peak_rss_bytes)
+        if usage.read_bytes is not None: self.bytes_read = (self.bytes_read or 0) + usage.read_bytes
+        if usage.write_bytes is not None: self.bytes_written = (self.bytes_written or 0) + usage.write_bytes
+
+    @property
+    def average_cpu_percent(self) -> Optional[float]:
+        return round(self._cpu_percent_total / self.usage_sample_count, 1) if self.usage_sample_count else None
+
+    def finish(self) -> None:
+        self.wall_seconds = time.monotonic() - self._start_monotonic
+
+
+class PerformanceLog:
+    """
+    Dopisywany (append-only) plik JSONL z rekordem wydajności dla każdego kodowanego pliku,
+    osobny dla każdego zadania: <job_state_dir>/performance/<job_id>.jsonl. Surowe dane do
+    planowania pojemności i wyszukiwania problematycznych plików wejściowych.
+    """
+    def __init__(self, config_manager: ConfigManager):
+        self.config_manager = config_manager
+        self.log_dir: Path = self.config_manager.get_job_state_dir_full_path() / PERFORMANCE_LOG_DIR_NAME
+        self._lock = threading.Lock()
+
+    def is_enabled(self) -> bool:
+        return self.config_manager.snapshot.processing.performance_log.enabled
+
+    def get_job_log_path(self, job_id: Any) -> Path:
+        return self.log_dir / f"{job_id}.jsonl"
+
+    @staticmethod
+    def build_entry(job_id: Any, processed_file: ProcessedFile, profile: EncodingProfile, record: FilePerformanceRecord, worker_id: str) -> Dict[str, Any]:
+        input_size = record.input_size_bytes
+        output_size = _file_size(processed_file.output_path)
+        media_info = processed_file.media_info
+        return {
+            'job_id': str(job_id), 'file_id': str(processed_file.file_id), 'worker_id': worker_id,
+            'input_path': str(processed_file.original_path), 'output_path': str(processed_file.output_path) if processed_file.output_path else None,
+            'status': processed_file.status, 'error_message': processed_file.error_message,
+            'profile_id': str(profile.id), 'profile_name': profile.name, 'profile_hash': profile.compiled.params_hash,
+            'started_at': record.started_at.isoformat(), 'finished_at': datetime.now().isoformat(),
+            'wall_seconds': record.wall_seconds, 'media_duration_seconds': media_info.duration if media_info else None,
+            'cpu_user_seconds': record.cpu_user_seconds, 'cpu_system_seconds': record.cpu_system_seconds,
+            'peak_rss_bytes': record.peak_rss_bytes, 'bytes_read': record.bytes_read, 'bytes_written': record.bytes_written,
+            'input_size_bytes': input_size, 'output_size_bytes': output_size,
+            # Stosunek rozmiaru wejścia do wyjścia (>1 = plik wynikowy mniejszy)
+            'compression_ratio': round(input_size / output_size, 4) if input_size and output_size else None,
+            'average_fps': record.average_fps, 'average_speed': record.average_speed,
+            'average_cpu_percent': record.average_cpu_percent, 'peak_cpu_percent': record.peak_cpu_percent,
+            'peak_threads': record.peak_threads, 'usage_sample_count': record.usage_sample_count,
+            'ffmpeg_process_count': record.process_count,
+        }
+
+    def append(self, job_id: Any, processed_file: ProcessedFile, profile: EncodingProfile, record: FilePerformanceRecord, worker_id: str) -> None:
+        if not self.is_enabled(): return
+        line = json.dumps(self.build_entry(job_id, processed_file, profile, record, worker_id), ensure_ascii=False)
+        log_path = self.get_job_log_path(job_id)
+        with self._lock:
+            try:
+                self.log_dir.mkdir(parents=True, exist_ok=True)
+                with open(log_path, 'a', encoding='utf-8') as f: f.write(line + "\n")
+            except OSError as e:
+                logger.error(f"Błąd zapisu rekordu wydajności do {log_path}: {e}", exc_info=True)
@@ -0,0 +1,117 @@
+# src/filesystem/repair_history_manager.py
+import json
+import logging
+import re
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from ..config_manager import ConfigManager
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_HISTORY_KEY = "*"
+DEFAULT_EXPECTED_SECONDS = 60.0
+MAX_SIGNATURE_LENGTH = 80
+
+_PATH_PATTERN = re.compile(r"(?:[a-zA-Z]:)?[\\/][^\s'\"]+|'[^']*'|\"[^\"]*\"")
+_HEX_PATTERN = re.compile(r"0x[0-9a-f]+|@\s*[0-9a-f]{6,}")
+_NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+
+def normalize_error_signature(error_text: Optional[str]) -> str:
+    """
+    Sprowadza komunikat błędu FFprobe/FFmpeg do stabilnej sygnatury: pierwsza linia,
+    małe litery, bez ścieżek, nazw w cudzysłowach, adresów i liczb.
+    """
+    if not error_text: return "brak"
+    first_line = next((line for line in str(error_text).splitlines() if line.strip()), "")
+    signature = _PATH_PATTERN.sub("<p>", first_line.lower())
+    signature = _HEX_PATTERN.sub("<x>", signature)
+    signature = _NUMBER_PATTERN.sub("#", signature)
+    signature = " ".join(signature.split())
+    return signature[:MAX_SIGNATURE_LENGTH] or "brak"
+
+
+class RepairHistoryManager:
+    """
+    Przechowuje statystyki prób naprawy (liczba prób, sukcesy, łączny czas) per strategia,
+    na trzech poziomach szczegółowości: kontener+kodeki+sygnatura błędu, kontener+kodeki
+    oraz globalnie. Na tej podstawie szereguje strategie wg oczekiwanego sukcesu na sekundę.
+    """
+    def __init__(self, config_manager: ConfigManager):
+        self.config_manager = config_manager
+        self.history_file: Path = self.config_manager.get_job_state_dir_full_path() / "repair_history.json"
+        self._lock = threading.Lock()
+        self._history: Dict[str, Dict[str, Dict[str, float]]] = self._load_history()
+        self._dirty = False
+        logger.debug(f"RepairHistoryManager zainicjalizowany. Plik historii napraw: {self.history_file}")
+
+    def _load_history(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        if not self.history_file.exists(): return {}
+        try:
+            with open(self.history_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict):
+                logger.error(f"Zawartość pliku historii napraw nie jest słownikiem ({type(data)}). Historia zostanie zresetowana.")
+                return {}
+            return data
+        except (json.JSONDecodeError, OSError) as e:
+            logger.error(f"Błąd wczytywania historii napraw z {self.history_file}: {e}", exc_info=True)
+            return {}
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty: return
+            try:
+                self.history_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.history_file.with_suffix(".json.tmp")
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._history, f, indent=4)
+                tmp_path.replace(self.history_file)
+                self._dirty = False
+                logger.debug(f"Zapisano historię napraw ({len(self._history)} kluczy).")
+            except OSError as e:
+                logger.error(f"Błąd zapisu historii napraw: {e}", exc_info=True)
+
+    @staticmethod
+    def build_keys(file_entry: Dict[str, Any]) -> List[str]:
+        """Zwraca klucze historii dla wpisu z rejestru uszkodzonych plików (od najbardziej szczegółowego)."""
+        media_info_val = file_entry.get('media_info')
+        media_info = media_info_val.to_dict() if hasattr(media_info_val, 'to_dict') else media_info_val if isinstance(media_info_val, dict) else {}
+        file_path = Path(str(file_entry.get('file_path', '')))
+        container = media_info.get('format_name') or file_path.suffix.lower().lstrip('.') or "?"
+        codecs = f"{media_info.get('video_codec') or '-'}/{media_info.get('audio_codec') or '-'}"
+        signature = file_entry.get('error_signature') or normalize_error_signature(file_entry.get('error_details'))
+        coarse_key = f"{container}|{codecs}"
+        return [f"{coarse_key}|{signature}", coarse_key, GLOBAL_HISTORY_KEY]
+
+    def record_attempt(self, history_keys: List[str], strategy_id: str, success: bool, duration_seconds: float) -> None:
+        with self._lock:
+            for key in history_keys:
+                stats = self._history.setdefault(key, {}).setdefault(strategy_id, {'attempts': 0, 'successes': 0, 'total_seconds': 0.0})
+                stats['attempts'] += 1
+                stats['successes'] += 1 if success else 0
+                stats['total_seconds'] = round(stats['total_seconds'] + max(0.0, duration_seconds), 3)
+            self._dirty = True
+
+    def _stats_for(self, history_keys: List[str], strategy_id: str) -> Optional[Dict[str, float]]:
+        for key in history_keys:
+            stats = self._history.get(key, {}).get(strategy_id)
+            if stats and stats.get('attempts', 0) > 0: return stats
+        return None
+
+    def expected_success_rate(self, history_keys: List[str], strategy_id: str) -> float:
+        """Oczekiwany sukces na sekundę; słaby prior (0.5 sukcesu na 1 próbę) daje nieznanym strategiom szansę 0.5."""
+        with self._lock:
+            stats = self._stats_for(history_keys, strategy_id)
+        if not stats: return 0.5 / DEFAULT_EXPECTED_SECONDS
+        attempts = stats['attempts']
+        success_probability = (stats['successes'] + 0.5) / (attempts + 1)
+        mean_seconds = max(1.0, stats['total_seconds'] / attempts)
+        return success_probability / mean_seconds
+
+    def order_strategies(self, history_keys: List[str], strategies: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], float]]:
+        """Sortuje strategie malejąco wg oczekiwanego sukcesu na sekundę (remisy zachowują kolejność z konfiguracji)."""
+        scored = [(strategy, self.expected_success_rate(history_keys, strategy['id'])) for strategy in strategies]
+        return sorted(scored, key=lambda item: -item[1])
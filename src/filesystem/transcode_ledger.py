@@ -0,0 +1,119 @@
+# src/filesystem/transcode_ledger.py
+import json
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from ..config_manager import ConfigManager
+from ..models import EncodingProfile
+
+logger = logging.getLogger(__name__)
+
+
+def file_fingerprint(file_path: Path) -> Optional[Dict[str, int]]:
+    """Odcisk pliku z jednego wywołania stat: rozmiar i mtime (ns). None, gdy pliku nie ma."""
+    try:
+        stat_result = file_path.stat()
+    except OSError:
+        return None
+    return {'size': stat_result.st_size, 'mtime_ns': stat_result.st_mtime_ns}
+
+
+# Przy wczytaniu rejestr jest kompaktowany, gdy nadpisane wpisy stanowią większość linii pliku
+LEDGER_COMPACT_MIN_LINES = 1000
+
+
+class TranscodeLedger:
+    """
+    Trwały rejestr wykonanych transkodowań, wspólny dla wszystkich zadań. Klucz to ścieżka
+    pliku źródłowego, ID profilu i skrót jego parametrów; wartość to odcisk źródła oraz ścieżka
+    i odcisk pliku wyjściowego. Trafienie wymaga, by źródło i wynik się nie zmieniły.
+    Plik jest dopisywany (JSONL, jedna linia na zapis) - nowszy wpis dla klucza zastępuje
+    starszy, a nadpisane linie są usuwane przy kompaktowaniu podczas wczytywania.
+    """
+    def __init__(self, config_manager: ConfigManager):
+        self.config_manager = config_manager
+        self.ledger_file: Path = self.config_manager.get_job_state_dir_full_path() / "transcode_ledger.jsonl"
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        logger.debug(f"TranscodeLedger zainicjalizowany. Plik rejestru: {self.ledger_file}")
+
+    def is_enabled(self) -> bool:
+        return self.config_manager.snapshot.processing.ledger.enabled
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is not None: return self._entries
+        self._entries = {}
+        if not self.ledger_file.exists(): return self._entries
+        line_count = 0
+        try:
+            with open(self.ledger_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip(): continue
+                    line_count += 1
+                    try: record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Np. urwana ostatnia linia po przerwaniu zapisu
+                        logger.warning(f"Pominięto nieczytelną linię rejestru transkodowań w {self.ledger_file}.")
+                        continue
+                    if isinstance(record, dict) and isinstance(record.get('key'), str):
+                        self._entries[record.pop('key')] = record
+        except OSError as e:
+            logger.error(f"Błąd wczytywania rejestru transkodowań z {self.ledger_file}: {e}", exc_info=True)
+            return self._entries
+        if line_count >= LEDGER_COMPACT_MIN_LINES and line_count > 2 * len(self._entries):
+            self._compact(line_count)
+        return self._entries
+
+    def _compact(self, line_count: int) -> None:
+        try:
+            tmp_path = self.ledger_file.with_suffix(".jsonl.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for key, entry in (self._entries or {}).items():
+                    f.write(json.dumps({'key': key, **entry}, ensure_ascii=False) + "\n")
+            tmp_path.replace(self.ledger_file)
+            logger.info(f"Skompaktowano rejestr transkodowań: {line_count} -> {len(self._entries or {})} wpisów.")
+        except OSError as e:
+            logger.error(f"Błąd kompaktowania rejestru transkodowań: {e}", exc_info=True)
+
+    def _append(self, key: str, entry: Dict[str, Any]) -> None:
+        try:
+            self.ledger_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.ledger_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'key': key, **entry}, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.error(f"Błąd zapisu rejestru transkodowań: {e}", exc_info=True)
+
+    @staticmethod
+    def _make_key(source_path: Path, profile: EncodingProfile) -> str:
+        return f"{source_path.resolve()}|{profile.id}|{profile.compiled.params_hash}"
+
+    def lookup(self, source_path: Path, profile: EncodingProfile) -> Optional[Path]:
+        """Zwraca ścieżkę istniejącego, niezmienionego wyniku dla pliku i profilu albo None."""
+        fingerprint = file_fingerprint(source_path)
+        if fingerprint is None: return None
+        with self._lock:
+            entry = self._load().get(self._make_key(source_path, profile))
+        if not entry or entry.get('source_fingerprint') != fingerprint: return None
+        output_path = Path(entry['output_path'])
+        if file_fingerprint(output_path) != entry.get('output_fingerprint'):
+            logger.debug(f"Wpis rejestru dla '{source_path.name}' nieaktualny - wynik '{output_path}' zmieniony lub usunięty.")
+            return None
+        return output_path
+
+    def record(self, source_path: Path, profile: EncodingProfile, output_path: Path) -> None:
+        source_fingerprint = file_fingerprint(source_path)
+        output_fingerprint = file_fingerprint(output_path)
+        if source_fingerprint is None or output_fingerprint is None: return
+        key = self._make_key(source_path, profile)
+        entry = {
+            'source_fingerprint': source_fingerprint, 'output_path': str(output_path),
+            'output_fingerprint': output_fingerprint, 'completed_at': datetime.now().isoformat()
+        }
+        with self._lock:
+            # Zmieniony plik źródłowy zastępuje poprzedni wpis zamiast zostawiać go na zawsze
+            self._load()[key] = entry
+            self._append(key, entry)
+        logger.debug(f"Zapisano w rejestrze transkodowań: '{source_path.name}' -> '{output_path.name}'.")
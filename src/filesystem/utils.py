@@ -1,5 +1,7 @@
 # src/filesystem/utils.py
 import logging
+import os
+import shutil
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -31,3 +33,25 @@ logger = logging.getLogger(__name__)
 #         return f"{size_bytes/1024**2:.2f} MB"
 #     else:
 #         return f"{size_bytes/1024**3:.2f} GB"
+
+LINK_MODES = ('hardlink', 'symlink', 'copy')
+
+
+def link_or_copy_file(source_path: Path, target_path: Path, mode: str = 'hardlink') -> str:
+    """
+    Tworzy target_path jako twarde dowiązanie, dowiązanie symboliczne lub kopię source_path.
+    Twarde dowiązanie między różnymi systemami plików nie jest możliwe - wtedy plik jest kopiowany.
+    Zwraca faktycznie użyty tryb. Błędy kopiowania są zgłaszane jako OSError.
+    """
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    if mode == 'hardlink':
+        try:
+            os.link(source_path, target_path)
+            return 'hardlink'
+        except OSError as e:
+            logger.debug(f"Twarde dowiązanie '{target_path.name}' niemożliwe ({e}). Kopiowanie pliku.")
+    elif mode == 'symlink':
+        target_path.symlink_to(source_path.resolve())
+        return 'symlink'
+    shutil.copy2(source_path, target_path)
+    return 'copy'
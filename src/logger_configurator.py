@@ -1,18 +1,27 @@
 # src/logger_configurator.py
 import logging
+import importlib.util
 import sys
 from pathlib import Path
 from typing import Union, Optional
 from datetime import datetime
 
-try:
-    from rich.logging import RichHandler
-    from rich.console import Console as RichConsole 
-    RICH_LOGGING_AVAILABLE = True
-except ImportError:
-    RICH_LOGGING_AVAILABLE = False
-    RichHandler = None # type: ignore
-    RichConsole = None # type: ignore
+# RichHandler importowany dopiero, gdy logowanie na konsolę jest włączone
+RICH_LOGGING_AVAILABLE = importlib.util.find_spec("rich") is not None
+RichHandler = None # type: ignore
+RichConsole = None # type: ignore
+
+
+def _load_rich_logging() -> bool:
+    global RichHandler, RichConsole
+    if RichHandler is not None: return True
+    if not RICH_LOGGING_AVAILABLE: return False
+    try:
+        from rich.logging import RichHandler
+        from rich.console import Console as RichConsole
+    except ImportError:
+        return False
+    return True
 
 class LoggerConfigurator:
     """
@@ -61,7 +70,7 @@ class LoggerConfigurator:
         # --- Console Handler ---
         if console_logging_enabled:
             console_handler_instance: Optional[logging.Handler] = None
-            if RICH_LOGGING_AVAILABLE and RichHandler is not None and RichConsole is not None:
+            if _load_rich_logging() and RichHandler is not None and RichConsole is not None:
                 # Użyj RichHandler dla lepszego formatowania
                 console_handler_instance = RichHandler(
                     level=log_level_console, # Poziom dla tego handlera
@@ -1,15 +1,102 @@
 # src/models.py
 import json
+import sys
 import uuid
+import hashlib
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-import re
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+HDR_TRANSFER_CHARACTERISTICS = ('smpte2084', 'arib-std-b67')
+
+def intern_str(value: Any) -> Any:
+    """Internuje powtarzalne napisy (kodeki, statusy, formaty), by 100k obiektów dzieliło jedną kopię."""
+    return _sys_intern(value) if value.__class__ is str else value
+
+_sys_intern = sys.intern
+
+def _optional_int(value: Any) -> Optional[int]:
+    if value is None or value == '' or value == 'N/A': return None
+    try: return int(value)
+    except (ValueError, TypeError): return None
+
+def _optional_float(value: Any) -> Optional[float]:
+    if value is None or value == '' or value == 'N/A': return None
+    try: return float(value)
+    except (ValueError, TypeError): return None
+
+class StreamInfo:
+    """
+    Zwięzły opis pojedynczego strumienia z wyniku FFprobe (-show_streams).
+    Serializowane są tylko pola, które mają wartość.
+    """
+    FIELDS = ('index', 'codec_type', 'codec_name', 'profile', 'width', 'height', 'pix_fmt', 'bit_depth',
+              'color_space', 'color_transfer', 'color_primaries', 'has_hdr_side_data', 'frame_rate', 'nb_frames',
+              'bit_rate', 'duration', 'channels', 'channel_layout', 'sample_rate', 'language', 'title',
+              'is_default', 'is_forced')
+    __slots__ = FIELDS
+
+    # Jawne przypisania zamiast pętli po FIELDS - konstruktor jest wołany dla każdego strumienia przy wczytywaniu zadania
+    def __init__(self, index: int, codec_type: Optional[str], codec_name: Optional[str] = None, profile: Optional[str] = None,
+                 width: Optional[int] = None, height: Optional[int] = None, pix_fmt: Optional[str] = None, bit_depth: Optional[int] = None,
+                 color_space: Optional[str] = None, color_transfer: Optional[str] = None, color_primaries: Optional[str] = None,
+                 has_hdr_side_data: Optional[bool] = None, frame_rate: Optional[str] = None, nb_frames: Optional[int] = None,
+                 bit_rate: Optional[int] = None, duration: Optional[float] = None, channels: Optional[int] = None,
+                 channel_layout: Optional[str] = None, sample_rate: Optional[int] = None, language: Optional[str] = None,
+                 title: Optional[str] = None, is_default: Optional[bool] = None, is_forced: Optional[bool] = None):
+        self.index = index; self.codec_type = intern_str(codec_type); self.codec_name = intern_str(codec_name); self.profile = intern_str(profile)
+        self.width = width; self.height = height; self.pix_fmt = intern_str(pix_fmt); self.bit_depth = bit_depth
+        self.color_space = intern_str(color_space); self.color_transfer = intern_str(color_transfer); self.color_primaries = intern_str(color_primaries)
+        self.has_hdr_side_data = has_hdr_side_data; self.frame_rate = intern_str(frame_rate); self.nb_frames = nb_frames
+        self.bit_rate = bit_rate; self.duration = duration; self.channels = channels
+        self.channel_layout = intern_str(channel_layout); self.sample_rate = sample_rate; self.language = intern_str(language)
+        self.title = title; self.is_default = is_default; self.is_forced = is_forced
+
+    @property
+    def is_hdr(self) -> bool:
+        return bool(self.has_hdr_side_data) or self.color_transfer in HDR_TRANSFER_CHARACTERISTICS
+
+    @classmethod
+    def from_ffprobe_stream(cls, stream: Dict[str, Any]) -> 'StreamInfo':
+        tags = stream.get('tags') or {}
+        disposition = stream.get('disposition') or {}
+        frame_rate = stream.get('r_frame_rate')
+        if not frame_rate or frame_rate == "0/0": frame_rate = stream.get('avg_frame_rate')
+        bit_depth = _optional_int(stream.get('bits_per_raw_sample'))
+        side_data_types = [str(item.get('side_data_type', '')) for item in stream.get('side_data_list') or []]
+        return cls(
+            index=_optional_int(stream.get('index')) or 0, codec_type=stream.get('codec_type'), codec_name=stream.get('codec_name'),
+            profile=stream.get('profile'), width=_optional_int(stream.get('width')), height=_optional_int(stream.get('height')),
+            pix_fmt=stream.get('pix_fmt'), bit_depth=bit_depth, color_space=stream.get('color_space'),
+            color_transfer=stream.get('color_transfer'), color_primaries=stream.get('color_primaries'),
+            has_hdr_side_data=any('Mastering display' in t or 'Content light level' in t or 'DOVI' in t for t in side_data_types) or None,
+            frame_rate=frame_rate if frame_rate and frame_rate != "0/0" else None,
+            nb_frames=_optional_int(stream.get('nb_frames')), bit_rate=_optional_int(stream.get('bit_rate')),
+            duration=_optional_float(stream.get('duration')), channels=_optional_int(stream.get('channels')),
+            channel_layout=stream.get('channel_layout'), sample_rate=_optional_int(stream.get('sample_rate')),
+            language=tags.get('language'), title=tags.get('title'),
+            is_default=bool(disposition.get('default')) or None, is_forced=bool(disposition.get('forced')) or None
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {'index': self.index, 'codec_type': self.codec_type}
+        for field_name in self.FIELDS[2:]:
+            value = getattr(self, field_name)
+            if value is not None: data[field_name] = value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StreamInfo':
+        try: return cls(**data)
+        except TypeError: return cls(**{k: v for k, v in data.items() if k in cls.FIELDS}) # Nieznane klucze (np. z nowszej wersji)
+
 class MediaInfo:
+    __slots__ = ('file_path', 'duration', 'video_codec', 'audio_codec', 'width', 'height', 'format_name',
+                 'bit_rate', 'frame_rate', 'error_message', '_streams')
+
     def __init__(self,
                  file_path: Path,
                  duration: Optional[float] = None,
@@ -20,17 +107,42 @@ class MediaInfo:
                  format_name: Optional[str] = None,
                  bit_rate: Optional[int] = None,
                  frame_rate: Optional[str] = None,
-                 error_message: Optional[str] = None):
+                 error_message: Optional[str] = None,
+                 streams: Optional[List[StreamInfo]] = None):
         self.file_path = file_path
         self.duration = duration
-        self.video_codec = video_codec
-        self.audio_codec = audio_codec
+        self.video_codec = intern_str(video_codec)
+        self.audio_codec = intern_str(audio_codec)
         self.width = width
         self.height = height
-        self.format_name = format_name
+        self.format_name = intern_str(format_name)
         self.bit_rate = bit_rate
-        self.frame_rate = frame_rate
+        self.frame_rate = intern_str(frame_rate)
         self.error_message = error_message
+        # Spis strumieni jest opcjonalny: bez niego (np. MediaInfo z błędem) nie jest alokowana nawet pusta lista
+        self._streams: Optional[List[StreamInfo]] = streams or None
+
+    @property
+    def streams(self) -> List[StreamInfo]:
+        return self._streams if self._streams is not None else []
+
+    @streams.setter
+    def streams(self, value: Optional[List[StreamInfo]]) -> None:
+        self._streams = value or None
+
+    def streams_of_type(self, codec_type: str) -> List[StreamInfo]:
+        return [stream for stream in self.streams if stream.codec_type == codec_type]
+
+    @property
+    def video_streams(self) -> List[StreamInfo]: return self.streams_of_type('video')
+    @property
+    def audio_streams(self) -> List[StreamInfo]: return self.streams_of_type('audio')
+    @property
+    def subtitle_streams(self) -> List[StreamInfo]: return self.streams_of_type('subtitle')
+
+    @property
+    def primary_video_stream(self) -> Optional[StreamInfo]:
+        return next((stream for stream in self.streams if stream.codec_type == 'video'), None)
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -38,7 +150,8 @@ class MediaInfo:
             'video_codec': self.video_codec, 'audio_codec': self.audio_codec,
             'width': self.width, 'height': self.height,
             'format_name': self.format_name, 'bit_rate': self.bit_rate,
-            'frame_rate': self.frame_rate, 'error_message': self.error_message
+            'frame_rate': self.frame_rate, 'error_message': self.error_message,
+            'streams': [stream.to_dict() for stream in self._streams] if self._streams else []
         }
 
     @classmethod
@@ -53,12 +166,95 @@ class MediaInfo:
             file_path=file_path, duration=data.get('duration'), video_codec=data.get('video_codec'),
             audio_codec=data.get('audio_codec'), width=data.get('width'), height=data.get('height'),
             format_name=data.get('format_name'), bit_rate=data.get('bit_rate'),
-            frame_rate=data.get('frame_rate'), error_message=data.get('error_message')
+            frame_rate=data.get('frame_rate'), error_message=data.get('error_message'),
+            streams=[s if isinstance(s, StreamInfo) else StreamInfo.from_dict(s) for s in data.get('streams') or [] if isinstance(s, (dict, StreamInfo))]
         )
 
+def parse_bitrate_value(value: str) -> Optional[int]:
+    """Zamienia wartość bitrate FFmpeg ('2500k', '5M', '128000') na bity/s."""
+    val_str = value.strip().lower(); multiplier = 1
+    if val_str.endswith('k'): val_str = val_str[:-1]; multiplier = 1000
+    elif val_str.endswith('m'): val_str = val_str[:-1]; multiplier = 1000000
+    try: return int(float(val_str) * multiplier)
+    except ValueError: return None
+
+_STREAM_CODEC_OPTIONS = {'v': ('-c:v', '-codec:v', '-vcodec'), 'a': ('-c:a', '-codec:a', '-acodec'), 's': ('-c:s', '-codec:s', '-scodec')}
+
+class CompiledProfile:
+    """
+    Jednorazowo sparsowane parametry EncodingProfile: docelowe kodeki, bitrate, CRF, preset,
+    wątki i filtry oraz stabilny skrót parametrów. Tworzony przez Profiler przy ładowaniu
+    i aktualizacji profilu, aby reszta aplikacji nie analizowała ffmpeg_params ponownie.
+    """
+    def __init__(self, params: List[str], output_extension: str):
+        self.source_key: Tuple[Tuple[str, ...], str] = (tuple(params), output_extension)
+        self.codecs: Dict[str, Optional[str]] = {'v': None, 'a': None, 's': None}
+        self.bitrates: Dict[str, Optional[int]] = {'v': None, 'a': None}
+        self.maxrate_bps: Optional[int] = None; self.bufsize_bps: Optional[int] = None
+        self.crf: Optional[float] = None; self.preset: Optional[str] = None; self.tune: Optional[str] = None
+        self.threads: Optional[int] = None
+        self.video_filters: Optional[str] = None; self.audio_filters: Optional[str] = None; self.filter_complex: Optional[str] = None
+        self.maps: List[str] = []
+        self._parse(params)
+        payload = json.dumps({'params': list(params), 'ext': output_extension}, sort_keys=True)
+        self.params_hash = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+    def _parse(self, params: List[str]) -> None:
+        generic_codec: Optional[str] = None
+        for i, param in enumerate(params):
+            value = params[i + 1] if i + 1 < len(params) else None
+            if value is None: break
+            if param in ('-c', '-codec'): generic_codec = value
+            for stream_type, options in _STREAM_CODEC_OPTIONS.items():
+                if param in options and not value.startswith('-'): self.codecs[stream_type] = value
+            if param in ('-b:v', '-b:a'):
+                self.bitrates[param[-1]] = parse_bitrate_value(value)
+                if self.bitrates[param[-1]] is None: logger.warning(f"Nie można sparsować wartości bitrate: '{value}' dla strumienia '{param[-1]}'")
+            elif param in ('-maxrate', '-maxrate:v'): self.maxrate_bps = parse_bitrate_value(value)
+            elif param in ('-bufsize', '-bufsize:v'): self.bufsize_bps = parse_bitrate_value(value)
+            elif param in ('-crf', '-crf:v'):
+                try: self.crf = float(value)
+                except ValueError: logger.warning(f"Nie można sparsować wartości CRF: '{value}'")
+            elif param in ('-preset', '-preset:v'): self.preset = value
+            elif param in ('-tune', '-tune:v'): self.tune = value
+            elif param == '-threads':
+                try: self.threads = int(value)
+                except ValueError: logger.warning(f"Nie można sparsować liczby wątków: '{value}'")
+            elif param in ('-vf', '-filter:v'): self.video_filters = value
+            elif param in ('-af', '-filter:a'): self.audio_filters = value
+            elif param in ('-filter_complex', '-lavfi'): self.filter_complex = value
+            elif param == '-map': self.maps.append(value)
+        if generic_codec:
+            for stream_type in self.codecs:
+                if self.codecs[stream_type] is None: self.codecs[stream_type] = generic_codec
+
+    @property
+    def video_codec(self) -> Optional[str]: return self.codecs['v']
+    @property
+    def audio_codec(self) -> Optional[str]: return self.codecs['a']
+    @property
+    def video_bitrate_bps(self) -> Optional[int]: return self.bitrates['v']
+    @property
+    def audio_bitrate_bps(self) -> Optional[int]: return self.bitrates['a']
+
+    def is_stream_copy(self, stream_type: str) -> bool:
+        return self.codecs.get(stream_type) == 'copy'
+
+    @property
+    def has_filters(self) -> bool:
+        return bool(self.video_filters or self.audio_filters or self.filter_complex)
+
 class EncodingProfile:
     def __init__(self, id: uuid.UUID, name: str, description: Optional[str], ffmpeg_params: List[str], output_extension: str, output_settings: Optional[Dict[str, Any]] = None):
         self.id = id; self.name = name; self.description = description if description else ""; self.ffmpeg_params = ffmpeg_params; self.output_extension = output_extension.lstrip('.'); self.output_settings = output_settings if output_settings is not None else {}
+        self._compiled: Optional[CompiledProfile] = None
+    def compile(self) -> CompiledProfile:
+        self._compiled = CompiledProfile(self.ffmpeg_params, self.output_extension); return self._compiled
+    @property
+    def compiled(self) -> CompiledProfile:
+        # Ponowna kompilacja tylko, gdy parametry zmieniono po kompilacji (np. edycja w miejscu)
+        if self._compiled is None or self._compiled.source_key != (tuple(self.ffmpeg_params), self.output_extension): return self.compile()
+        return self._compiled
     def to_dict(self) -> Dict[str, Any]: return {'id': str(self.id), 'name': self.name, 'description': self.description, 'ffmpeg_params': self.ffmpeg_params, 'output_extension': self.output_extension, 'output_settings': self.output_settings}
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'EncodingProfile':
@@ -130,9 +326,19 @@ class RepairProfile:
         )
 
 class ProcessedFile:
-    def __init__(self, file_id: uuid.UUID, original_path: Path, status: str, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None, duration_seconds: Optional[float] = None, output_path: Optional[Path] = None, error_message: Optional[str] = None, media_info: Optional[MediaInfo] = None):
+    __slots__ = ('file_id', 'original_path', '_status', 'start_time', 'end_time', 'duration_seconds', 'output_path', 'error_message', 'media_info', 'completed_segments', 'segment_duration_seconds', 'duplicate_of')
+    def __init__(self, file_id: uuid.UUID, original_path: Path, status: str, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None, duration_seconds: Optional[float] = None, output_path: Optional[Path] = None, error_message: Optional[str] = None, media_info: Optional[MediaInfo] = None, completed_segments: Optional[List[int]] = None, segment_duration_seconds: Optional[float] = None, duplicate_of: Optional[uuid.UUID] = None):
         self.file_id = file_id; self.original_path = original_path; self.status = status; self.start_time = start_time; self.end_time = end_time; self.duration_seconds = duration_seconds; self.output_path = output_path; self.error_message = error_message; self.media_info = media_info
-    def to_dict(self) -> Dict[str, Any]: return {'file_id': str(self.file_id), 'original_path': str(self.original_path), 'status': self.status, 'start_time': self.start_time.isoformat() if self.start_time else None, 'end_time': self.end_time.isoformat() if self.end_time else None, 'duration_seconds': self.duration_seconds, 'output_path': str(self.output_path) if self.output_path else None, 'error_message': self.error_message, 'media_info': self.media_info.to_dict() if self.media_info else None}
+        # Checkpoint transkodowania segmentowego: indeksy ukończonych segmentów i ich długość.
+        # Lista jest zawsze podmieniana w całości (nie modyfikowana w miejscu), więc brak checkpointu to współdzielona pusta krotka.
+        self.completed_segments: List[int] = completed_segments if completed_segments else (); self.segment_duration_seconds = segment_duration_seconds
+        # Plik identyczny z innym plikiem zadania - wynik reprezentanta jest linkowany/kopiowany zamiast kodowania
+        self.duplicate_of = duplicate_of
+    @property
+    def status(self) -> str: return self._status
+    @status.setter
+    def status(self, value: str) -> None: self._status = intern_str(value)
+    def to_dict(self) -> Dict[str, Any]: return {'file_id': str(self.file_id), 'original_path': str(self.original_path), 'status': self.status, 'start_time': self.start_time.isoformat() if self.start_time else None, 'end_time': self.end_time.isoformat() if self.end_time else None, 'duration_seconds': self.duration_seconds, 'output_path': str(self.output_path) if self.output_path else None, 'error_message': self.error_message, 'media_info': self.media_info.to_dict() if self.media_info else None, 'completed_segments': list(self.completed_segments), 'segment_duration_seconds': self.segment_duration_seconds, 'duplicate_of': str(self.duplicate_of) if self.duplicate_of else None}
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'ProcessedFile':
         file_id_val = data['file_id']; file_id = file_id_val if isinstance(file_id_val, uuid.UUID) else uuid.UUID(str(file_id_val))
@@ -143,12 +349,22 @@ class ProcessedFile:
         duration_seconds = data.get('duration_seconds')
         output_path_val = data.get('output_path'); output_path = Path(str(output_path_val)) if output_path_val and not isinstance(output_path_val, Path) else output_path_val if isinstance(output_path_val, Path) else None
         error_message = data.get('error_message')
-        media_info_data = data.get('media_info'); media_info = MediaInfo.from_dict(media_info_data) if isinstance(media_info_data, dict) else media_info_data if isinstance(media_info_data, MediaInfo) else None
-        return cls(file_id=file_id, original_path=original_path, status=status, start_time=start_time, end_time=end_time, duration_seconds=duration_seconds, output_path=output_path, error_message=error_message, media_info=media_info)
+        media_info_data = data.get('media_info')
+        # MediaInfo zwykle opisuje ten sam plik - współdzielony obiekt Path zamiast ponownego parsowania ścieżki
+        if isinstance(media_info_data, dict) and media_info_data.get('file_path') == original_path_val: media_info_data = dict(media_info_data, file_path=original_path)
+        media_info = MediaInfo.from_dict(media_info_data) if isinstance(media_info_data, dict) else media_info_data if isinstance(media_info_data, MediaInfo) else None
+        completed_segments_val = data.get('completed_segments'); completed_segments = [int(i) for i in completed_segments_val] if isinstance(completed_segments_val, list) else []
+        duplicate_of_val = data.get('duplicate_of'); duplicate_of = duplicate_of_val if isinstance(duplicate_of_val, uuid.UUID) else uuid.UUID(str(duplicate_of_val)) if duplicate_of_val else None
+        return cls(file_id=file_id, original_path=original_path, status=status, start_time=start_time, end_time=end_time, duration_seconds=duration_seconds, output_path=output_path, error_message=error_message, media_info=media_info, completed_segments=completed_segments, segment_duration_seconds=data.get('segment_duration_seconds'), duplicate_of=duplicate_of)
 
 class JobState:
+    __slots__ = ('job_id', 'source_directory', 'selected_profile_id', '_status', 'start_time', 'processed_files', 'total_files', 'end_time', 'error_message')
     def __init__(self, job_id: uuid.UUID, source_directory: Path, selected_profile_id: uuid.UUID, status: str, start_time: datetime, processed_files: List[ProcessedFile], total_files: int = 0, end_time: Optional[datetime] = None, error_message: Optional[str] = None):
         self.job_id = job_id; self.source_directory = source_directory; self.selected_profile_id = selected_profile_id; self.status = status; self.start_time = start_time; self.processed_files = processed_files if processed_files is not None else []; self.total_files = total_files; self.end_time = end_time; self.error_message = error_message
+    @property
+    def status(self) -> str: return self._status
+    @status.setter
+    def status(self, value: str) -> None: self._status = intern_str(value)
     def to_dict(self) -> Dict[str, Any]: return {'job_id': str(self.job_id), 'source_directory': str(self.source_directory), 'selected_profile_id': str(self.selected_profile_id), 'status': self.status, 'start_time': self.start_time.isoformat(), 'processed_files': [pf.to_dict() for pf in self.processed_files], 'total_files': self.total_files, 'end_time': self.end_time.isoformat() if self.end_time else None, 'error_message': self.error_message}
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'JobState':
@@ -180,26 +396,3 @@ class AppJSONEncoder(json.JSONEncoder):
         if isinstance(obj, uuid.UUID): return str(obj)
         if hasattr(obj, 'to_dict') and callable(getattr(obj, 'to_dict')): return obj.to_dict()
         return super().default(obj)
-
-class AppJSONDecoder(json.JSONDecoder):
-    def __init__(self, *args: Any, **kwargs: Any) -> None:
-        super().__init__(object_hook=self.object_hook, *args, **kwargs)
-    def object_hook(self, dct: Dict[str, Any]) -> Any:
-        for key, value in dct.items():
-            if isinstance(value, str):
-                if re.fullmatch(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d{1,6})?([+-]\d{2}:\d{2}|Z)?', value):
-                    try: dct[key] = datetime.fromisoformat(value); continue
-                    except ValueError: pass
-                if re.fullmatch(r'[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}', value):
-                    try: dct[key] = uuid.UUID(value); continue
-                    except ValueError: pass
-        
-        if 'job_id' in dct and 'selected_profile_id' in dct and 'source_directory' in dct : return JobState.from_dict(dct)
-        elif 'file_id' in dct and 'original_path' in dct and 'status' in dct: return ProcessedFile.from_dict(dct)
-        elif 'id' in dct and 'name' in dct and 'ffmpeg_params' in dct and 'applies_to_mkv_only' in dct and 'copy_tags' in dct: # Sprawdź RepairProfile
-            return RepairProfile.from_dict(dct)
-        elif 'id' in dct and 'name' in dct and 'ffmpeg_params' in dct and 'output_extension' in dct:
-            return EncodingProfile.from_dict(dct)
-        elif 'file_path' in dct and ('duration' in dct or 'error_message' in dct or 'video_codec' in dct or 'format_name' in dct or 'bit_rate' in dct or 'frame_rate' in dct):
-             return MediaInfo.from_dict(dct)
-        return dct
@@ -2,14 +2,15 @@
 import json
 import logging
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import uuid # Import uuid do generowania ID profili
 import sys # Dla sys.exit przy krytycznych błędach
 
 # Import ConfigManager do dostępu do konfiguracji
 from .config_manager import ConfigManager
 # Import modeli do wskazówek typów i (de)serializacji
-from .models import EncodingProfile, AppJSONEncoder, AppJSONDecoder # Import niestandardowego enkodera/dekodera
+from .models import EncodingProfile, AppJSONEncoder # Import niestandardowego enkodera
+from .state_codec import read_json_file, decode_encoding_profiles
 
 logger = logging.getLogger(__name__)
 
@@ -77,10 +78,7 @@ class Profiler:
             return []
 
         try:
-            with open(self.profiles_file_path, 'r', encoding='utf-8') as f:
-                # Użyj niestandardowego dekodera do obsługi obiektów Path (choć mało prawdopodobne dla profili)
-                # i do zapewnienia poprawnego tworzenia obiektów ze słowników
-                raw_profiles_data = json.load(f, cls=AppJSONDecoder)
+            raw_profiles_data = decode_encoding_profiles(read_json_file(self.profiles_file_path))
 
             if not isinstance(raw_profiles_data, list):
                 logger.error(f"Profiler: Zawartość pliku profili nie jest listą. Znaleziono: {type(raw_profiles_data)}. Zwracanie pustej listy.")
@@ -90,10 +88,12 @@ class Profiler:
             for profile_data in raw_profiles_data:
                 try:
                     # Sprawdź, czy profile_data jest słownikiem, zanim przekażesz do from_dict
-                    if isinstance(profile_data, EncodingProfile): # Jeśli AppJSONDecoder już przekonwertował
+                    if isinstance(profile_data, EncodingProfile): # Zdekodowany już przez decode_encoding_profiles
+                        profile_data.compile()
                         loaded_profiles.append(profile_data)
                     elif isinstance(profile_data, dict):
                         profile = EncodingProfile.from_dict(profile_data)
+                        profile.compile()
                         loaded_profiles.append(profile)
                     else:
                         logger.warning(f"Profiler: Pomijanie nieprawidłowego wpisu profilu (nie jest słownikiem ani EncodingProfile): {profile_data}")
@@ -119,17 +119,41 @@ class Profiler:
             return [] # Zwróć pustą listę w przypadku błędu
 
     def _save_profiles(self):
-        """Zapisuje bieżącą listę obiektów EncodingProfile do pliku JSON."""
+        """Zapisuje bieżącą listę obiektów EncodingProfile do pliku JSON (przez plik tymczasowy, bez okna na częściowy odczyt)."""
         logger.debug(f"Profiler: Zapisywanie {len(self.profiles)} profili do {self.profiles_file_path}")
+        tmp_path = self.profiles_file_path.with_name(f"{self.profiles_file_path.name}.tmp")
         try:
             # Konwertuj listę obiektów EncodingProfile na listę słowników
             # Używamy AppJSONEncoder, który wywoła metodę to_dict() dla każdego EncodingProfile
-            with open(self.profiles_file_path, 'w', encoding='utf-8') as f:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 json.dump(self.profiles, f, indent=4, cls=AppJSONEncoder) # Użyj niestandardowego enkodera
+            tmp_path.replace(self.profiles_file_path)
             logger.info(f"Profiler: Pomyślnie zapisano {len(self.profiles)} profili.")
         except Exception as e:
             logger.error(f"Profiler: Błąd zapisu profili do {self.profiles_file_path}: {e}", exc_info=True)
 
+    def reload_profiles(self) -> Tuple[bool, Optional[str]]:
+        """
+        Przeładowanie profili w działającej aplikacji (zmiana pliku wykryta przez ConfigWatcher).
+        Lista jest podmieniana w całości i tylko wtedy, gdy każdy wpis da się zdekodować i skompilować;
+        w przeciwnym razie obowiązują dotychczasowe profile, a plik zostaje nietknięty.
+        """
+        self.profiles_file_path = self.config_manager.get_profiles_file_full_path()
+        try:
+            raw_profiles_data = decode_encoding_profiles(read_json_file(self.profiles_file_path))
+        except (OSError, ValueError) as e:
+            return False, f"Nie można wczytać profili z {self.profiles_file_path}: {e}"
+        if not isinstance(raw_profiles_data, list): return False, f"Zawartość {self.profiles_file_path} nie jest listą profili."
+        new_profiles: List[EncodingProfile] = []
+        for profile_data in raw_profiles_data:
+            if not isinstance(profile_data, EncodingProfile): return False, f"Nieprawidłowy wpis profilu: {profile_data!r}"
+            try: profile_data.compile()
+            except (ValueError, TypeError) as e: return False, f"Nie można skompilować profilu '{profile_data.name}': {e}"
+            new_profiles.append(profile_data)
+        self.profiles = new_profiles
+        logger.info(f"Profiler: Przeładowano {len(new_profiles)} profili z {self.profiles_file_path}.")
+        return True, None
+
     def add_profile(self, profile: EncodingProfile, save: bool = True) -> EncodingProfile:
         """Dodaje nowy profil kodowania."""
         logger.debug(f"Profiler: Próba dodania profilu: {profile.name}")
@@ -146,6 +170,7 @@ class Profiler:
             logger.warning(f"Profiler: Profil o nazwie '{profile.name}' już istnieje. Nie dodawanie duplikatu.")
             raise ValueError(f"Profil o nazwie '{profile.name}' już istnieje.")
 
+        profile.compile()
         self.profiles.append(profile)
         if save:
             self._save_profiles()
@@ -194,6 +219,7 @@ class Profiler:
                     logger.warning(f"Profiler: Nie można zaktualizować profilu. Inny profil o nazwie '{updated_profile.name}' już istnieje.")
                     raise ValueError(f"Inny profil o nazwie '{updated_profile.name}' już istnieje.")
 
+                updated_profile.compile()
                 self.profiles[i] = updated_profile
                 self._save_profiles()
                 logger.info(f"Profiler: Pomyślnie zaktualizowano profil: {updated_profile.name} (ID: {updated_profile.id}).")
@@ -0,0 +1,224 @@
+# src/progress_dashboard.py
+import importlib.util
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .transcoding_display_formatter import TranscodingDisplayFormatter
+from .ffmpeg.transcoder import parse_speed_factor
+from .ffmpeg.process_supervisor import peek_process_supervisor
+from .system_monitor.process_sampler import ChildProcessSampler
+from .system_monitor.resource_monitor import ResourceMonitor
+from . import cli_styles as styles
+
+logger = logging.getLogger(__name__)
+
+# Rich ładowany dopiero przy pierwszym pulpicie (szybszy start aplikacji)
+RICH_DASHBOARD_AVAILABLE = importlib.util.find_spec("rich") is not None
+Live, Table, Panel, Text, Group = (None,) * 5 # type: ignore
+
+
+def _load_rich_dashboard_components() -> bool:
+    global Live, Table, Panel, Text, Group
+    if Live is not None: return True
+    if not RICH_DASHBOARD_AVAILABLE: return False
+    try:
+        from rich.live import Live
+        from rich.table import Table
+        from rich.panel import Panel
+        from rich.text import Text
+        from rich.console import Group
+    except ImportError:
+        return False
+    return True
+
+
+WorkerKey = Union[int, str]
+SYSTEM_INFO_REFRESH_SECONDS = 1.0
+
+
+class WorkerProgress:
+    """Niezmienna migawka postępu jednego pracownika (jednego kodowanego pliku)."""
+    __slots__ = ('file_name', 'percentage', 'elapsed_seconds', 'fps', 'speed', 'eta_seconds', 'output_size', 'media_duration', 'output_path')
+
+    def __init__(self, file_name: str, percentage: float = 0.0, elapsed_seconds: Optional[float] = None, fps: Optional[float] = None,
+                 speed: Optional[str] = None, eta_seconds: Optional[float] = None, output_size: Optional[str] = None,
+                 media_duration: Optional[float] = None, output_path: Optional[str] = None):
+        self.file_name = file_name
+        self.percentage = percentage
+        self.elapsed_seconds = elapsed_seconds
+        self.fps = fps
+        self.speed = speed
+        self.eta_seconds = eta_seconds
+        self.output_size = output_size
+        self.media_duration = media_duration
+        self.output_path = output_path
+
+    @property
+    def remaining_media_seconds(self) -> Optional[float]:
+        if not self.media_duration: return None
+        return max(0.0, self.media_duration * (1.0 - self.percentage / 100.0))
+
+
+class ProgressBoard:
+    """
+    Wspólne migawki postępu wszystkich aktywnych pracowników zadania. Producent (wątek ffmpeg)
+    wykonuje tylko podmianę wpisu słownika na nowy WorkerProgress; czytelnik (pulpit Rich) bierze
+    kopię słownika przy każdym odświeżeniu. Zawiera też stan kolejki potrzebny do ETA zadania.
+    """
+    def __init__(self, job_label: str = "", total_files: int = 0):
+        self.job_label = job_label
+        self.total_files = total_files
+        self.completed_files = 0
+        self.failed_files = 0
+        self.queued_files = 0
+        self.queued_media_seconds = 0.0
+        self.completed_media_seconds = 0.0
+        self.started_at = time.time()
+        self._workers: Dict[WorkerKey, WorkerProgress] = {}
+        self._finish_lock = threading.Lock()
+
+    def set_queue(self, queued_files: int, queued_media_seconds: float) -> None:
+        self.queued_files = queued_files
+        self.queued_media_seconds = max(0.0, queued_media_seconds)
+
+    def start_worker(self, worker_key: WorkerKey, file_name: str, media_duration: Optional[float] = None) -> None:
+        self._workers[worker_key] = WorkerProgress(file_name, media_duration=media_duration)
+
+    def finish_worker(self, worker_key: WorkerKey, success: bool) -> None:
+        with self._finish_lock:
+            worker = self._workers.pop(worker_key, None)
+            if success:
+                self.completed_files += 1
+                if worker is not None and worker.media_duration: self.completed_media_seconds += worker.media_duration
+            else: self.failed_files += 1
+
+    def progress_callback(self, percentage: float, elapsed_time: float, file_name: str,
+                          file_index: Optional[int] = None, total_files_in_job: Optional[int] = None,
+                          fps: Optional[float] = None, speed: Optional[str] = None,
+                          bitrate: Optional[str] = None, eta_seconds_file: Optional[float] = None,
+                          output_size_str: Optional[str] = None, output_file_path_str: Optional[str] = None) -> None:
+        """Wywołanie zwrotne zgodne z ProgressCallbackType - jedna podmiana wpisu, bez rysowania."""
+        worker_key: WorkerKey = file_index if file_index is not None else file_name
+        previous = self._workers.get(worker_key)
+        self._workers[worker_key] = WorkerProgress(file_name, percentage, elapsed_time, fps, speed, eta_seconds_file, output_size_str,
+                                                   previous.media_duration if previous is not None else None, output_file_path_str)
+
+    def workers(self) -> List[Tuple[WorkerKey, WorkerProgress]]:
+        return list(self._workers.copy().items())
+
+    def aggregate_speed(self, workers: List[Tuple[WorkerKey, WorkerProgress]]) -> Optional[float]:
+        """Łączna przepustowość (sekundy materiału na sekundę): suma prędkości aktywnych, a bez nich średnia z ukończonych."""
+        speeds = [s for s in (parse_speed_factor(w.speed) for _, w in workers) if s]
+        if speeds: return sum(speeds)
+        elapsed = time.time() - self.started_at
+        return self.completed_media_seconds / elapsed if self.completed_media_seconds > 0 and elapsed > 0 else None
+
+    def job_eta_seconds(self, workers: List[Tuple[WorkerKey, WorkerProgress]]) -> Optional[float]:
+        speed = self.aggregate_speed(workers)
+        if not speed: return None
+        remaining = self.queued_media_seconds + sum(w.remaining_media_seconds or 0.0 for _, w in workers)
+        return remaining / speed
+
+
+class LiveDashboard:
+    """
+    Pulpit Rich Live dla zadania transkodowania: wiersz na aktywnego pracownika (plik, %, FPS,
+    prędkość, ETA), zasoby procesów narzędzi, głębokość kolejki, łączna przepustowość, ETA zadania
+    i zasoby systemu.
+    Panele i tabele jak w MainRouter._generate_monitor_layout. Live odświeża widok z migawek ProgressBoard
+    ze stałą, ograniczoną częstotliwością; producenci postępu nigdy nie rysują.
+    """
+    def __init__(self, board: ProgressBoard, resource_monitor: Optional[ResourceMonitor] = None, refresh_rate: float = 4.0, console: Any = None):
+        self.board = board
+        self.resource_monitor = resource_monitor
+        self.refresh_rate = max(0.5, min(30.0, float(refresh_rate)))
+        self.console = console
+        self.formatter = TranscodingDisplayFormatter()
+        self._system_text: Any = None
+        self._system_text_time = 0.0
+
+    @staticmethod
+    def is_available() -> bool:
+        return _load_rich_dashboard_components()
+
+    def __rich__(self) -> Any:
+        # Wywoływane przez Live przy każdym odświeżeniu (w jego wątku)
+        # Panele jak w monitorze systemu, ale w Group zamiast Layout - pulpit jest rysowany w linii,
+        # pod wyjściem zadania, więc ma mieć wysokość treści, a nie całego terminala
+        workers = self.board.workers()
+        return Group(Panel(Text(f"🎬 Zadanie transkodowania {self.board.job_label}".rstrip(), justify="center", style=styles.RICH_STYLE_TABLE_TITLE)),
+                     self._workers_panel(workers), *self._processes_panels(), self._summary_panel(workers),
+                     Text("Ctrl+C przerywa zadanie", justify="center", style=styles.RICH_STYLE_FOOTER_TEXT))
+
+    def _workers_panel(self, workers: List[Tuple[WorkerKey, WorkerProgress]]) -> Any:
+        table = Table(box=None, expand=True, padding=(0, 1), show_edge=False)
+        table.add_column("#", style=styles.RICH_STYLE_SYSTEM_MONITOR_LABEL, justify="right", width=5)
+        table.add_column("Plik", style=styles.RICH_STYLE_SYSTEM_MONITOR_VALUE, overflow="ellipsis", no_wrap=True, ratio=1)
+        table.add_column("%", justify="right", width=7); table.add_column("FPS", justify="right", width=10)
+        table.add_column("Prędkość", justify="right", width=9); table.add_column("Czas", justify="right", width=9)
+        table.add_column("ETA", justify="right", width=9); table.add_column("Rozmiar", justify="right", width=11)
+        for worker_key, worker in sorted(workers, key=lambda item: str(item[0])):
+            table.add_row(str(worker_key), worker.file_name, self.formatter.format_percentage(worker.percentage),
+                          self.formatter.format_fps(worker.fps), self.formatter.format_speed(worker.speed),
+                          self.formatter.format_progress_time(worker.elapsed_seconds), self.formatter.format_eta(worker.eta_seconds),
+                          self.formatter.format_filesize(worker.output_size) if worker.output_size else "----")
+        if not workers: table.add_row("", Text("Oczekiwanie na kolejny plik...", style="dim"), "", "", "", "", "", "")
+        return Panel(table, title=f"[bold blue]⚙️ Aktywne kodowania ({len(workers)})[/bold blue]", border_style=styles.RICH_STYLE_PANEL_BORDER, title_align="left", expand=True)
+
+    def _processes_panels(self) -> List[Any]:
+        """Panel procesów narzędzi (CPU%, RSS, I/O, wątki z próbkowania psutil); pominięty, gdy brak odczytów."""
+        supervisor = peek_process_supervisor()
+        if supervisor is None or not ChildProcessSampler.is_available(): return []
+        samples = sorted(supervisor.active_usage_samples(), key=lambda s: (s.kind, s.pid))
+        if not samples: return []
+        table = Table(box=None, expand=True, padding=(0, 1), show_edge=False)
+        table.add_column("Narzędzie", style=styles.RICH_STYLE_SYSTEM_MONITOR_LABEL, no_wrap=True, ratio=1)
+        table.add_column("Rodzaj", width=10); table.add_column("PID", justify="right", width=8)
+        table.add_column("CPU", justify="right", width=7); table.add_column("RSS", justify="right", width=10)
+        table.add_column("Odczyt", justify="right", width=10); table.add_column("Zapis", justify="right", width=10)
+        table.add_column("Wątki", justify="right", width=6)
+        for sample in samples:
+            table.add_row(sample.tool_name, sample.kind, str(sample.pid), f"{sample.cpu_percent:.0f}%", self.formatter.format_bytes(sample.rss_bytes),
+                          self.formatter.format_bytes(sample.read_bytes) if sample.read_bytes is not None else "N/A",
+                          self.formatter.format_bytes(sample.write_bytes) if sample.write_bytes is not None else "N/A", str(sample.num_threads))
+        return [Panel(table, title=f"[bold blue]🔬 Procesy narzędzi ({len(samples)})[/bold blue]", border_style=styles.RICH_STYLE_PANEL_BORDER, title_align="left", expand=True)]
+
+    def _summary_panel(self, workers: List[Tuple[WorkerKey, WorkerProgress]]) -> Any:
+        board = self.board
+        speed = board.aggregate_speed(workers)
+        summary = Table(show_header=False, box=None, expand=True, padding=(0, 1), show_edge=False)
+        summary.add_column("Etykieta", style=styles.RICH_STYLE_SYSTEM_MONITOR_LABEL, justify="right", width=22)
+        summary.add_column("Wartość", style=styles.RICH_STYLE_SYSTEM_MONITOR_VALUE)
+        summary.add_row("📋 Pliki:", f"ukończone {board.completed_files}, błędy {board.failed_files}, w kolejce {board.queued_files} / {board.total_files}")
+        summary.add_row("🚀 Przepustowość:", f"{speed:.2f}x" if speed else "---x")
+        summary.add_row("⏳ Czas / ETA zadania:", f"{self.formatter.format_progress_time(time.time() - board.started_at)} / {self.formatter.format_eta(board.job_eta_seconds(workers))}")
+        summary.add_row("🖥️ Zasoby:", self._system_info_text(workers))
+        return Panel(summary, title="[bold blue]📊 Zadanie i system[/bold blue]", border_style=styles.RICH_STYLE_PANEL_BORDER, title_align="left", expand=True)
+
+    def _system_info_text(self, workers: List[Tuple[WorkerKey, WorkerProgress]]) -> Any:
+        now = time.time()
+        if self._system_text is not None and now - self._system_text_time < SYSTEM_INFO_REFRESH_SECONDS: return self._system_text
+        self._system_text_time = now
+        if not self.resource_monitor or not self.resource_monitor.is_available():
+            self._system_text = Text("Monitor zasobów niedostępny", style="dim"); return self._system_text
+        cpu_usage = self.resource_monitor.get_cpu_usage(); ram_usage = self.resource_monitor.get_ram_usage(); disk_usage = None
+        output_path = next((w.output_path for _, w in workers if w.output_path), None)
+        if output_path:
+            try: disk_usage = self.resource_monitor.get_specific_disk_usage(Path(output_path).parent)
+            except Exception as e: logger.debug(f"LiveDashboard: Błąd odczytu dysku dla '{output_path}': {e}")
+        cpu_style = styles.RICH_STYLE_CPU_NISKIE if cpu_usage is None or cpu_usage <= 75 else styles.RICH_STYLE_CPU_SREDNIE if cpu_usage <= 90 else styles.RICH_STYLE_CPU_WYSOKIE
+        self._system_text = Text.assemble(("CPU ", styles.RICH_STYLE_SYSTEM_MONITOR_LABEL), (f"{cpu_usage:.1f}%" if cpu_usage is not None else "N/A", cpu_style),
+                                          ("  RAM ", styles.RICH_STYLE_SYSTEM_MONITOR_LABEL), (f"{ram_usage['percent']:.1f}%" if ram_usage else "N/A", styles.RICH_STYLE_SYSTEM_MONITOR_VALUE),
+                                          ("  Dysk wyj. ", styles.RICH_STYLE_SYSTEM_MONITOR_LABEL), (f"{disk_usage['free_gb']:.1f} GB wolne" if disk_usage else "N/A", styles.RICH_STYLE_SYSTEM_MONITOR_VALUE))
+        return self._system_text
+
+    @contextmanager
+    def live(self) -> Iterator["LiveDashboard"]:
+        """Pokazuje pulpit na czas bloku (transient - po wyjściu znika, zostaje zwykłe wyjście zadania)."""
+        if not _load_rich_dashboard_components(): yield self; return
+        with Live(self, console=self.console, refresh_per_second=self.refresh_rate, transient=True, redirect_stdout=True, redirect_stderr=True):
+            yield self
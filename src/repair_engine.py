@@ -0,0 +1,304 @@
+# src/repair_engine.py
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, Future
+from pathlib import Path
+from typing import List, Optional, Tuple, Dict, Any, Callable
+
+from .config_manager import ConfigManager, DEFAULT_CONFIG
+from .ffmpeg.ffmpeg_manager import FFmpegManager
+from .filesystem.path_resolver import PathResolver
+from .filesystem.repair_history_manager import RepairHistoryManager
+from .filesystem.damaged_files_manager import DamagedFilesManager
+from .repair_profiler import RepairProfiler
+from .models import RepairProfile
+from .system_monitor.metrics import REPAIR_ATTEMPTS
+
+logger = logging.getLogger(__name__)
+
+REPAIR_CFG_BASE_PATH = 'processing.repair_options'
+FAILED_REPAIR_STATUS = "NaprawaNieudanaFull"
+FAILED_REPAIR_DETAILS = "Żadna aktywna strategia nie zadziałała."
+
+BulkRepairProgressCallback = Callable[[int, int, str, bool], None]
+# Górny limit wątków puli zbiorczej naprawy; faktyczną współbieżność wyznacza bieżące bulk_max_workers
+BULK_REPAIR_POOL_THREAD_CAP = 32
+
+
+class RaceOutcome:
+    """Wynik wyścigu strategii naprawy: zwycięska strategia, jej plik wyjściowy i porażki pozostałych."""
+    def __init__(self):
+        self.winner: Optional[Dict[str, Any]] = None
+        self.output_path: Optional[Path] = None
+        self.verified = False
+        self.failures: List[Tuple[str, str]] = []
+
+    @property
+    def success(self) -> bool:
+        return self.winner is not None
+
+
+class EntryRepairResult:
+    """Wynik nienadzorowanej naprawy jednego wpisu rejestru wraz ze zmianą rejestru do zatwierdzenia."""
+    def __init__(self, file_path: Optional[Path], success: bool, strategy_name: Optional[str] = None, output_path: Optional[Path] = None,
+                 verified: bool = False, error_message: Optional[str] = None, registry_status: Optional[Tuple[str, Optional[str]]] = None):
+        self.file_path = file_path
+        self.success = success
+        self.strategy_name = strategy_name
+        self.output_path = output_path
+        self.verified = verified
+        self.error_message = error_message
+        self.registry_status = registry_status  # (status, szczegóły) do ustawienia; None przy sukcesie lub braku zmiany
+
+
+class RepairEngine:
+    """
+    Buduje listę aktywnych strategii naprawy i wykonuje je na pliku - pojedynczo
+    albo w trybie wyścigu, w którym top-k strategii startuje równocześnie,
+    a pierwsza zweryfikowana naprawa anuluje pozostałe.
+    """
+    def __init__(self, config_manager: ConfigManager, ffmpeg_manager: FFmpegManager, repair_profiler: RepairProfiler, path_resolver: PathResolver):
+        self.config_manager = config_manager
+        self.ffmpeg_manager = ffmpeg_manager
+        self.repair_profiler = repair_profiler
+        self.path_resolver = path_resolver
+        self.history = RepairHistoryManager(config_manager)
+        logger.debug("RepairEngine zainicjalizowany.")
+
+    def build_active_strategies(self) -> List[Dict[str, Any]]:
+        active_strategies: List[Dict[str, Any]] = []
+
+        # 1. Wbudowane strategie (np. mkvmerge_remux)
+        default_builtin_strategies_info = DEFAULT_CONFIG.get('processing', {}).get('repair_options', {}).get('builtin_strategies_config', {})
+        for builtin_key, builtin_details in default_builtin_strategies_info.items():
+            is_strategy_enabled = self.config_manager.get_config_value(
+                REPAIR_CFG_BASE_PATH,
+                f"builtin_strategies_config.{builtin_key}.enabled",
+                default=builtin_details.get('enabled', False)
+            )
+            if is_strategy_enabled:
+                active_strategies.append({
+                    "id": f"builtin_{builtin_key}",
+                    "name": builtin_details.get('name', builtin_key),
+                    "type": "builtin",
+                    "handler_key": builtin_key
+                })
+                logger.debug(f"Strategia wbudowana '{builtin_details.get('name', builtin_key)}' jest AKTYWNA.")
+            else:
+                logger.debug(f"Strategia wbudowana '{builtin_details.get('name', builtin_key)}' jest WYŁĄCZONA.")
+
+        # 2. Niestandardowe Profile Naprawy FFmpeg
+        if self.config_manager.get_config_value(REPAIR_CFG_BASE_PATH, 'use_custom_ffmpeg_repair_profiles', True):
+            enabled_ffmpeg_profile_ids = self.config_manager.get_config_value(REPAIR_CFG_BASE_PATH, 'enabled_ffmpeg_profile_ids', [])
+            for profile in self.repair_profiler.get_all_profiles():
+                if str(profile.id) in enabled_ffmpeg_profile_ids:
+                    active_strategies.append({
+                        "id": str(profile.id),
+                        "name": profile.name,
+                        "type": "ffmpeg_profile",
+                        "profile_object": profile
+                    })
+                    logger.debug(f"Profil FFmpeg '{profile.name}' (ID: {profile.id}) jest AKTYWNY.")
+                else:
+                    logger.debug(f"Profil FFmpeg '{profile.name}' (ID: {profile.id}) jest WYŁĄCZONY (brak na liście enabled_ffmpeg_profile_ids).")
+        else:
+            logger.info("Używanie niestandardowych profili FFmpeg jest globalnie WYŁĄCZONE.")
+        return active_strategies
+
+    def order_strategies(self, strategies: List[Dict[str, Any]], history_keys: List[str]) -> List[Dict[str, Any]]:
+        """Ustawia strategie wg historii napraw podobnych plików (gdy learned_ordering jest włączone)."""
+        if len(strategies) < 2 or not self.config_manager.snapshot.processing.repair_options.learned_ordering: return strategies
+        scored = self.history.order_strategies(history_keys, strategies)
+        logger.debug(f"Kolejność strategii dla '{history_keys[0]}': " + ", ".join(f"{s['name']} ({score:.4f}/s)" for s, score in scored))
+        return [strategy for strategy, _ in scored]
+
+    def record_attempt(self, history_keys: Optional[List[str]], strategy: Dict[str, Any], success: bool, duration_seconds: float) -> None:
+        REPAIR_ATTEMPTS.inc(strategy=strategy['id'], outcome='success' if success else 'failure')
+        if history_keys: self.history.record_attempt(history_keys, strategy['id'], success, duration_seconds)
+
+    @staticmethod
+    def is_applicable(strategy: Dict[str, Any], file_path: Path) -> Tuple[bool, Optional[str]]:
+        is_mkv = file_path.suffix.lower() == ".mkv"
+        if strategy['type'] == "ffmpeg_profile":
+            profile_object: Optional[RepairProfile] = strategy.get("profile_object")
+            if not profile_object: return False, f"Brak obiektu profilu dla strategii FFmpeg (ID: {strategy['id']})."
+            if profile_object.applies_to_mkv_only and not is_mkv: return False, "Nieodpowiedni typ pliku dla tego profilu FFmpeg."
+            return True, None
+        if strategy.get('handler_key') == "mkvmerge_remux":
+            return (True, None) if is_mkv else (False, "Nieodpowiedni typ pliku.")
+        return False, f"Nieobsługiwana strategia wbudowana '{strategy.get('handler_key')}'."
+
+    def build_attempt_output_path(self, file_path: Path, strategy: Dict[str, Any]) -> Path:
+        repair_output_dir = Path(str(self.config_manager.snapshot.paths.default_repaired_directory)).expanduser().resolve()
+        attempt_suffix = strategy['id'].replace("builtin_", "").replace("-", "_").replace(" ", "_")[:15]
+        temp_repaired_file_name = f"{file_path.stem}_repair_attempt_{attempt_suffix}{file_path.suffix}"
+        return self.path_resolver.generate_unique_output_path(repair_output_dir / temp_repaired_file_name, is_repair_path=False)
+
+    def execute_strategy(self, strategy: Dict[str, Any], file_path: Path, output_path: Path, cancel_event: Optional[threading.Event] = None) -> Tuple[bool, Optional[str]]:
+        applicable, reason = self.is_applicable(strategy, file_path)
+        if not applicable: return False, reason
+        if strategy['type'] == "ffmpeg_profile":
+            return self.ffmpeg_manager.execute_ffmpeg_repair_with_profile(file_path, output_path, strategy["profile_object"], cancel_event=cancel_event)
+        return self.ffmpeg_manager.remux_file_with_mkvmerge(file_path, output_path, cancel_event=cancel_event)
+
+    def verify_output(self, output_path: Path) -> Optional[bool]:
+        """Zwraca wynik weryfikacji ffprobe lub None, gdy weryfikacja jest wyłączona w konfiguracji."""
+        if not self.config_manager.snapshot.processing.verify_repaired_files: return None
+        return self.ffmpeg_manager.is_file_readable_by_ffprobe(output_path)
+
+    @staticmethod
+    def discard_output(output_path: Optional[Path]) -> None:
+        if output_path is None or not output_path.exists(): return
+        try: output_path.unlink(missing_ok=True)
+        except OSError as e: logger.warning(f"Nie można usunąć pliku tymczasowego naprawy '{output_path.name}': {e}")
+
+    def race_strategies(self, file_path: Path, strategies: List[Dict[str, Any]], top_k: Optional[int] = None, history_keys: Optional[List[str]] = None) -> RaceOutcome:
+        """
+        Uruchamia strategie partiami po top_k równolegle. Pierwsza strategia, której wynik
+        przejdzie weryfikację, wygrywa - pozostałe procesy są zabijane, a ich pliki usuwane.
+        """
+        if top_k is None: top_k = self.config_manager.snapshot.processing.repair_options.race_top_k
+        top_k = max(1, top_k)
+        outcome = RaceOutcome()
+        applicable: List[Dict[str, Any]] = []
+        for strategy in strategies:
+            ok, reason = self.is_applicable(strategy, file_path)
+            if ok: applicable.append(strategy)
+            else: outcome.failures.append((strategy['name'], reason or "Strategia nie ma zastosowania."))
+        winner_lock = threading.Lock()
+
+        def run_racer(strategy: Dict[str, Any], cancel_event: threading.Event) -> None:
+            output_path = self.build_attempt_output_path(file_path, strategy)
+            start_time = time.monotonic()
+            success, error_msg = self.execute_strategy(strategy, file_path, output_path, cancel_event)
+            if not success:
+                self.discard_output(output_path)
+                # Przerwani uczestnicy wyścigu nie są porażką - nie trafiają do historii
+                if not cancel_event.is_set():
+                    outcome.failures.append((strategy['name'], error_msg or "Nieznany błąd."))
+                    self.record_attempt(history_keys, strategy, False, time.monotonic() - start_time)
+                return
+            verified = None if cancel_event.is_set() else self.verify_output(output_path)
+            with winner_lock:
+                if verified is not False and not cancel_event.is_set():
+                    outcome.winner, outcome.output_path, outcome.verified = strategy, output_path, bool(verified)
+                    cancel_event.set()
+                    logger.info(f"Wyścig naprawy '{file_path.name}': wygrywa strategia '{strategy['name']}'.")
+                    self.record_attempt(history_keys, strategy, True, time.monotonic() - start_time)
+                    return
+            self.discard_output(output_path)
+            if verified is False:
+                outcome.failures.append((strategy['name'], "Naprawiony plik nieczytelny po weryfikacji."))
+                self.record_attempt(history_keys, strategy, False, time.monotonic() - start_time)
+
+        for batch_start in range(0, len(applicable), top_k):
+            batch = applicable[batch_start:batch_start + top_k]
+            cancel_event = threading.Event()
+            logger.info(f"Wyścig naprawy '{file_path.name}': {', '.join(s['name'] for s in batch)}.")
+            with ThreadPoolExecutor(max_workers=len(batch), thread_name_prefix="repair_race") as executor:
+                for future in [executor.submit(run_racer, strategy, cancel_event) for strategy in batch]:
+                    try: future.result()
+                    except Exception as e: logger.error(f"Nieoczekiwany błąd strategii w wyścigu naprawy '{file_path.name}': {e}", exc_info=True)
+            if outcome.success: break
+        return outcome
+
+    def repair_entry(self, file_entry: Dict[str, Any], strategies: List[Dict[str, Any]]) -> EntryRepairResult:
+        """
+        Nienadzorowana naprawa wpisu: łańcuch strategii (sekwencyjnie lub wyścigiem) w kolejności
+        z historii. Nie dotyka rejestru - zwraca zmianę do zatwierdzenia paczką.
+        """
+        file_path_val = file_entry.get('file_path')
+        if not file_path_val: return EntryRepairResult(None, False, error_message="Wpis nie ma zdefiniowanej ścieżki.")
+        file_path = Path(str(file_path_val))
+        if not file_path.exists(): return EntryRepairResult(file_path, False, error_message=f"Plik źródłowy '{file_path.name}' nie istnieje.")
+        if not strategies: return EntryRepairResult(file_path, False, error_message="Brak aktywnych strategii naprawy.")
+
+        history_keys = self.history.build_keys(file_entry)
+        ordered_strategies = self.order_strategies(strategies, history_keys)
+        if len(ordered_strategies) > 1 and self.config_manager.snapshot.processing.repair_options.race_strategies:
+            race_outcome = self.race_strategies(file_path, ordered_strategies, history_keys=history_keys)
+            if race_outcome.success and race_outcome.winner:
+                return EntryRepairResult(file_path, True, race_outcome.winner['name'], race_outcome.output_path, race_outcome.verified)
+            last_error = race_outcome.failures[-1][1] if race_outcome.failures else None
+            return EntryRepairResult(file_path, False, error_message=last_error, registry_status=(FAILED_REPAIR_STATUS, FAILED_REPAIR_DETAILS))
+
+        last_error: Optional[str] = None
+        for strategy in ordered_strategies:
+            applicable, skip_reason = self.is_applicable(strategy, file_path)
+            if not applicable:
+                logger.debug(f"Strategia '{strategy['name']}' pominięta dla '{file_path.name}': {skip_reason}")
+                continue
+            output_path = self.build_attempt_output_path(file_path, strategy)
+            start_time = time.monotonic()
+            success, error_msg = self.execute_strategy(strategy, file_path, output_path)
+            verified = self.verify_output(output_path) if success else False
+            if success and verified is not False:
+                self.record_attempt(history_keys, strategy, True, time.monotonic() - start_time)
+                logger.info(f"Plik '{file_path.name}' naprawiony strategią '{strategy['name']}'{' (zweryfikowany)' if verified else ''}.")
+                return EntryRepairResult(file_path, True, strategy['name'], output_path, bool(verified))
+            self.record_attempt(history_keys, strategy, False, time.monotonic() - start_time)
+            last_error = error_msg if not success else "Naprawiony plik nieczytelny po weryfikacji."
+            if success or (output_path.exists() and output_path.stat().st_size == 0): self.discard_output(output_path)
+        return EntryRepairResult(file_path, False, error_message=last_error, registry_status=(FAILED_REPAIR_STATUS, FAILED_REPAIR_DETAILS))
+
+    def repair_entries_bulk(self,
+                            file_entries: List[Dict[str, Any]],
+                            damaged_files_manager: DamagedFilesManager,
+                            progress_callback: Optional[BulkRepairProgressCallback] = None
+                            ) -> List[EntryRepairResult]:
+        """
+        Naprawia wiele wpisów w puli wątków. Zmiany rejestru (statusy, usunięcia) i historia
+        napraw są zatwierdzane paczkami z wątku głównego, a nie po każdym kroku.
+        """
+        max_workers = max(1, min(BULK_REPAIR_POOL_THREAD_CAP, self.config_manager.get_config_value(REPAIR_CFG_BASE_PATH, 'bulk_max_workers', 2)))
+        batch_size = max(1, self.config_manager.get_config_value(REPAIR_CFG_BASE_PATH, 'bulk_commit_batch_size', 10))
+        strategies = self.build_active_strategies()
+        total = len(file_entries)
+        logger.info(f"Rozpoczynanie zbiorczej naprawy {total} plików (wątki: {max_workers}, paczka rejestru: {batch_size}, strategie: {len(strategies)}).")
+        results: List[EntryRepairResult] = []
+        pending_updates: List[Tuple[Path, str, Optional[str]]] = []
+        pending_removals: List[Path] = []
+
+        def commit_pending() -> None:
+            damaged_files_manager.commit_batch_updates(pending_updates, pending_removals)
+            self.history.save()
+            pending_updates.clear(); pending_removals.clear()
+
+        def current_worker_limit() -> int:
+            # Czytane z migawki przy każdym zwolnieniu miejsca - przeładowanie konfiguracji zmienia liczbę wątków w trakcie
+            return max(1, min(BULK_REPAIR_POOL_THREAD_CAP, self.config_manager.snapshot.processing.repair_options.bulk_max_workers))
+
+        entries_to_submit = iter(file_entries)
+        futures: Dict[Future, Dict[str, Any]] = {}
+        done_count = 0; worker_limit = max_workers
+        try:
+            with ThreadPoolExecutor(max_workers=BULK_REPAIR_POOL_THREAD_CAP, thread_name_prefix="bulk_repair") as executor:
+                while True:
+                    new_worker_limit = current_worker_limit()
+                    if new_worker_limit != worker_limit:
+                        logger.info(f"Zbiorcza naprawa: zmiana liczby wątków {worker_limit} -> {new_worker_limit} (przeładowana konfiguracja)."); worker_limit = new_worker_limit
+                    while len(futures) < worker_limit:
+                        entry = next(entries_to_submit, None)
+                        if entry is None: break
+                        futures[executor.submit(self.repair_entry, entry, strategies)] = entry
+                    if not futures: break
+                    finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        entry = futures.pop(future); done_count += 1
+                        try: result = future.result()
+                        except Exception as e:
+                            entry_path = Path(str(entry['file_path'])) if entry.get('file_path') else None
+                            logger.error(f"Nieoczekiwany błąd naprawy pliku '{entry_path.name if entry_path else '?'}': {e}", exc_info=True)
+                            result = EntryRepairResult(entry_path, False, error_message=str(e))
+                        results.append(result)
+                        if result.file_path is not None:
+                            if result.success: pending_removals.append(result.file_path)
+                            elif result.registry_status: pending_updates.append((result.file_path, result.registry_status[0], result.registry_status[1]))
+                        if len(pending_updates) + len(pending_removals) >= batch_size: commit_pending()
+                        if progress_callback: progress_callback(done_count, total, result.file_path.name if result.file_path else "?", result.success)
+        finally:
+            # Również po przerwaniu - naprawione już pliki nie mogą zostać w rejestrze jako uszkodzone
+            commit_pending()
+        logger.info(f"Zbiorcza naprawa zakończona. Naprawione: {sum(1 for r in results if r.success)}/{total}.")
+        return results
@@ -2,14 +2,15 @@
 import json
 import logging
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import uuid
 import sys 
 import shutil 
 from datetime import datetime 
 
 from .config_manager import ConfigManager
-from .models import RepairProfile, AppJSONEncoder, AppJSONDecoder
+from .models import RepairProfile, AppJSONEncoder
+from .state_codec import read_json_file, decode_repair_profiles
 
 logger = logging.getLogger(__name__)
 
@@ -111,8 +112,7 @@ class RepairProfiler:
             logger.info("RepairProfiler: Plik profili naprawy nie znaleziony. Zwracanie pustej listy.")
             return []
         try:
-            with open(self.profiles_file_path, 'r', encoding='utf-8') as f:
-                raw_profiles_data = json.load(f, cls=AppJSONDecoder)
+            raw_profiles_data = decode_repair_profiles(read_json_file(self.profiles_file_path))
             if not isinstance(raw_profiles_data, list):
                 logger.error(f"RepairProfiler: Zawartość pliku profili naprawy nie jest listą. Znaleziono: {type(raw_profiles_data)}. Zwracanie pustej listy.")
                 self._backup_corrupted_profile_file("not_a_list")
@@ -149,14 +149,30 @@ class RepairProfiler:
 
     def _save_profiles(self):
         logger.debug(f"RepairProfiler: Zapisywanie {len(self.profiles)} profili naprawy do {self.profiles_file_path}")
+        tmp_path = self.profiles_file_path.with_name(f"{self.profiles_file_path.name}.tmp")
         try:
             self.profiles_file_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.profiles_file_path, 'w', encoding='utf-8') as f:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 json.dump(self.profiles, f, indent=4, cls=AppJSONEncoder)
+            tmp_path.replace(self.profiles_file_path)
             logger.info(f"RepairProfiler: Pomyślnie zapisano {len(self.profiles)} profili naprawy.")
         except Exception as e:
             logger.error(f"RepairProfiler: Błąd zapisu profili naprawy do {self.profiles_file_path}: {e}", exc_info=True)
 
+    def reload_profiles(self) -> Tuple[bool, Optional[str]]:
+        """Przeładowanie w działającej aplikacji: podmiana całej listy tylko dla w pełni poprawnego pliku."""
+        self.profiles_file_path = self.config_manager.get_repair_profiles_file_full_path()
+        try:
+            raw_profiles_data = decode_repair_profiles(read_json_file(self.profiles_file_path))
+        except (OSError, ValueError) as e:
+            return False, f"Nie można wczytać profili naprawy z {self.profiles_file_path}: {e}"
+        if not isinstance(raw_profiles_data, list): return False, f"Zawartość {self.profiles_file_path} nie jest listą profili naprawy."
+        invalid_entries = [item for item in raw_profiles_data if not isinstance(item, RepairProfile)]
+        if invalid_entries: return False, f"Nieprawidłowy wpis profilu naprawy: {invalid_entries[0]!r}"
+        self.profiles = raw_profiles_data
+        logger.info(f"RepairProfiler: Przeładowano {len(raw_profiles_data)} profili naprawy z {self.profiles_file_path}.")
+        return True, None
+
     def add_profile(self, profile: RepairProfile, save: bool = True) -> RepairProfile:
         logger.debug(f"RepairProfiler: Próba dodania profilu naprawy: {profile.name}")
         if not isinstance(profile.id, uuid.UUID): profile.id = uuid.uuid4()
@@ -0,0 +1,81 @@
+# src/state_codec.py
+import gc
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+from .models import JobState, EncodingProfile, RepairProfile, MediaInfo
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """
+    Parsuje JSON szybszym backendem (orjson), jeśli jest zainstalowany; w przeciwnym razie modułem json.
+    Błędy składni w obu przypadkach są json.JSONDecodeError (orjson.JSONDecodeError dziedziczy po nim).
+    """
+    if ORJSON_AVAILABLE: return orjson.loads(data)
+    return json.loads(data)
+
+
+def read_json_file(file_path: Path) -> Any:
+    with open(file_path, 'rb') as f:
+        return loads(f.read())
+
+
+# Dekodery wg schematu: surowe typy JSON są zamieniane na Path/datetime/UUID tylko w znanych polach
+# (robią to metody from_dict modeli), zamiast sprawdzać wyrażeniami regularnymi każdy napis w pliku.
+
+def decode_job_state(data: Any) -> JobState:
+    if not isinstance(data, dict): raise ValueError(f"Oczekiwano obiektu JSON stanu zadania, otrzymano {type(data).__name__}.")
+    # Budowa setek tysięcy obiektów wyzwalałaby wielokrotne przebiegi GC, które i tak nic nie zwolnią
+    gc_was_enabled = gc.isenabled(); gc.disable()
+    try:
+        return JobState.from_dict(data)
+    finally:
+        if gc_was_enabled: gc.enable()
+
+
+def decode_encoding_profiles(data: Any) -> List[Any]:
+    """Zwraca listę EncodingProfile; wpisy, których nie da się zdekodować, zostają bez zmian (loguje je wywołujący)."""
+    if not isinstance(data, list): return data
+    return [_decode_profile_item(item, EncodingProfile) for item in data]
+
+
+def decode_repair_profiles(data: Any) -> List[Any]:
+    if not isinstance(data, list): return data
+    return [_decode_profile_item(item, RepairProfile) for item in data]
+
+
+def _decode_profile_item(item: Any, profile_cls: Any) -> Any:
+    if not isinstance(item, dict): return item
+    try: return profile_cls.from_dict(item)
+    except (ValueError, TypeError, KeyError): return item
+
+
+def decode_damaged_entries(data: Any) -> Any:
+    """Wpisy rejestru uszkodzonych plików: file_path -> Path, timestamp -> datetime, media_info -> MediaInfo."""
+    if not isinstance(data, list): return data
+    for entry in data:
+        if isinstance(entry, dict): _decode_damaged_entry(entry)
+    return data
+
+
+def _decode_damaged_entry(entry: Dict[str, Any]) -> None:
+    if isinstance(entry.get('file_path'), str): entry['file_path'] = Path(entry['file_path'])
+    timestamp_val = entry.get('timestamp')
+    if isinstance(timestamp_val, str):
+        try: entry['timestamp'] = datetime.fromisoformat(timestamp_val)
+        except ValueError: pass
+    media_info_val = entry.get('media_info')
+    if isinstance(media_info_val, dict) and media_info_val.get('file_path'):
+        try: entry['media_info'] = MediaInfo.from_dict(media_info_val)
+        except ValueError as e: logger.warning(f"Nieprawidłowe media_info we wpisie rejestru uszkodzonych plików: {e}")
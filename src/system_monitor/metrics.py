@@ -0,0 +1,184 @@
+# src/system_monitor/metrics.py
+import logging
+import math
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "video_transcoder_"
+LabelValues = Tuple[str, ...]
+# Kolektor wywoływany przy każdym odczycie: zwraca (nazwa, typ, opis, [(etykiety, wartość)])
+CollectorType = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels: return ""
+    return "{" + ",".join(f'{key}="{_escape_label_value(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value): return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value): return "NaN"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = METRIC_PREFIX + name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _label_key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames): raise ValueError(f"Metryka '{self.name}' wymaga etykiet {self.labelnames}, podano {tuple(labels)}.")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        """Linie formatu tekstowego Prometheus (HELP, TYPE i próbki) tej metryki."""
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        # Format tekstowy Prometheus: nazwa w TYPE musi być taka jak nazwa próbki (z sufiksem _total)
+        super().__init__(f"{name}_total", documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._label_key(labels)
+        with self._lock: self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._label_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock: items = list(self._values.items())
+        return self._header() + [f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        # Wskaźnik bez etykiet ma wartość od startu (0), więc jest widoczny przed pierwszym zadaniem
+        self._values: Dict[LabelValues, float] = {} if self.labelnames else {(): 0.0}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._label_key(labels)
+        with self._lock: self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._label_key(labels)
+        with self._lock: self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._label_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock: items = list(self._values.items())
+        return self._header() + [f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float], labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # etykiety -> [liczniki kubełków (nieskumulowane), suma, liczba]
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._label_key(labels)
+        with self._lock:
+            counts, totals = self._values.setdefault(key, ([0] * len(self.buckets), [0.0, 0.0]))
+            for index, upper_bound in enumerate(self.buckets):
+                if value <= upper_bound: counts[index] += 1; break
+            totals[0] += value; totals[1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock: items = [(key, list(counts), list(totals)) for key, (counts, totals) in self._values.items()]
+        lines = self._header()
+        for key, counts, (total_sum, total_count) in items:
+            labels = dict(zip(self.labelnames, key)); cumulative = 0
+            for upper_bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(upper_bound)})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total_sum)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {_format_value(total_count)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Zbiór metryk aplikacji i kolektorów liczonych przy odczycie; render() daje format tekstowy Prometheus."""
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[CollectorType] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock: self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: CollectorType) -> None:
+        with self._lock: self._collectors.append(collector)
+
+    def remove_collector(self, collector: CollectorType) -> None:
+        with self._lock:
+            if collector in self._collectors: self._collectors.remove(collector)
+
+    def render(self) -> str:
+        with self._lock: metrics, collectors = list(self._metrics), list(self._collectors)
+        lines: List[str] = []
+        for metric in metrics: lines.extend(metric.render())
+        for collector in collectors:
+            try: samples = list(collector())
+            except Exception as e:
+                logger.error(f"MetricsExporter: Błąd kolektora metryk: {e}", exc_info=True); continue
+            for name, metric_type, documentation, values in samples:
+                full_name = METRIC_PREFIX + name
+                lines += [f"# HELP {full_name} {documentation}", f"# TYPE {full_name} {metric_type}"]
+                lines += [f"{full_name}{_format_labels(labels)} {_format_value(value)}" for labels, value in values if value is not None]
+        return "\n".join(lines) + "\n"
+
+
+# Rejestr i metryki wspólne dla całej aplikacji - moduły silnika zapisują do nich bezpośrednio,
+# niezależnie od tego, czy serwer HTTP (metrics_exporter) jest włączony - koszt to słownik pod blokadą
+REGISTRY = MetricsRegistry()
+FILES_TOTAL: Counter = REGISTRY.register(Counter('files', "Pliki zadań transkodowania wg profilu i wyniku (completed/failed/skipped).", ('profile', 'outcome')))  # type: ignore[assignment]
+ENCODE_FPS: Histogram = REGISTRY.register(Histogram('encode_fps', "Średnia liczba klatek na sekundę ukończonych kodowań.", (5, 10, 25, 50, 100, 200, 400, 800)))  # type: ignore[assignment]
+ENCODE_SPEED: Histogram = REGISTRY.register(Histogram('encode_speed_ratio', "Prędkość ukończonych kodowań (sekundy materiału na sekundę).", (0.25, 0.5, 1, 2, 4, 8, 16, 32)))  # type: ignore[assignment]
+QUEUE_DEPTH: Gauge = REGISTRY.register(Gauge('queue_depth', "Pliki bieżącego zadania oczekujące na kodowanie."))  # type: ignore[assignment]
+ACTIVE_WORKERS: Gauge = REGISTRY.register(Gauge('active_workers', "Trwające kodowania plików."))  # type: ignore[assignment]
+PROBE_CACHE_LOOKUPS: Counter = REGISTRY.register(Counter('probe_cache_lookups', "Odczyty cache MediaInfo (ffprobe) wg wyniku (hit/miss).", ('result',)))  # type: ignore[assignment]
+REPAIR_ATTEMPTS: Counter = REGISTRY.register(Counter('repair_attempts', "Próby naprawy wg strategii i wyniku (success/failure).", ('strategy', 'outcome')))  # type: ignore[assignment]
+
+
+def record_file_outcome(profile_name: str, outcome: str, count: int = 1) -> None:
+    FILES_TOTAL.inc(count, profile=profile_name or "unknown", outcome=outcome)
+
+
+def _probe_cache_collector():
+    hits = PROBE_CACHE_LOOKUPS.value(result='hit'); misses = PROBE_CACHE_LOOKUPS.value(result='miss')
+    ratio = hits / (hits + misses) if hits + misses > 0 else 0.0
+    yield ('probe_cache_hit_ratio', 'gauge', "Udział trafień cache MediaInfo od startu aplikacji.", [({}, ratio)])
+
+
+REGISTRY.add_collector(_probe_cache_collector)
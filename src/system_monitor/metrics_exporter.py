@@ -0,0 +1,102 @@
+# src/system_monitor/metrics_exporter.py
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ..config_manager import ConfigManager
+from .metrics import REGISTRY, MetricsRegistry
+from .resource_monitor import ResourceMonitor
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE_PROMETHEUS = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+            self.send_error(404, "Not Found", "Only /metrics is served"); return  # Linia statusu HTTP musi być w latin-1
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE_PROMETHEUS)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(f"MetricsExporter: {self.address_string()} - {format % args}")
+
+
+class MetricsExporter:
+    """
+    Opcjonalny lokalny endpoint HTTP (/metrics) w formacie Prometheus/OpenMetrics, obsługiwany przez
+    http.server w wątku tła. Oprócz metryk silnika eksportuje migawkę ResourceMonitor oraz liczbę
+    trwających procesów ProcessSupervisor - obie liczone w chwili odczytu.
+    """
+    def __init__(self, config_manager: ConfigManager, resource_monitor: Optional[ResourceMonitor] = None, registry: MetricsRegistry = REGISTRY):
+        self.config_manager = config_manager
+        self.resource_monitor = resource_monitor
+        self.registry = registry
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _resource_collector(self):
+        monitor = self.resource_monitor
+        if monitor is None or not monitor.is_available(): return
+        cpu_usage = monitor.get_cpu_usage(); ram_usage = monitor.get_ram_usage()
+        yield ('cpu_usage_percent', 'gauge', "Użycie CPU (ResourceMonitor).", [({}, cpu_usage)])
+        if ram_usage: yield ('ram_usage_percent', 'gauge', "Użycie RAM (ResourceMonitor).", [({}, ram_usage['percent'])])
+        load_average = monitor.get_load_average()
+        if load_average:
+            try: load_1m = float(str(load_average).replace(',', ' ').split()[0])
+            except (ValueError, IndexError): load_1m = None
+            yield ('load_average_1m', 'gauge', "Średnie obciążenie systemu (1 min).", [({}, load_1m)])
+        output_dir = self.config_manager.get_config_value('paths', 'default_output_directory')
+        # Brak katalogu wyjściowego nie jest błędem przy każdym odczycie - metryka jest wtedy pomijana
+        disk_usage = monitor.get_specific_disk_usage(output_dir) if output_dir and Path(output_dir).exists() else None
+        if disk_usage: yield ('output_disk_free_gigabytes', 'gauge', "Wolne miejsce na dysku katalogu wyjściowego (GB).", [({}, disk_usage['free_gb'])])
+
+    @staticmethod
+    def _process_collector():
+        from ..ffmpeg.process_supervisor import peek_process_supervisor
+        supervisor = peek_process_supervisor()
+        counts = supervisor.active_counts() if supervisor is not None else {}
+        yield ('active_processes', 'gauge', "Trwające procesy narzędzi wg rodzaju (ProcessSupervisor).", [({'kind': kind}, float(count)) for kind, count in counts.items()])
+        # Suma ostatnich odczytów psutil trwających procesów wg rodzaju i narzędzia
+        usage: Dict[Tuple[str, str], List[float]] = {}
+        for sample in (supervisor.active_usage_samples() if supervisor is not None else []):
+            totals = usage.setdefault((sample.kind, sample.tool_name), [0.0, 0.0])
+            totals[0] += sample.cpu_percent; totals[1] += sample.rss_bytes
+        yield ('active_process_cpu_percent', 'gauge', "CPU% trwających procesów narzędzi (próbkowanie psutil).", [({'kind': kind, 'tool': tool}, totals[0]) for (kind, tool), totals in usage.items()])
+        yield ('active_process_rss_bytes', 'gauge', "RSS trwających procesów narzędzi (próbkowanie psutil).", [({'kind': kind, 'tool': tool}, totals[1]) for (kind, tool), totals in usage.items()])
+
+    def start(self) -> bool:
+        """Uruchamia serwer, jeśli general.metrics_exporter_enabled. Zwraca True, gdy nasłuchuje."""
+        if self._server is not None: return True
+        general_cfg = self.config_manager.snapshot.general
+        if not general_cfg.metrics_exporter_enabled: return False
+        host, port = general_cfg.metrics_exporter_host, general_cfg.metrics_exporter_port
+        handler_class = type('MetricsRequestHandler', (_MetricsRequestHandler,), {'registry': self.registry})
+        try:
+            self._server = ThreadingHTTPServer((host, port), handler_class)
+        except OSError as e:
+            logger.error(f"MetricsExporter: Nie można nasłuchiwać na {host}:{port}: {e}"); return False
+        self._server.daemon_threads = True
+        self.registry.add_collector(self._resource_collector)
+        self.registry.add_collector(self._process_collector)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics_exporter", daemon=True)
+        self._thread.start()
+        logger.info(f"MetricsExporter: Metryki dostępne pod http://{host}:{self._server.server_address[1]}/metrics")
+        return True
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        if self._server is None: return
+        self._server.shutdown(); self._server.server_close()
+        if self._thread is not None: self._thread.join(timeout)
+        self.registry.remove_collector(self._resource_collector)
+        self.registry.remove_collector(self._process_collector)
+        self._server = None; self._thread = None
@@ -0,0 +1,107 @@
+# src/system_monitor/process_sampler.py
+import logging
+import time
+from typing import Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessUsageSample:
+    """Jeden odczyt zasobów procesu narzędzia (ffmpeg/ffprobe/mkvmerge)."""
+    __slots__ = ('pid', 'tool_name', 'kind', 'cpu_percent', 'rss_bytes', 'read_bytes', 'write_bytes', 'num_threads', 'sampled_at')
+
+    def __init__(self, pid: int, tool_name: str, kind: str, cpu_percent: float, rss_bytes: int, read_bytes: Optional[int], write_bytes: Optional[int], num_threads: int):
+        self.pid = pid
+        self.tool_name = tool_name
+        self.kind = kind
+        self.cpu_percent = cpu_percent
+        self.rss_bytes = rss_bytes
+        self.read_bytes = read_bytes
+        self.write_bytes = write_bytes
+        self.num_threads = num_threads
+        self.sampled_at = time.time()
+
+
+class ProcessUsageSummary:
+    """
+    Podsumowanie odczytów jednego procesu: średnie i szczytowe CPU%, szczytowe RSS i liczba wątków
+    oraz liczniki I/O z ostatniego odczytu (proces jest zbierany przez pętlę zdarzeń przed ostatnim
+    możliwym odczytem, więc końcówka pracy z okresu próbkowania nie jest ujęta).
+    """
+    __slots__ = ('sample_count', 'cpu_percent_total', 'peak_cpu_percent', 'peak_rss_bytes', 'peak_threads', 'read_bytes', 'write_bytes')
+
+    def __init__(self):
+        self.sample_count = 0
+        self.cpu_percent_total = 0.0
+        self.peak_cpu_percent = 0.0
+        self.peak_rss_bytes = 0
+        self.peak_threads = 0
+        self.read_bytes: Optional[int] = None
+        self.write_bytes: Optional[int] = None
+
+    def add(self, sample: ProcessUsageSample) -> None:
+        self.sample_count += 1
+        self.cpu_percent_total += sample.cpu_percent
+        self.peak_cpu_percent = max(self.peak_cpu_percent, sample.cpu_percent)
+        self.peak_rss_bytes = max(self.peak_rss_bytes, sample.rss_bytes)
+        self.peak_threads = max(self.peak_threads, sample.num_threads)
+        if sample.read_bytes is not None: self.read_bytes = sample.read_bytes
+        if sample.write_bytes is not None: self.write_bytes = sample.write_bytes
+
+    @property
+    def average_cpu_percent(self) -> Optional[float]:
+        return self.cpu_percent_total / self.sample_count if self.sample_count else None
+
+
+class ChildProcessSampler:
+    """
+    Odczyt zasobów procesu potomnego przez psutil: CPU% (od poprzedniego odczytu, może przekraczać
+    100% dla wielu rdzeni), RSS, liczniki I/O (tam, gdzie system je udostępnia) i liczba wątków.
+    """
+    def __init__(self, pid: int, tool_name: str, kind: str):
+        self.pid = pid
+        self.tool_name = tool_name
+        self.kind = kind
+        self._process = None
+        self._io_supported = True
+        if psutil is None: return
+        try:
+            self._process = psutil.Process(pid)
+            # Pomiar odniesienia - kolejne cpu_percent(None) zwracają użycie od poprzedniego wywołania
+            self._process.cpu_percent(interval=None)
+        except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+            logger.debug(f"ChildProcessSampler: Nie można śledzić procesu '{tool_name}' (PID: {pid}): {e}")
+            self._process = None
+
+    @staticmethod
+    def is_available() -> bool:
+        return psutil is not None
+
+    def sample(self) -> Optional[ProcessUsageSample]:
+        """Zwraca odczyt albo None, gdy proces już się zakończył lub jest niedostępny."""
+        if self._process is None: return None
+        try:
+            with self._process.oneshot():
+                cpu_percent = self._process.cpu_percent(interval=None)
+                rss_bytes = self._process.memory_info().rss
+                num_threads = self._process.num_threads()
+                read_bytes = write_bytes = None
+                if self._io_supported:
+                    try:
+                        io_counters = self._process.io_counters()
+                        read_bytes, write_bytes = io_counters.read_bytes, io_counters.write_bytes
+                    except (AttributeError, NotImplementedError, psutil.AccessDenied):
+                        # Brak liczników I/O procesu w systemie (np. macOS) - nie próbujemy ponownie
+                        self._io_supported = False
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            return None
+        except psutil.AccessDenied as e:
+            logger.debug(f"ChildProcessSampler: Brak dostępu do procesu '{self.tool_name}' (PID: {self.pid}): {e}")
+            self._process = None
+            return None
+        return ProcessUsageSample(self.pid, self.tool_name, self.kind, cpu_percent, rss_bytes, read_bytes, write_bytes, num_threads)
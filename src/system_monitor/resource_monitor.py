@@ -20,12 +20,14 @@ class ResourceMonitor:
     def __init__(self):
         if psutil is None: logger.warning("Biblioteka psutil nie została znaleziona."); return
         logger.debug("ResourceMonitor zainicjalizowany.")
+        # Pomiar odniesienia: kolejne cpu_percent(interval=None) zwracają użycie od poprzedniego wywołania bez blokowania
+        psutil.cpu_percent(interval=None)
         if hasattr(psutil, 'net_io_counters'): self.initial_net_io = psutil.net_io_counters(); self.last_net_io = self.initial_net_io; self.last_net_io_time = time.time()
         else: self.initial_net_io = None; self.last_net_io = None; self.last_net_io_time = None; logger.warning("psutil.net_io_counters() niedostępne.")
     def is_available(self) -> bool: return psutil is not None
     def get_cpu_usage(self) -> Optional[float]:
         if not self.is_available(): return None
-        try: return psutil.cpu_percent(interval=0.1) 
+        try: return psutil.cpu_percent(interval=None) 
         except Exception as e: logger.error(f"Błąd CPU: {e}", exc_info=True); return None
     def get_ram_usage(self) -> Optional[Dict[str, Any]]:
         if not self.is_available(): return None
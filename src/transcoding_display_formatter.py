@@ -122,6 +122,14 @@ class TranscodingDisplayFormatter:
             except ValueError:
                 return "---- MB" # Błąd konwersji
 
+        return self.format_bytes(size_bytes)
+
+    def format_bytes(self, size_bytes: Optional[float]) -> str:
+        """
+        Formatuje liczbę bajtów (np. RSS lub liczniki I/O procesu) do czytelnego formatu (KB, MB, GB).
+        """
+        if size_bytes is None:
+            return "---- MB"
         if size_bytes < 1024:
             return f"{size_bytes} B"
         elif size_bytes < 1024**2:
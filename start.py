@@ -3,13 +3,16 @@ import logging
 import sys
 from pathlib import Path
 from datetime import datetime
+from typing import Optional
 
 from src.logger_configurator import LoggerConfigurator
-from src.config_manager import ConfigManager, DEFAULT_CONFIG
+from src.config_manager import ConfigManager, ConfigSection, DEFAULT_CONFIG
+from src.config_watcher import ConfigWatcher
 from src.cli_display import CLIDisplay
 from src.profiler import Profiler
 from src.repair_profiler import RepairProfiler
 from src.ffmpeg.ffmpeg_manager import FFmpegManager
+from src.ffmpeg.process_supervisor import peek_process_supervisor
 from src.filesystem.path_resolver import PathResolver
 from src.filesystem.job_state_manager import JobStateManager
 from src.filesystem.directory_scanner import DirectoryScanner
@@ -17,8 +20,8 @@ from src.filesystem.damaged_files_manager import DamagedFilesManager
 from src.system_monitor.resource_monitor import ResourceMonitor
 from src.cli_handlers.main_router import MainRouter
 
-def main():
-    app_base_dir = Path(__file__).resolve().parent 
+def main(app_base_dir: Optional[Path] = None):
+    app_base_dir = app_base_dir or Path(__file__).resolve().parent 
     config_manager = ConfigManager(app_base_dir_override=app_base_dir)
 
     log_level_file_str = config_manager.get_config_value('general', 'log_level_file', DEFAULT_CONFIG['general']['log_level_file'])
@@ -53,6 +56,7 @@ def main():
     progress_bar_width_val = config_manager.get_config_value('ui', 'progress_bar_width', DEFAULT_CONFIG['ui']['progress_bar_width'])
     progress_bar_ui_width = int(progress_bar_width_val) if isinstance(progress_bar_width_val, (int, float, str)) and str(progress_bar_width_val).isdigit() else 40
     display.set_progress_bar_width(progress_bar_ui_width)
+    display.set_progress_refresh_rate(config_manager.snapshot.ui.progress_refresh_rate)
 
     ffmpeg_manager = FFmpegManager(config_manager, display_progress_callback=display.display_progress_bar)
     path_resolver = PathResolver(config_manager) # Inicjalizacja PathResolver
@@ -72,6 +76,33 @@ def main():
     
     repair_profiler_instance = RepairProfiler(config_manager)
 
+    def apply_reloaded_config(old_config: ConfigSection, new_config: ConfigSection):
+        logging_keys = ('log_level_file', 'log_level_console', 'console_logging_enabled')
+        if any(old_config.general.get(key) != new_config.general.get(key) for key in logging_keys) or old_config.paths.get('log_file') != new_config.paths.get('log_file'):
+            # Bez czyszczenia pliku logu - to nie jest start aplikacji
+            LoggerConfigurator.setup_logging(
+                log_file=config_manager.get_log_file_full_path(),
+                log_level_file=new_config.general.log_level_file if isinstance(new_config.general.log_level_file, int) else logging.INFO,
+                log_level_console=new_config.general.log_level_console if isinstance(new_config.general.log_level_console, int) else logging.INFO,
+                console_logging_enabled=new_config.general.console_logging_enabled,
+                clear_log_on_start=False
+            )
+            logger.info("Konfiguracja logowania przeładowana po zmianie pliku konfiguracyjnego.")
+        if old_config.ui.progress_bar_width != new_config.ui.progress_bar_width:
+            display.set_progress_bar_width(new_config.ui.progress_bar_width)
+        if old_config.ui.progress_refresh_rate != new_config.ui.progress_refresh_rate:
+            display.set_progress_refresh_rate(new_config.ui.progress_refresh_rate)
+
+    config_manager.subscribe(apply_reloaded_config)
+    config_watcher = ConfigWatcher(config_manager, profiler=profiler, repair_profiler=repair_profiler_instance)
+    config_watcher.start()
+    metrics_exporter = None
+    if config_manager.snapshot.general.metrics_exporter_enabled:
+        # http.server ładowany tylko przy włączonym eksporterze metryk
+        from src.system_monitor.metrics_exporter import MetricsExporter
+        metrics_exporter = MetricsExporter(config_manager, resource_monitor)
+        metrics_exporter.start()
+
     if not resource_monitor.is_available() and console_logging_enabled_bool:
         display.display_warning(
             "Biblioteka 'psutil' nie jest zainstalowana lub dostępna. "
@@ -108,6 +139,12 @@ def main():
             print(f"KRYTYCZNY BŁĄD APLIKACJI: {e}", file=sys.stderr)
             print("Sprawdź plik logu (jeśli został utworzony), aby uzyskać więcej informacji.", file=sys.stderr)
         sys.exit(1)
+    finally:
+        config_watcher.stop()
+        if metrics_exporter is not None: metrics_exporter.stop()
+        # Zatrzymanie pętli zdarzeń nadzorcy procesów narzędzi (jeśli powstał w tym uruchomieniu)
+        process_supervisor = peek_process_supervisor()
+        if process_supervisor is not None: process_supervisor.shutdown()
 
     logger.info("="*50 + "\nAplikacja Video Transcoder NG zakończona.\n" + "="*50)
     if 'display' in locals() and display is not None: